@@ -28,6 +28,7 @@ hiddenimports = [
     'PyQt5.QtCore',
     'PyQt5.QtGui',
     'PyQt5.QtWidgets',
+    'PyQt5.QtNetwork',
     'PyQt5.sip',
     'sqlite3',
 ]
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试包 - 无界面运行的性能基准与合成数据集生成
+
+用法（在项目根目录执行）:
+    python -m benchmarks                       # 默认规模 1k、10k
+    python -m benchmarks --sizes 1k,10k,100k   # 指定数据规模
+    python -m benchmarks --save-baseline       # 将本次结果保存为基线
+"""
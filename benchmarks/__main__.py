@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试入口: python -m benchmarks [选项]
+
+退出码：0 = 通过；1 = 存在性能回归、超出预算或缺少基线（--no-baseline 时不对比）
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+
+DEFAULT_SIZES = "1k,10k"
+DEFAULT_SUITES = "repository,ui,startup"
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="幽梦个人助手性能基准测试")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="数据规模，逗号分隔（1k,10k,100k）")
+    parser.add_argument("--suites", default=DEFAULT_SUITES, help="基准套件，逗号分隔（repository,ui,startup）")
+    parser.add_argument("--seed", type=int, default=42, help="数据集随机种子")
+    parser.add_argument("--data-dir", default=None, help="数据集缓存目录（默认使用临时目录，运行后删除）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果JSON输出路径")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线JSON路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--no-baseline", action="store_true", help="不与基线对比（只记录结果）")
+    parser.add_argument("--tolerance", type=float, default=None, help="回归容忍比例（默认0.25）")
+    parser.add_argument("--import-budget-ms", type=float, default=None, help="启动导入预算（毫秒）")
+    parser.add_argument("--verbose", action="store_true", help="保留应用日志输出")
+    parser.add_argument("--sql-stats", action="store_true", help="结束时输出按语句聚合的SQL执行统计")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_arguments(argv)
+    output_path = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+    
+    # 在独立工作目录中运行，避免在项目目录生成日志、配置和数据库文件
+    owns_work_dir = args.data_dir is None
+    work_dir = tempfile.mkdtemp(prefix="youmeng_bench_") if owns_work_dir else os.path.abspath(args.data_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    os.chdir(work_dir)
+    
+    from utils.logger import logger
+    from benchmarks import bench_repository, bench_startup, bench_ui
+    from benchmarks.dataset import DATASET_SIZES, generate_database
+    from benchmarks.runner import (
+        DEFAULT_TOLERANCE, BenchmarkContext, Recorder,
+        build_report, compare_to_baseline, load_report, save_report
+    )
+    
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+    
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    suites = {suite.strip() for suite in args.suites.split(",") if suite.strip()}
+    unknown = [size for size in sizes if size not in DATASET_SIZES]
+    if unknown:
+        print(f"未知的数据规模: {', '.join(unknown)}（可选: {', '.join(DATASET_SIZES)}）")
+        return 2
+    
+    recorder = Recorder()
+    try:
+        if "startup" in suites:
+            print("[startup] 启动导入预算")
+            budget = args.import_budget_ms or bench_startup.DEFAULT_IMPORT_BUDGET_MS
+            bench_startup.run(recorder, budget, cwd=work_dir)
+        
+        for size in sizes:
+            count = DATASET_SIZES[size]
+            db_path = os.path.join(work_dir, f"tasks_{size}_s{args.seed}.db")
+            if not os.path.exists(db_path):
+                start = time.perf_counter()
+                stats = generate_database(db_path, count, seed=args.seed)
+                print(f"[dataset] 生成 {size} 数据集: {stats}，耗时 {time.perf_counter() - start:.1f}s")
+            
+            ctx = BenchmarkContext(size, count, db_path, work_dir)
+            if "repository" in suites:
+                print(f"[repository] {size}")
+                bench_repository.run(ctx, recorder)
+            if "ui" in suites:
+                print(f"[ui] {size}")
+                bench_ui.run(ctx, recorder)
+    finally:
+        os.chdir(PROJECT_ROOT)
+        if owns_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.sql_stats:
+        from data.query_stats import query_stats
+        print("\n" + query_stats.format_report())
+    
+    report = build_report(recorder.results, sizes)
+    save_report(report, output_path)
+    print(f"\n结果已写入 {output_path}")
+    
+    if args.save_baseline:
+        save_report(report, baseline_path)
+        print(f"基线已保存到 {baseline_path}")
+    
+    exit_code = 0
+    if recorder.failures:
+        print("\n硬性检查失败:")
+        for failure in recorder.failures:
+            print(f"  - {failure}")
+        exit_code = 1
+    
+    if args.save_baseline or args.no_baseline:
+        return exit_code
+    
+    # 作为回归检查运行时缺少基线视为失败，避免检查形同虚设
+    baseline = load_report(baseline_path)
+    if baseline is None:
+        print(
+            f"\n未找到基线 {baseline_path}，无法进行回归对比"
+            f"（先在参考环境中使用 --save-baseline 生成，或使用 --no-baseline 跳过对比）"
+        )
+        return 1
+    
+    tolerance = args.tolerance if args.tolerance is not None else DEFAULT_TOLERANCE
+    regressions = compare_to_baseline(report, baseline, tolerance)
+    if regressions:
+        print(f"\n性能回归（容忍度 {tolerance:.0%}）:")
+        for line in regressions:
+            print(f"  - {line}")
+        exit_code = 1
+    else:
+        print(f"\n与基线对比无回归（容忍度 {tolerance:.0%}）")
+    
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+"""
+数据层与业务层基准 - TaskRepository CRUD、查询、搜索、相关度排序、结构化查询、搜索缓存、智能视图、统计、重置、回收站、撤销/重做、标签缓存、批量导入导出与读取内存占用
+"""
+
+import gc
+import os
+import random
+import sqlite3
+import tracemalloc
+
+from benchmarks.runner import BenchmarkContext, Recorder
+from core.change_bus import CHANGE_UPDATED
+from core.search_query import parse_query
+from core.search_ranker import SearchRanker, index_entry
+from core.smart_views import SmartViewManager
+from core.task_manager import RECYCLE_PAGE_SIZE, TaskManager
+from data import bulk_io
+from data.repository import TaskRepository
+from utils.common import today_epoch_days
+
+# 微基准重复次数（单条操作耗时短，多测几次）
+MICRO_REPEAT = 50
+MACRO_REPEAT = 5
+
+# 搜索关键词（来自数据集标题素材）
+SEARCH_KEYWORD = "周报"
+SEARCH_REGEX = r"^(完成|提交).*(文档|总结)"
+TAG_FILTER = "工作"
+
+# 结构化查询（编译为SQL），结果须与逐个任务求值一致
+STRUCTURED_QUERIES = (
+    f"tag:{TAG_FILTER} p:>=2",
+    "is:open due:<7d",
+    "is:overdue",
+    f"section:weekly -tag:{TAG_FILTER} 完成",
+    f'"{SEARCH_KEYWORD}" is:done',
+    "p:紧急 due:none",
+)
+
+
+def _sample_active_ids(db_path: str, count: int, seed: int = 7):
+    """抽样未删除任务ID"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ids = [row[0] for row in conn.execute("SELECT id FROM tasks WHERE deleted_at IS NULL")]
+    finally:
+        conn.close()
+    rng = random.Random(seed)
+    return rng.sample(ids, min(count, len(ids)))
+
+
+def _execute(db_path: str, sql: str, params: tuple = ()):
+    """直接执行SQL（用于不计时的准备步骤）"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_micro(ctx: BenchmarkContext, recorder: Recorder):
+    """单条记录操作"""
+    size = ctx.size_label
+    db_path = ctx.fresh_copy("micro")
+    repo = TaskRepository(db_path)
+    ids = _sample_active_ids(db_path, MICRO_REPEAT + 1)
+    cursor = {"i": 0}
+    
+    def next_id():
+        cursor["i"] = (cursor["i"] + 1) % len(ids)
+        return ids[cursor["i"]]
+    
+    recorder.measure(f"repository.get_task[{size}]", lambda: repo.get_task(next_id()), MICRO_REPEAT)
+    recorder.measure(f"repository.get_task_tags[{size}]", lambda: repo.get_task_tags(next_id()), MICRO_REPEAT)
+    
+    new_task = {"title": "基准测试新任务", "section": "daily", "tags": ["工作", "基准"]}
+    recorder.measure(f"repository.add_task[{size}]", lambda: repo.add_task(new_task), MICRO_REPEAT)
+    
+    recorder.measure(
+        f"repository.update_task[{size}]",
+        lambda: repo.update_task(next_id(), {"title": "基准测试更新标题", "priority": 2}),
+        MICRO_REPEAT
+    )
+    
+    def toggle_complete():
+        task_id = next_id()
+        repo.complete_task(task_id)
+        repo.uncomplete_task(task_id)
+    
+    recorder.measure(f"repository.complete_uncomplete[{size}]", toggle_complete, MICRO_REPEAT)
+    
+    def delete_restore():
+        task_id = next_id()
+        repo.soft_delete(task_id)
+        repo.restore(task_id)
+    
+    recorder.measure(f"repository.soft_delete_restore[{size}]", delete_restore, MICRO_REPEAT)
+
+
+def run_macro(ctx: BenchmarkContext, recorder: Recorder):
+    """列表查询、搜索、统计"""
+    size = ctx.size_label
+    repo = TaskRepository(ctx.db_path)
+    manager = TaskManager(repository=repo)
+    
+    recorder.measure(f"repository.get_tasks.all[{size}]", lambda: repo.get_tasks(), MACRO_REPEAT)
+    recorder.measure(
+        f"repository.get_tasks.section[{size}]",
+        lambda: repo.get_tasks(section="daily"),
+        MACRO_REPEAT
+    )
+    recorder.measure(
+        f"repository.get_tasks.tag[{size}]",
+        lambda: repo.get_tasks(tag=TAG_FILTER),
+        MACRO_REPEAT
+    )
+    recorder.measure(
+        f"task_manager.search_tasks.fuzzy[{size}]",
+        lambda: manager.search_tasks(SEARCH_KEYWORD, "fuzzy"),
+        MACRO_REPEAT,
+        setup=manager.search_cache.clear  # 测量未命中缓存时的完整扫描
+    )
+    recorder.measure(
+        f"task_manager.search_tasks.regular[{size}]",
+        lambda: manager.search_tasks(SEARCH_REGEX, "regular"),
+        MACRO_REPEAT,
+        setup=manager.search_cache.clear  # 测量未命中缓存时的完整扫描
+    )
+    recorder.measure(
+        f"task_manager.search_ranked.top50[{size}]",
+        lambda: manager.search_ranked(SEARCH_KEYWORD, "fuzzy", 50),
+        MACRO_REPEAT,
+        setup=manager.search_cache.clear
+    )
+    recorder.measure(f"task_manager.get_stats[{size}]", manager.get_stats, MACRO_REPEAT)
+    recorder.measure(f"task_manager.get_all_tags[{size}]", manager.get_all_tags, MACRO_REPEAT)
+    recorder.measure(f"repository.get_deleted_tasks[{size}]", repo.get_deleted_tasks, MACRO_REPEAT)
+
+
+def run_ranking(ctx: BenchmarkContext, recorder: Recorder):
+    """
+    在已读取的任务上打分并选出前50个（不含读库）：rank() 逐字段匹配，rank_index() 使用预先建立的
+    小写索引（界面搜索的方式）；两者结果须一致，且与全量排序的前50个一致
+    """
+    size = ctx.size_label
+    tasks = TaskRepository(ctx.db_path).get_tasks()
+    entries = [index_entry(task) for task in tasks]
+    ranker = SearchRanker()
+    
+    for keyword in (SEARCH_KEYWORD, "完成"):
+        recorder.measure(
+            f"search_ranker.rank.top50.{keyword}[{size}]",
+            lambda keyword=keyword: ranker.rank(tasks, keyword, "fuzzy", 50),
+            MACRO_REPEAT
+        )
+        recorder.measure(
+            f"search_ranker.rank_index.top50.{keyword}[{size}]",
+            lambda keyword=keyword: ranker.rank_index(entries, keyword, "fuzzy", 50),
+            MACRO_REPEAT
+        )
+        
+        top = [hit.task["id"] for hit in ranker.rank(tasks, keyword, "fuzzy", 50)]
+        indexed = [hit.task["id"] for hit in ranker.rank_index(entries, keyword, "fuzzy", 50)]
+        full = sorted(ranker.rank(tasks, keyword, "fuzzy", None), key=lambda hit: -hit.score)[:50]
+        if not top == indexed == [hit.task["id"] for hit in full]:
+            recorder.fail(f"相关度排序前50个结果与全量排序不一致[{size}]: {keyword}")
+
+
+def _evaluate(task, query, today: int) -> bool:
+    """在内存中对单个任务求值结构化查询（仅用于校验SQL编译结果，模糊模式）"""
+    due = getattr(task, "due_date", None)
+    for term in query.terms:
+        if term.kind == "text":
+            needle = term.value.lower()
+            texts = [task["title"], task.get("description"), task.get("requirements")] + list(task["tags"])
+            ok = any(needle in (text or "").lower() for text in texts)
+        elif term.kind == "tag":
+            ok = term.value in task["tags"]
+        elif term.kind == "section":
+            ok = task["section"] == term.value
+        elif term.kind == "completed":
+            ok = bool(task["is_completed"]) == term.value
+        elif term.kind == "overdue":
+            ok = task["section"] == "once" and not task["is_completed"] and due is not None and due < today
+        elif term.kind == "priority":
+            ok = {"=": task["priority"] == term.value, ">=": task["priority"] >= term.value,
+                  "<=": task["priority"] <= term.value, ">": task["priority"] > term.value,
+                  "<": task["priority"] < term.value}[term.op]
+        elif term.value is None:
+            ok = due is None
+        elif due is None:
+            ok = False
+        elif term.op == "between":
+            ok = today + term.value[0] <= due <= today + term.value[1]
+        else:
+            day = term.value if type(term.value) is not int else today + term.value
+            ok = {"=": due == day, ">=": due >= day, "<=": due <= day, ">": due > day, "<": due < day}[term.op]
+        if ok == term.negated:
+            return False
+    return True
+
+
+def run_query(ctx: BenchmarkContext, recorder: Recorder):
+    """结构化查询（编译为一条参数化SQL）的耗时；结果须与在内存中逐个任务求值一致"""
+    size = ctx.size_label
+    manager = TaskManager(repository=TaskRepository(ctx.db_path))
+    tasks = manager.repository.get_tasks()
+    today = today_epoch_days()
+    
+    for text in STRUCTURED_QUERIES:
+        recorder.measure(
+            f"task_manager.search_tasks.query.{text}[{size}]",
+            lambda text=text: manager.search_tasks(text, "fuzzy"),
+            MACRO_REPEAT,
+            setup=manager.search_cache.clear
+        )
+        query = parse_query(text)
+        expected = sorted(task["id"] for task in tasks if _evaluate(task, query, today))
+        actual = sorted(task["id"] for task in manager.search_tasks(text, "fuzzy"))
+        if actual != expected:
+            recorder.fail(f"结构化查询结果与逐个求值不一致[{size}]: {text} SQL{len(actual)}条, 应为{len(expected)}条")
+
+
+def run_search_cache(ctx: BenchmarkContext, recorder: Recorder):
+    """重复搜索命中缓存的耗时与命中率；其他连接写入后缓存必须失效"""
+    size = ctx.size_label
+    db_path = ctx.fresh_copy("search_cache")
+    manager = TaskManager(repository=TaskRepository(db_path))
+    cache = manager.search_cache
+    keywords = [SEARCH_KEYWORD, "完成", "整理", "简历"]
+    cursor = {"i": 0}
+    
+    def next_keyword():
+        cursor["i"] = (cursor["i"] + 1) % len(keywords)
+        return keywords[cursor["i"]]
+    
+    for keyword in keywords:
+        manager.search_tasks(keyword, "fuzzy")
+    recorder.measure(
+        f"task_manager.search_tasks.cached[{size}]",
+        lambda: manager.search_tasks(next_keyword(), "fuzzy"),
+        MICRO_REPEAT
+    )
+    recorder.record(f"search_cache.stats[{size}]", cache.get_stats())
+    
+    # 绕过仓库直接改写标题（模拟其他进程写入），之后的搜索必须反映变化
+    before = len(manager.search_tasks(SEARCH_KEYWORD, "fuzzy"))
+    _execute(db_path, "UPDATE tasks SET title = title || ?", (SEARCH_KEYWORD,))
+    after = len(manager.search_tasks(SEARCH_KEYWORD, "fuzzy"))
+    expected = len(manager.repository.get_tasks())
+    if after != expected or after < before:
+        recorder.fail(f"搜索缓存未在外部写入后失效[{size}]: 写入前{before}条, 写入后{after}条, 应为{expected}条")
+    cache.clear()
+
+
+def run_resets(ctx: BenchmarkContext, recorder: Recorder):
+    """每日/每周重置（每次执行前把任务重新标记为已完成）"""
+    size = ctx.size_label
+    db_path = ctx.fresh_copy("resets")
+    repo = TaskRepository(db_path)
+    
+    recorder.measure(
+        f"repository.reset_daily_tasks[{size}]",
+        repo.reset_daily_tasks,
+        MACRO_REPEAT,
+        setup=lambda: _execute(
+            db_path,
+            "UPDATE tasks SET is_completed = 1, completed_at = created_at WHERE section = 'daily'"
+        )
+    )
+    recorder.measure(
+        f"repository.reset_weekly_tasks[{size}]",
+        lambda: repo.reset_weekly_tasks(0),
+        MACRO_REPEAT,
+        setup=lambda: _execute(
+            db_path,
+            "UPDATE tasks SET is_completed = 1, completed_at = created_at WHERE section = 'weekly'"
+        )
+    )
+
+
+def _walk_deleted_pages(manager: TaskManager, keyword: str = "") -> list:
+    """按键集分页读取回收站的全部页，返回各行ID（按读取顺序）"""
+    ids = []
+    after = None
+    while True:
+        page = manager.get_deleted_page(RECYCLE_PAGE_SIZE, after, keyword)
+        ids.extend(row["id"] for row in page)
+        if len(page) < RECYCLE_PAGE_SIZE:
+            return ids
+        after = (page[-1]["deleted_at"], page[-1]["id"])
+
+
+def run_recycle_bin(ctx: BenchmarkContext, recorder: Recorder):
+    """回收站分页读取与清理操作（清理每次在新的数据库副本上执行）"""
+    size = ctx.size_label
+    manager = TaskManager(repository=TaskRepository(ctx.db_path))
+    
+    recorder.measure(
+        f"task_manager.get_deleted_page.first[{size}]",
+        lambda: manager.get_deleted_page(),
+        MICRO_REPEAT
+    )
+    recorder.measure(
+        f"task_manager.get_deleted_page.search[{size}]",
+        lambda: manager.get_deleted_page(keyword=f"tag:{TAG_FILTER}"),
+        MICRO_REPEAT
+    )
+    
+    # 逐页读取须覆盖全部已删除任务且不重复
+    paged = _walk_deleted_pages(manager)
+    conn = sqlite3.connect(ctx.db_path)
+    try:
+        expected = {row[0] for row in conn.execute("SELECT id FROM tasks WHERE deleted_at IS NOT NULL")}
+    finally:
+        conn.close()
+    if len(paged) != len(set(paged)) or set(paged) != expected:
+        recorder.fail(f"回收站分页结果不一致[{size}]: 读取{len(paged)}行, 应为{len(expected)}行")
+    
+    state = {"repo": None}
+    
+    def fresh():
+        state["repo"] = TaskRepository(ctx.fresh_copy("recycle"))
+    
+    recorder.measure(
+        f"repository.keep_latest_n[{size}]",
+        lambda: state["repo"].keep_latest_n(100),
+        MACRO_REPEAT,
+        setup=fresh
+    )
+    recorder.measure(
+        f"repository.delete_older_than[{size}]",
+        lambda: state["repo"].delete_older_than(30),
+        MACRO_REPEAT,
+        setup=fresh
+    )
+    recorder.measure(
+        f"repository.empty_recycle_bin[{size}]",
+        lambda: state["repo"].empty_recycle_bin(),
+        MACRO_REPEAT,
+        setup=fresh
+    )
+
+
+def run_tag_cache(ctx: BenchmarkContext, recorder: Recorder):
+    """标签解析与标签维护操作，结束后校验标签缓存与数据库一致"""
+    size = ctx.size_label
+    db_path = ctx.fresh_copy("tags")
+    repo = TaskRepository(db_path)
+    names = [tag["name"] for tag in repo.get_all_tags()]
+    if len(names) < 4:
+        return
+    cursor = {"i": 0}
+    
+    def next_name():
+        cursor["i"] = (cursor["i"] + 1) % len(names)
+        return names[cursor["i"]]
+    
+    recorder.measure(f"repository.add_tag.existing[{size}]", lambda: repo.add_tag(next_name()), MICRO_REPEAT)
+    
+    # 重命名（来回改名，保持名称集合不变）、合并、删除、清理
+    def rename_round_trip():
+        name = next_name()
+        tag_id = repo.add_tag(name)
+        repo.rename_tag(tag_id, f"{name}_基准")
+        repo.rename_tag(tag_id, name)
+    
+    recorder.measure(f"repository.rename_tag[{size}]", rename_round_trip, MICRO_REPEAT)
+    
+    repo.merge_tags(repo.add_tag(names[0]), repo.add_tag(names[1]))
+    repo.delete_tag(repo.add_tag(names[2]))
+    repo.add_tag("基准未使用标签")
+    repo.cleanup_unused_tags()
+    
+    problems = repo.tag_cache.verify_consistency()
+    if problems:
+        recorder.fail(f"标签缓存与数据库不一致[{size}]: {'; '.join(problems[:5])}")
+
+
+def run_smart_views(ctx: BenchmarkContext, recorder: Recorder):
+    """智能视图：单个任务变更的增量更新与全部重新计算的耗时；修改任务后成员集合须与重新查询一致"""
+    size = ctx.size_label
+    db_path = ctx.fresh_copy("smart_views")
+    manager = TaskManager(repository=TaskRepository(db_path))
+    views = SmartViewManager(manager)
+    for index, text in enumerate(STRUCTURED_QUERIES):
+        views.add_view(f"基准视图{index}", text)
+    
+    ids = _sample_active_ids(db_path, MICRO_REPEAT * 2)
+    if not ids:
+        return
+    cursor = {"i": 0, "id": ids[0]}
+    
+    def update_one():
+        """修改一个任务的优先级与完成状态（不计时）"""
+        cursor["id"] = ids[cursor["i"] % len(ids)]
+        cursor["i"] += 1
+        manager.repository.update_task(cursor["id"], {"priority": cursor["i"] % 4, "is_completed": cursor["i"] % 3 == 0})
+    
+    recorder.measure(
+        f"smart_views.apply_changes.single[{size}]",
+        lambda: views.apply_changes([cursor["id"]], [CHANGE_UPDATED]),
+        MICRO_REPEAT,
+        setup=update_one
+    )
+    recorder.measure(f"smart_views.refresh_all[{size}]", views.load, MACRO_REPEAT)
+    recorder.record(f"smart_views.stats[{size}]", views.get_stats())
+    
+    for _ in range(MICRO_REPEAT):
+        update_one()
+        views.apply_changes([cursor["id"]], [CHANGE_UPDATED])
+    problems = views.verify_consistency()
+    if problems:
+        recorder.fail(f"智能视图成员与重新查询不一致[{size}]: {'; '.join(problems[:5])}")
+
+
+def run_journal(ctx: BenchmarkContext, recorder: Recorder):
+    """命令日志：记录操作的额外开销与撤销/重做耗时；全部撤销后须与操作前一致，日志大小不超过上限"""
+    size = ctx.size_label
+    db_path = ctx.fresh_copy("journal")
+    manager = TaskManager(repository=TaskRepository(db_path))
+    ids = _sample_active_ids(db_path, MICRO_REPEAT)
+    if not ids:
+        return
+    cursor = {"i": 0}
+    
+    def edit_one():
+        task_id = ids[cursor["i"] % len(ids)]
+        cursor["i"] += 1
+        manager.update_task(task_id, title=f"基准撤销{cursor['i']}", priority=cursor["i"] % 4,
+                            tags=[TAG_FILTER, f"基准撤销{cursor['i'] % 5}"])
+    
+    recorder.measure(f"task_manager.update_task.journaled[{size}]", edit_one, MICRO_REPEAT)
+    
+    def undo_redo():
+        manager.undo()
+        manager.redo()
+    
+    recorder.measure(f"command_journal.undo_redo[{size}]", undo_redo, MICRO_REPEAT)
+    
+    # 一组编辑、删除、永久删除全部撤销后，任务与标签须与操作前一致
+    manager.journal.clear()
+    checked = ids[:manager.journal.capacity // 3]
+    before = manager.repository.get_task_snapshots(checked)
+    for task_id in checked:
+        edit_one()
+        manager.delete_task(task_id)
+    manager.permanent_delete_task(checked[0])
+    steps = len(checked) * 2 + 1
+    undone = sum(1 for _ in range(steps) if manager.undo() is not None)
+    if undone != steps or manager.repository.get_task_snapshots(checked) != before:
+        recorder.fail(f"撤销后任务与操作前不一致[{size}]: 撤销{undone}/{steps}步")
+    
+    # 超过条数上限后只保留最近的记录
+    for _ in range(manager.journal.capacity + 10):
+        edit_one()
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        rows, total = conn.execute("SELECT COUNT(*), IFNULL(SUM(size), 0) FROM command_journal").fetchone()
+    finally:
+        conn.close()
+    recorder.record(f"command_journal.size[{size}]", {"entries": rows, "bytes": total})
+    if rows > manager.journal.capacity or total > manager.journal.max_bytes:
+        recorder.fail(f"命令日志超出上限[{size}]: {rows}条, {total}字节")
+
+
+def run_bulk_io(ctx: BenchmarkContext, recorder: Recorder):
+    """批量导出与导入（JSON Lines / CSV；导入在新的数据库副本上执行）"""
+    size = ctx.size_label
+    state = {"db_path": None}
+    
+    def fresh():
+        state["db_path"] = ctx.fresh_copy("bulk_io")
+    
+    for fmt in (bulk_io.FORMAT_JSONL, bulk_io.FORMAT_CSV):
+        export_path = os.path.join(ctx.work_dir, f"export_{size}.{fmt}")
+        recorder.measure(
+            f"bulk_io.export_{fmt}[{size}]",
+            lambda path=export_path: bulk_io.export_tasks(ctx.db_path, path, include_deleted=True),
+            MACRO_REPEAT
+        )
+        recorder.measure(
+            f"bulk_io.import_{fmt}[{size}]",
+            lambda path=export_path: bulk_io.import_tasks(state["db_path"], path),
+            MACRO_REPEAT,
+            setup=fresh
+        )
+
+
+def run_memory(ctx: BenchmarkContext, recorder: Recorder):
+    """读取全部任务（含回收站）后驻留的内存：每个任务记录占用的字节数"""
+    size = ctx.size_label
+    repo = TaskRepository(ctx.db_path)
+    repo.get_tasks(include_deleted=True)  # 预热标签缓存与语句缓存
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tasks = repo.get_tasks(include_deleted=True)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    if not tasks:
+        return
+    recorder.record(f"repository.get_tasks.memory[{size}]", {
+        "tasks": len(tasks),
+        "bytes_per_task": round(current / len(tasks)),
+        "total_kb": round(current / 1024),
+        "peak_kb": round(peak / 1024),
+    })
+
+
+def run(ctx: BenchmarkContext, recorder: Recorder):
+    """运行全部数据层基准"""
+    run_micro(ctx, recorder)
+    run_macro(ctx, recorder)
+    run_ranking(ctx, recorder)
+    run_query(ctx, recorder)
+    run_search_cache(ctx, recorder)
+    run_resets(ctx, recorder)
+    run_recycle_bin(ctx, recorder)
+    run_tag_cache(ctx, recorder)
+    run_smart_views(ctx, recorder)
+    run_journal(ctx, recorder)
+    run_bulk_io(ctx, recorder)
+    run_memory(ctx, recorder)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+启动导入基准 - 基于 python -X importtime 检查冷启动导入预算
+
+检查两项：
+1. 导入 ui.main_window 的累计耗时不超过预算；
+2. 延迟导入的模块（对话框、任务表单、设置面板）不会在启动时被加载。
+"""
+
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Optional
+
+from benchmarks.runner import Recorder
+
+# 默认导入预算（毫秒，包含 PyQt5 本身）
+DEFAULT_IMPORT_BUDGET_MS = 500
+IMPORT_REPEAT = 3
+
+# 启动入口模块
+STARTUP_MODULE = "ui.main_window"
+
+# 必须延迟导入的模块
+DEFERRED_MODULES = (
+    "ui.task_dialog",
+    "ui.settings_dialog",
+    "ui.recycle_bin_dialog",
+    "ui.components.task_form_widget",
+    "ui.components.settings_widget",
+    "ui.components.perf_hud",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    解析 -X importtime 输出
+    
+    Returns:
+        Dict[str, int]: 模块名 -> 累计耗时（微秒）
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def measure_import(module: str = STARTUP_MODULE, cwd: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """在子进程中冷导入模块并返回 importtime 数据（cwd 决定日志和配置文件的生成位置）"""
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or os.getcwd(),
+        env=env,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if proc.returncode != 0:
+        print(f"  导入 {module} 失败:\n{proc.stderr[-2000:]}")
+        return None
+    return parse_importtime(proc.stderr)
+
+
+def run(recorder: Recorder, budget_ms: float = DEFAULT_IMPORT_BUDGET_MS, cwd: Optional[str] = None):
+    """运行导入预算检查（取多次中的最小值以排除磁盘缓存影响）"""
+    samples = []
+    loaded = set()
+    for _ in range(IMPORT_REPEAT):
+        data = measure_import(cwd=cwd)
+        if data is None:
+            recorder.fail(f"无法导入 {STARTUP_MODULE}")
+            return
+        samples.append(data.get(STARTUP_MODULE, 0) / 1000)
+        loaded.update(data)
+    
+    best_ms = round(min(samples), 3)
+    recorder.record(f"startup.import.{STARTUP_MODULE}", {
+        "min_ms": best_ms,
+        "median_ms": round(sorted(samples)[len(samples) // 2], 3),
+        "budget_ms": budget_ms,
+    })
+    
+    if best_ms > budget_ms:
+        recorder.fail(f"导入 {STARTUP_MODULE} 耗时 {best_ms:.1f} ms，超出预算 {budget_ms} ms")
+    
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    if eager:
+        recorder.fail(f"以下模块应延迟导入，但在启动时被加载: {', '.join(eager)}")
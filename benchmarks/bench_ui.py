@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+界面基准 - 在 offscreen 平台下测量任务列表加载与 TaskCard 构建耗时
+"""
+
+import os
+
+from benchmarks.runner import BenchmarkContext, Recorder
+
+# 超过该任务数的数据集跳过界面基准（每个任务一个卡片控件，规模过大时耗时不具参考意义）
+UI_MAX_TASKS = 10000
+UI_REPEAT = 3
+
+# 单独测量卡片构建时使用的任务数
+CARD_SAMPLE = 200
+
+_app = None
+
+
+def ensure_application():
+    """创建（或复用）无界面 QApplication"""
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    
+    from PyQt5.QtWidgets import QApplication
+    
+    _app = QApplication.instance() or QApplication(["benchmarks"])
+    return _app
+
+
+def run(ctx: BenchmarkContext, recorder: Recorder):
+    """运行界面基准"""
+    size = ctx.size_label
+    if ctx.task_count > UI_MAX_TASKS:
+        print(f"  跳过界面基准 [{size}]：任务数超过 {UI_MAX_TASKS}")
+        return
+    
+    app = ensure_application()
+    
+    from core.task_manager import TaskManager
+    from data.repository import TaskRepository
+    from ui.main_window import MainWindow
+    from ui.task_card import TaskCard
+    
+    manager = TaskManager(repository=TaskRepository(ctx.db_path))
+    window = MainWindow(task_manager=manager)
+    
+    for section in ("daily", "weekly", "once"):
+        def load(section=section):
+            window._load_tasks(section)
+            app.processEvents()
+        
+        recorder.measure(f"ui.load_tasks.{section}[{size}]", load, UI_REPEAT)
+    
+    tasks = manager.get_tasks()[:CARD_SAMPLE]
+    cards = []
+    
+    def build_cards():
+        cards.extend(TaskCard(task) for task in tasks)
+    
+    def drop_cards():
+        for card in cards:
+            card.deleteLater()
+        cards.clear()
+        app.processEvents()
+    
+    recorder.measure(f"ui.task_card.build_{len(tasks)}[{size}]", build_cards, UI_REPEAT, setup=drop_cards)
+    drop_cards()
+    
+    window.close()
+    window.deleteLater()
+    app.processEvents()
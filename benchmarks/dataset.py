@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+合成数据集生成器 - 生成接近真实使用情况的任务数据库
+"""
+
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from data.database import init_database
+from utils.common import to_epoch_seconds, to_epoch_days
+
+# 预设数据规模
+DATASET_SIZES = {
+    "1k": 1000,
+    "10k": 10000,
+    "100k": 100000,
+}
+
+# 分区分布（日常/周常/特殊）
+SECTION_WEIGHTS = (("daily", 0.45), ("weekly", 0.25), ("once", 0.30))
+
+# 默认比例
+DEFAULT_DELETED_RATIO = 0.10
+DEFAULT_COMPLETED_RATIO = 0.35
+
+# 标题素材
+_VERBS = ["完成", "整理", "复习", "提交", "准备", "检查", "更新", "阅读", "联系", "购买", "修复", "规划"]
+_OBJECTS = [
+    "周报", "读书笔记", "英语单词", "项目文档", "会议纪要", "健身计划", "房租账单",
+    "代码评审", "数据备份", "旅行攻略", "体检预约", "家庭聚餐", "课程作业", "简历",
+    "服务器日志", "季度总结", "日程安排", "采购清单", "论文草稿", "演示文稿",
+]
+_SUFFIXES = ["", "", "", "（第一部分）", "（紧急）", "草稿", "终稿", "并发送", "并归档"]
+
+_DESCRIPTIONS = [
+    "", "", "记得提前准备相关资料", "需要和同事确认细节后再执行",
+    "参考上次的记录，注意不要遗漏", "完成后在群里同步进度", "预计耗时半小时左右",
+]
+_REQUIREMENTS = ["", "", "", "必须在截止前完成", "需附上截图", "按模板格式填写"]
+
+# 标签池（按出现频率从高到低排列，使用近似Zipf分布）
+_TAG_POOL = [
+    "工作", "学习", "生活", "健康", "财务", "家庭", "阅读", "运动", "项目A", "项目B",
+    "购物", "旅行", "社交", "技术", "写作", "英语", "会议", "杂务", "紧急", "长期",
+    "副业", "兴趣", "电影", "音乐", "烹饪", "宠物", "维修", "证书", "面试", "复盘",
+]
+
+
+def _weighted_tag_sample(rng: random.Random, count: int) -> List[str]:
+    """按近似Zipf分布抽取不重复标签"""
+    weights = [1.0 / (rank + 1) for rank in range(len(_TAG_POOL))]
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(rng.choices(_TAG_POOL, weights=weights, k=1)[0])
+    return list(chosen)
+
+
+def _make_title(rng: random.Random, index: int) -> str:
+    """生成中文任务标题"""
+    return f"{rng.choice(_VERBS)}{rng.choice(_OBJECTS)}{rng.choice(_SUFFIXES)} #{index}"
+
+
+def _pick_section(rng: random.Random) -> str:
+    value = rng.random()
+    acc = 0.0
+    for section, weight in SECTION_WEIGHTS:
+        acc += weight
+        if value < acc:
+            return section
+    return SECTION_WEIGHTS[-1][0]
+
+
+def generate_task_rows(count: int, seed: int = 42,
+                       deleted_ratio: float = DEFAULT_DELETED_RATIO,
+                       completed_ratio: float = DEFAULT_COMPLETED_RATIO) -> Tuple[List[tuple], List[List[str]]]:
+    """
+    生成任务行数据
+    
+    Returns:
+        tuple: (任务参数列表, 每个任务对应的标签列表)
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    rows = []
+    task_tags = []
+    
+    for index in range(count):
+        section = _pick_section(rng)
+        created_at = now - timedelta(days=rng.uniform(0, 365))
+        is_completed = rng.random() < completed_ratio
+        completed_at = created_at + timedelta(hours=rng.uniform(1, 72)) if is_completed else None
+        deleted_at = None
+        if rng.random() < deleted_ratio:
+            deleted_at = now - timedelta(days=rng.uniform(0, 90))
+        
+        due_date = None
+        if section == "once" and rng.random() < 0.7:
+            due_date = (now + timedelta(days=rng.randint(-30, 60))).date()
+        
+        reset_weekday = rng.randint(0, 6) if section == "weekly" else None
+        
+        rows.append((
+            _make_title(rng, index),
+            rng.choice(_DESCRIPTIONS),
+            rng.choice(_REQUIREMENTS),
+            rng.choices((0, 1, 2, 3), weights=(1, 5, 3, 1), k=1)[0],
+            section,
+            1 if is_completed else 0,
+            to_epoch_seconds(created_at),
+            to_epoch_days(due_date),
+            to_epoch_seconds(completed_at),
+            reset_weekday,
+            None,
+            0,
+            to_epoch_seconds(deleted_at),
+        ))
+        
+        tag_count = rng.choices((0, 1, 2, 3), weights=(2, 5, 3, 1), k=1)[0]
+        task_tags.append(_weighted_tag_sample(rng, tag_count))
+    
+    return rows, task_tags
+
+
+def generate_database(db_path: str, count: int, seed: int = 42,
+                      deleted_ratio: float = DEFAULT_DELETED_RATIO,
+                      completed_ratio: float = DEFAULT_COMPLETED_RATIO) -> Dict[str, int]:
+    """
+    生成合成数据库（已存在的文件会被覆盖）
+    
+    Args:
+        db_path: 数据库文件路径
+        count: 任务数量
+        seed: 随机种子（相同种子生成相同数据）
+        deleted_ratio: 软删除任务比例
+        completed_ratio: 已完成任务比例
+    
+    Returns:
+        Dict[str, int]: 生成统计（tasks/deleted/tags/task_tags）
+    """
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    
+    if not init_database(db_path):
+        raise RuntimeError(f"初始化基准数据库失败: {db_path}")
+    
+    rows, task_tags = generate_task_rows(count, seed, deleted_ratio, completed_ratio)
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany("""
+            INSERT INTO tasks (
+                title, description, requirements, priority, section, is_completed,
+                created_at, due_date, completed_at, reset_weekday,
+                reset_time, sort_order, deleted_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        
+        task_ids = [row[0] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+        
+        tag_names = sorted({name for names in task_tags for name in names})
+        conn.executemany("INSERT INTO tags (name) VALUES (?)", [(name,) for name in tag_names])
+        tag_ids = {name: tag_id for tag_id, name in conn.execute("SELECT id, name FROM tags")}
+        
+        links = [
+            (task_id, tag_ids[name])
+            for task_id, names in zip(task_ids, task_tags)
+            for name in names
+        ]
+        conn.executemany("INSERT INTO task_tags (task_id, tag_id) VALUES (?, ?)", links)
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return {
+        "tasks": count,
+        "deleted": sum(1 for row in rows if row[-1] is not None),
+        "tags": len(tag_names),
+        "task_tags": len(links),
+    }
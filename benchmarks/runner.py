@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试运行器 - 计时、结果收集与基线对比
+"""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from core.search_cache import invalidate_search_cache
+from data.tag_cache import invalidate_tag_cache
+
+# 默认重复次数
+DEFAULT_REPEAT = 5
+
+# 回归判定：中位数超过基线的比例，以及忽略的绝对差值（毫秒，避免微基准抖动误报）
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR_MS = 0.5
+
+
+class BenchmarkContext:
+    """单个数据规模的基准上下文"""
+    
+    def __init__(self, size_label: str, task_count: int, db_path: str, work_dir: str):
+        self.size_label = size_label
+        self.task_count = task_count
+        self.db_path = db_path
+        self.work_dir = work_dir
+    
+    def fresh_copy(self, slot: str = "copy") -> str:
+        """
+        复制一份数据库（供会修改数据的基准使用）
+        
+        同一 slot 的副本会被覆盖，避免大数据集下占用过多磁盘空间。
+        """
+        copy_path = os.path.join(self.work_dir, f"{slot}_{self.size_label}.db")
+        shutil.copyfile(self.db_path, copy_path)
+        invalidate_tag_cache(copy_path)
+        invalidate_search_cache(copy_path)
+        return copy_path
+
+
+class Recorder:
+    """结果记录器 - 以 '套件.名称[规模]' 为键收集计时结果"""
+    
+    def __init__(self):
+        self.results: Dict[str, Dict] = {}
+        self.failures: List[str] = []
+    
+    def measure(self, key: str, func: Callable[[], object], repeat: int = DEFAULT_REPEAT,
+                setup: Optional[Callable[[], None]] = None, warmup: int = 1) -> Dict:
+        """
+        多次执行并记录耗时
+        
+        Args:
+            key: 结果键
+            func: 被测函数
+            repeat: 计时次数
+            setup: 每次执行前调用（不计时）
+            warmup: 预热次数（不计时）
+        """
+        for _ in range(warmup):
+            if setup:
+                setup()
+            func()
+        
+        timings = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        
+        result = summarize(timings)
+        self.results[key] = result
+        print(f"  {key:<56} 中位数 {result['median_ms']:10.3f} ms  (n={repeat})", flush=True)
+        return result
+    
+    def record(self, key: str, value: Dict):
+        """直接记录结果（用于非计时类指标，如内存、导入耗时）"""
+        self.results[key] = value
+        detail = ", ".join(f"{k}={v}" for k, v in value.items())
+        print(f"  {key:<56} {detail}", flush=True)
+    
+    def fail(self, message: str):
+        """记录硬性失败（如超出预算）"""
+        self.failures.append(message)
+        print(f"  [失败] {message}", flush=True)
+
+
+def summarize(timings: List[float]) -> Dict:
+    """计算计时统计"""
+    ordered = sorted(timings)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(ordered[p95_index], 4),
+        "max_ms": round(ordered[-1], 4),
+        "repeat": len(ordered),
+    }
+
+
+def build_report(results: Dict[str, Dict], sizes: List[str]) -> Dict:
+    """生成JSON报告"""
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+
+def load_report(path: str) -> Optional[Dict]:
+    """读取JSON报告（不存在或损坏时返回None）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"读取报告失败: {path}: {e}")
+        return None
+
+
+def save_report(report: Dict, path: str):
+    """保存JSON报告"""
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def compare_to_baseline(current: Dict, baseline: Dict,
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    与基线对比，返回回归项描述列表
+    
+    仅比较两边都存在且带 median_ms 的条目；超过 基线 × (1 + tolerance)
+    且绝对差值超过 NOISE_FLOOR_MS 时视为回归。
+    """
+    regressions = []
+    baseline_results = baseline.get("results", {})
+    
+    for key, result in current.get("results", {}).items():
+        base = baseline_results.get(key)
+        if not base or "median_ms" not in base or "median_ms" not in result:
+            continue
+        
+        base_ms = base["median_ms"]
+        cur_ms = result["median_ms"]
+        if cur_ms > base_ms * (1 + tolerance) and cur_ms - base_ms > NOISE_FLOOR_MS:
+            ratio = cur_ms / base_ms if base_ms else float("inf")
+            regressions.append(f"{key}: {base_ms:.3f} ms -> {cur_ms:.3f} ms (x{ratio:.2f})")
+    
+    return regressions
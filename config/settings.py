@@ -1,6 +1,11 @@
+import atexit
+import copy
 import json
 import os
-from typing import Any, Dict, Optional
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
 from utils.logger import logger
 
 
@@ -9,8 +14,72 @@ APP_VERSION = "1.0.0"
 APP_NAME = "幽梦个人助手"
 
 
+@dataclass(frozen=True)
+class SettingSpec:
+    """设置项定义（类型、默认值、校验函数）"""
+    type: type
+    default: Any
+    validator: Optional[Callable[[Any], bool]] = None
+
+
+_TIME_PATTERN = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+
+
+def _in_range(low: int, high: int) -> Callable[[Any], bool]:
+    """生成整数范围校验函数"""
+    return lambda value: low <= value <= high
+
+
+# 设置项类型定义（点号分隔键 -> 定义），默认配置由此生成
+SETTINGS_SCHEMA: Dict[str, SettingSpec] = {
+    "app.name": SettingSpec(str, APP_NAME),
+    "app.version": SettingSpec(str, APP_VERSION),
+    "app.theme": SettingSpec(str, "light", lambda v: v in ("light", "dark")),
+    "app.language": SettingSpec(str, "zh_CN"),
+    "window.width": SettingSpec(int, 1200, _in_range(1, 100000)),
+    "window.height": SettingSpec(int, 800, _in_range(1, 100000)),
+    "window.maximized": SettingSpec(bool, False),
+    "window.x": SettingSpec(int, None),
+    "window.y": SettingSpec(int, None),
+    "window.sidebar_width": SettingSpec(int, 200),
+    "window.right_panel_width": SettingSpec(int, 300),
+    "task.daily_reset_time": SettingSpec(str, "06:00", lambda v: bool(_TIME_PATTERN.match(v))),
+    "task.weekly_reset_day": SettingSpec(int, 0, _in_range(0, 6)),  # 0=星期一
+    "task.auto_reset_enabled": SettingSpec(bool, True),
+    "task.recycle_bin_capacity": SettingSpec(int, 100, _in_range(10, 1000)),
+    "task.recycle_bin_max_days": SettingSpec(int, 0, _in_range(0, 3650)),  # 回收站保留天数（0 表示不按天数清理）
+    "task.auto_save": SettingSpec(bool, True),
+    "task.save_interval": SettingSpec(int, 300, _in_range(1, 86400)),  # 5分钟
+    "ui.default_section": SettingSpec(int, 0, _in_range(0, 2)),  # 0=日常任务
+    "ui.show_completed": SettingSpec(bool, True),
+    "ui.auto_expand_panel": SettingSpec(bool, False),
+    "ui.stall_threshold_ms": SettingSpec(int, 100, _in_range(20, 10000)),  # 界面卡顿阈值
+    "search.weight_title": SettingSpec(int, 8, _in_range(0, 100)),  # 搜索排序字段权重
+    "search.weight_tags": SettingSpec(int, 4, _in_range(0, 100)),
+    "search.weight_description": SettingSpec(int, 2, _in_range(0, 100)),
+    "search.weight_requirements": SettingSpec(int, 1, _in_range(0, 100)),
+    "search.recency_half_life_days": SettingSpec(int, 30, _in_range(1, 3650)),  # 时间加分半衰期
+    "data.auto_backup": SettingSpec(bool, False),
+    "data.backup_interval": SettingSpec(int, 7, _in_range(1, 30)),
+    "data.backup_retention": SettingSpec(int, 7, _in_range(1, 100)),  # 保留的备份数量
+    "data.query_stats_enabled": SettingSpec(bool, True),
+    "data.slow_query_threshold_ms": SettingSpec(int, 50, _in_range(1, 60000)),  # 慢查询阈值
+    "notification.enabled": SettingSpec(bool, True),
+    "notification.sound": SettingSpec(bool, True),
+    "notification.show_in_taskbar": SettingSpec(bool, True),
+}
+
+# 未出现在配置文件中时不写入默认值的可选项
+_OPTIONAL_KEYS = {"window.x", "window.y"}
+
+# 延迟写入间隔（秒）：短时间内的多次修改合并为一次写文件
+WRITE_BEHIND_DELAY = 1.0
+
+_MISSING = object()
+
+
 class Settings:
-    """应用程序设置管理类"""
+    """应用程序设置管理类（类型校验 + 扁平缓存 + 变更通知）"""
     
     def __init__(self, config_file="config.json"):
         """
@@ -21,114 +90,138 @@ class Settings:
         """
         self.config_file = config_file
         self._settings: Dict[str, Any] = {}
-        self._default_settings = {
-            "app": {
-                "name": APP_NAME,
-                "version": APP_VERSION,
-                "theme": "light",
-                "language": "zh_CN"
-            },
-            "window": {
-                "width": 1200,
-                "height": 800,
-                "maximized": False,
-                "sidebar_width": 200,
-                "right_panel_width": 300
-            },
-            "task": {
-                "daily_reset_time": "06:00",
-                "weekly_reset_day": 0,  # 0=星期一
-                "auto_reset_enabled": True,
-                "recycle_bin_capacity": 100,
-                "auto_save": True,
-                "save_interval": 300  # 5分钟
-            },
-            "ui": {
-                "default_section": 0,  # 0=日常任务
-                "show_completed": True,
-                "auto_expand_panel": False
-            },
-            "data": {
-                "auto_backup": False,
-                "backup_interval": 7
-            },
-            "notification": {
-                "enabled": True,
-                "sound": True,
-                "show_in_taskbar": True
-            }
-        }
+        # 扁平缓存：点号分隔键 -> 值，加载时一次性计算
+        self._cache: Dict[str, Any] = {}
+        # 变更订阅：点号分隔键 -> 回调列表
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._default_settings = self._build_defaults()
+        
+        # 修改配置与写文件共用一把锁（延迟写入在定时器线程中序列化配置）
+        self._lock = threading.RLock()
+        # 延迟写入状态
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
         
         # 加载配置
         self.load()
     
+    @staticmethod
+    def _build_defaults() -> Dict[str, Any]:
+        """根据设置项定义生成嵌套的默认配置"""
+        defaults: Dict[str, Any] = {}
+        for key, spec in SETTINGS_SCHEMA.items():
+            if key in _OPTIONAL_KEYS:
+                continue
+            section, name = key.split('.', 1)
+            defaults.setdefault(section, {})[name] = spec.default
+        return defaults
+    
     def load(self) -> bool:
         """
-        从文件加载配置
+        从文件加载配置（加载时完成全部校验）
         
         Returns:
             bool: 是否成功加载
         """
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_settings = json.load(f)
+        with self._lock:
+            old_cache = self._cache
+            loaded = False
+            try:
+                if os.path.exists(self.config_file):
+                    with open(self.config_file, 'r', encoding='utf-8') as f:
+                        loaded_settings = json.load(f)
                 
-                # 合并默认配置和加载的配置
-                self._settings = self._deep_merge(self._default_settings, loaded_settings)
-                logger.info(f"配置已从 {self.config_file} 加载")
-                return True
-            else:
-                # 使用默认配置
-                self._settings = self._default_settings.copy()
-                logger.info("使用默认配置")
-                return False
-                
-        except Exception as e:
-            logger.error(f"加载配置失败: {e}")
-            self._settings = self._default_settings.copy()
-            return False
+                    # 合并默认配置和加载的配置
+                    self._settings = self._deep_merge(self._default_settings, loaded_settings)
+                    logger.info(f"配置已从 {self.config_file} 加载")
+                    loaded = True
+                else:
+                    # 使用默认配置
+                    self._settings = copy.deepcopy(self._default_settings)
+                    logger.info("使用默认配置")
+            
+            except Exception as e:
+                logger.error(f"加载配置失败: {e}")
+                self._settings = copy.deepcopy(self._default_settings)
+        
+            self._validate_all()
+            self._rebuild_cache()
+        
+        self._notify_diff(old_cache)
+        return loaded
     
     def save(self) -> bool:
         """
-        保存配置到文件
+        立即保存配置到文件（同时取消待执行的延迟写入）
         
         Returns:
             bool: 是否成功保存
         """
-        try:
-            # 确保目录存在（只有当路径包含目录时才创建）
-            dir_path = os.path.dirname(self.config_file)
-            if dir_path:  # 只有目录不为空时才创建
-                os.makedirs(dir_path, exist_ok=True)
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self._settings, f, ensure_ascii=False, indent=2)
+            try:
+                # 确保目录存在（只有当路径包含目录时才创建）
+                dir_path = os.path.dirname(self.config_file)
+                if dir_path:  # 只有目录不为空时才创建
+                    os.makedirs(dir_path, exist_ok=True)
+                
+                with open(self.config_file, 'w', encoding='utf-8') as f:
+                    json.dump(self._settings, f, ensure_ascii=False, indent=2)
+                
+                self._dirty = False
+                logger.info(f"配置已保存到 {self.config_file}")
+                return True
+            except Exception as e:
+                logger.error(f"保存配置失败: {e}")
+                return False
+    
+    def schedule_save(self):
+        """延迟保存配置（合并短时间内的多次修改）"""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                return
             
-            logger.info(f"配置已保存到 {self.config_file}")
-            return True
-        except Exception as e:
-            logger.error(f"保存配置失败: {e}")
-            return False
+            self._save_timer = threading.Timer(WRITE_BEHIND_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self) -> bool:
+        """
+        写出尚未保存的修改
+        
+        Returns:
+            bool: 是否成功（无待保存修改时返回True）
+        """
+        with self._lock:
+            if not self._dirty:
+                self._save_timer = None
+                return True
+            return self.save()
     
     def get(self, key: str, default: Any = None) -> Any:
         """
-        获取配置值
+        获取配置值（叶子键直接命中扁平缓存）
         
         Args:
             key: 配置键，支持点号分隔（如 'app.name'）
             default: 默认值
-            
+        
         Returns:
             Any: 配置值
         """
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return default if value is None else value
+        
+        # 非叶子键（如 'window'）回退到逐级查找
         try:
-            keys = key.split('.')
             value = self._settings
-            
-            for k in keys:
+            for k in key.split('.'):
                 value = value[k]
-            
             return value
         except (KeyError, TypeError):
             return default
@@ -140,33 +233,100 @@ class Settings:
         Args:
             key: 配置键，支持点号分隔（如 'app.name'）
             value: 配置值
-            auto_save: 是否自动保存
-            
+            auto_save: 是否自动保存（延迟写入，见 schedule_save）
+        
         Returns:
             bool: 是否成功设置
         """
         try:
-            keys = key.split('.')
-            target = self._settings
+            spec = SETTINGS_SCHEMA.get(key)
+            if spec is not None:
+                coerced = self._coerce(spec, value)
+                if coerced is _MISSING:
+                    logger.warning(f"设置值无效，已忽略: {key}={value!r}")
+                    return False
+                value = coerced
+            
+            # 修改与延迟写入的序列化互斥，写文件时不会读到修改了一半的配置
+            with self._lock:
+                keys = key.split('.')
+                target = self._settings
             
-            # 导航到最后一个字典
-            for k in keys[:-1]:
-                if k not in target:
-                    target[k] = {}
-                target = target[k]
+                # 导航到最后一个字典
+                for k in keys[:-1]:
+                    if k not in target:
+                        target[k] = {}
+                    target = target[k]
             
-            # 设置值
-            target[keys[-1]] = value
+                # 设置值
+                target[keys[-1]] = value
             
-            # 自动保存
-            if auto_save:
-                return self.save()
+                old_value = self._cache.get(key, _MISSING)
+                self._cache[key] = value
+                
+                # 自动保存
+                if auto_save:
+                    self.schedule_save()
+            
+            # 在锁外通知订阅者（回调可能再次修改配置或等待其他线程）
+            if old_value != value:
+                self._notify(key, value)
             
             return True
         except Exception as e:
             logger.error(f"设置配置失败: {e}")
             return False
     
+    def import_legacy_values(self, values: Dict[str, Any]) -> int:
+        """
+        导入旧版存储中的配置值（一次性迁移）
+        
+        仅当当前值仍为默认值时才覆盖，避免旧数据覆盖用户已修改的配置。
+        
+        Args:
+            values: 点号分隔键 -> 旧值
+            
+        Returns:
+            int: 实际导入的配置项数量
+        """
+        imported = 0
+        for key, value in values.items():
+            spec = SETTINGS_SCHEMA.get(key)
+            if spec is None or self.get(key) != spec.default:
+                continue
+            
+            coerced = self._coerce(spec, value)
+            if coerced is _MISSING or coerced == spec.default:
+                continue
+            
+            if self.set(key, coerced, auto_save=False):
+                imported += 1
+        
+        if imported:
+            self.save()
+            logger.info(f"已从旧版存储迁移 {imported} 项配置")
+        return imported
+    
+    def subscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        """
+        订阅配置项变更（值发生变化时以新值调用回调）
+        
+        Args:
+            key: 配置键（点号分隔）
+            callback: 回调函数，参数为新值
+        """
+        with self._lock:
+            callbacks = self._subscribers.setdefault(key, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+    
+    def unsubscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        """取消订阅配置项变更"""
+        with self._lock:
+            callbacks = self._subscribers.get(key)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+    
     def reset_to_defaults(self) -> bool:
         """
         重置为默认配置
@@ -174,9 +334,96 @@ class Settings:
         Returns:
             bool: 是否成功重置
         """
-        self._settings = self._default_settings.copy()
+        with self._lock:
+            old_cache = self._cache
+            self._settings = copy.deepcopy(self._default_settings)
+            self._rebuild_cache()
+        self._notify_diff(old_cache)
         return self.save()
     
+    def _validate_all(self):
+        """按设置项定义校验全部配置，无效值回退为默认值"""
+        for key, spec in SETTINGS_SCHEMA.items():
+            section, name = key.split('.', 1)
+            container = self._settings.get(section)
+            if not isinstance(container, dict):
+                container = {}
+                self._settings[section] = container
+            
+            if name not in container:
+                if key not in _OPTIONAL_KEYS:
+                    container[name] = spec.default
+                continue
+            
+            coerced = self._coerce(spec, container[name])
+            if coerced is _MISSING:
+                logger.warning(f"配置项 {key} 的值无效: {container[name]!r}，使用默认值 {spec.default!r}")
+                coerced = spec.default
+            container[name] = coerced
+    
+    @staticmethod
+    def _coerce(spec: SettingSpec, value: Any) -> Any:
+        """
+        将配置值转换为定义的类型
+        
+        Returns:
+            Any: 转换后的值，无效时返回 _MISSING
+        """
+        if value is None:
+            return None if spec.default is None else _MISSING
+        
+        try:
+            if spec.type is bool:
+                if isinstance(value, bool):
+                    result = value
+                elif isinstance(value, int) and value in (0, 1):
+                    result = bool(value)
+                else:
+                    return _MISSING
+            elif spec.type is int:
+                if isinstance(value, bool):
+                    return _MISSING
+                result = int(value)
+            else:
+                if not isinstance(value, spec.type):
+                    return _MISSING
+                result = value
+        except (TypeError, ValueError):
+            return _MISSING
+        
+        if spec.validator is not None and not spec.validator(result):
+            return _MISSING
+        return result
+    
+    def _rebuild_cache(self):
+        """重新计算扁平缓存"""
+        cache: Dict[str, Any] = {}
+        for section, values in self._settings.items():
+            if isinstance(values, dict):
+                for name, value in values.items():
+                    if not isinstance(value, dict):
+                        cache[f"{section}.{name}"] = value
+            else:
+                cache[section] = values
+        self._cache = cache
+    
+    def _notify_diff(self, old_cache: Dict[str, Any]):
+        """对比新旧缓存并通知发生变化的订阅项"""
+        for key in list(self._subscribers):
+            new_value = self._cache.get(key)
+            if old_cache.get(key) != new_value:
+                self._notify(key, new_value)
+    
+    def _notify(self, key: str, value: Any):
+        """通知订阅者配置项已变更"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(key, []))
+        for callback in callbacks:
+            try:
+                callback(value)
+            except Exception as e:
+                logger.error(f"配置变更回调执行失败: {key} - {e}")
+    
     def _deep_merge(self, base: Dict, update: Dict) -> Dict:
         """
         深度合并两个字典
@@ -184,11 +431,11 @@ class Settings:
         Args:
             base: 基础字典
             update: 更新字典
-            
+        
         Returns:
             Dict: 合并后的字典
         """
-        result = base.copy()
+        result = copy.deepcopy(base)
         
         for key, value in update.items():
             if key in result and isinstance(result[key], dict) and isinstance(value, dict):
@@ -206,8 +453,12 @@ class Settings:
         Returns:
             Dict[str, Any]: 所有配置
         """
-        return self._settings.copy()
+        with self._lock:
+            return copy.deepcopy(self._settings)
 
 
 # 创建全局设置实例
-settings = Settings()
\ No newline at end of file
+settings = Settings()
+
+# 退出时写出尚未保存的修改
+atexit.register(settings.flush)
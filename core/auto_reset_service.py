@@ -33,8 +33,12 @@ class AutoResetService(QObject):
         self.is_running = False
         self.thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
+        self._wake_event = threading.Event()  # 配置变更时提前唤醒检查
         self._lock = threading.Lock()  # 线程安全锁
         
+        # 重置配置（订阅变更，避免每次检查重新读取；stop 时取消订阅）
+        self._subscribe_settings()
+        
         # 重置状态跟踪
         self._last_daily_reset_date: Optional[datetime] = None
         self._last_weekly_reset_week: Optional[int] = None
@@ -66,6 +70,40 @@ class AutoResetService(QObject):
         except (ValueError, AttributeError) as e:
             raise ValueError(f"时间格式解析失败（预期 HH:MM）：{time_str}") from e
     
+    def _subscribe_settings(self):
+        """读取重置配置并订阅变更"""
+        with self._lock:
+            self._auto_reset_enabled = settings.get("task.auto_reset_enabled", True)
+            self._daily_reset_time = settings.get("task.daily_reset_time", DEFAULT_DAILY_RESET_TIME)
+            self._weekly_reset_day = settings.get("task.weekly_reset_day", DEFAULT_WEEKLY_RESET_WEEKDAY)
+        settings.subscribe("task.auto_reset_enabled", self._on_auto_reset_enabled_changed)
+        settings.subscribe("task.daily_reset_time", self._on_daily_reset_time_changed)
+        settings.subscribe("task.weekly_reset_day", self._on_weekly_reset_day_changed)
+    
+    def _unsubscribe_settings(self):
+        """取消配置订阅"""
+        settings.unsubscribe("task.auto_reset_enabled", self._on_auto_reset_enabled_changed)
+        settings.unsubscribe("task.daily_reset_time", self._on_daily_reset_time_changed)
+        settings.unsubscribe("task.weekly_reset_day", self._on_weekly_reset_day_changed)
+    
+    def _on_auto_reset_enabled_changed(self, enabled: bool):
+        """自动重置开关变更"""
+        with self._lock:
+            self._auto_reset_enabled = enabled
+        self._wake_event.set()
+    
+    def _on_daily_reset_time_changed(self, time_str: str):
+        """日常重置时间变更"""
+        with self._lock:
+            self._daily_reset_time = time_str
+        self._wake_event.set()
+    
+    def _on_weekly_reset_day_changed(self, weekday: int):
+        """周常重置日变更"""
+        with self._lock:
+            self._weekly_reset_day = weekday
+        self._wake_event.set()
+    
     def _calculate_reset_time(self, current_time: datetime, reset_time_str: str) -> datetime:
         """通用方法：计算指定日期的重置时间"""
         reset_hour, reset_minute = self._parse_reset_time(reset_time_str)
@@ -80,8 +118,11 @@ class AutoResetService(QObject):
         """加载上次重置状态"""
         try:
             with self._lock:  # 加锁保证线程安全
-                last_daily = self.task_manager.repository.get_app_state("last_daily_reset")
-                last_weekly = self.task_manager.repository.get_app_state("last_weekly_reset")
+                states = self.task_manager.repository.get_app_states(
+                    ["last_daily_reset", "last_weekly_reset"]
+                )
+                last_daily = states.get("last_daily_reset", "")
+                last_weekly = states.get("last_weekly_reset", "")
                 
                 if last_daily:
                     self._last_daily_reset_date = datetime.fromisoformat(last_daily)
@@ -100,17 +141,16 @@ class AutoResetService(QObject):
         """保存上次重置状态"""
         try:
             with self._lock:  # 加锁保证线程安全
+                states = {}
                 if self._last_daily_reset_date:
-                    self.task_manager.repository.set_app_state(
-                        "last_daily_reset", 
-                        self._last_daily_reset_date.isoformat()
-                    )
+                    states["last_daily_reset"] = self._last_daily_reset_date.isoformat()
                 
                 if self._last_weekly_reset_week is not None:
-                    self.task_manager.repository.set_app_state(
-                        "last_weekly_reset", 
-                        str(self._last_weekly_reset_week)
-                    )
+                    states["last_weekly_reset"] = str(self._last_weekly_reset_week)
+                
+                # 一次事务写入全部状态
+                if states:
+                    self.task_manager.repository.set_app_states(states)
                     
         except DatabaseError as e:
             logger.error(f"数据库写入失败：{e}")
@@ -128,6 +168,9 @@ class AutoResetService(QObject):
             self.is_running = True
             self.stop_event.clear()
         
+        # 停止后重新启动时重新订阅配置
+        self._subscribe_settings()
+        
         # 创建并启动线程
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
@@ -138,12 +181,14 @@ class AutoResetService(QObject):
     @pyqtSlot()
     def stop(self):
         """停止自动重置服务"""
+        self._unsubscribe_settings()
         with self._lock:
             if not self.is_running:
                 return
             
             self.is_running = False
             self.stop_event.set()
+            self._wake_event.set()
         
         if self.thread:
             self.thread.join(timeout=5)
@@ -163,8 +208,9 @@ class AutoResetService(QObject):
         
         while self.is_running and not self.stop_event.is_set():
             try:
-                # 每小时检查一次
-                self.stop_event.wait(timeout=CHECK_INTERVAL_HOUR)
+                # 每小时检查一次（配置变更时提前唤醒）
+                self._wake_event.wait(timeout=CHECK_INTERVAL_HOUR)
+                self._wake_event.clear()
                 
                 if self.is_running and not self.stop_event.is_set():
                     self._check_and_perform_resets()
@@ -182,7 +228,8 @@ class AutoResetService(QObject):
         """检查并执行重置"""
         try:
             # 检查是否启用自动重置
-            auto_reset_enabled = settings.get("task.auto_reset_enabled", True)
+            with self._lock:
+                auto_reset_enabled = self._auto_reset_enabled
             if not auto_reset_enabled:
                 return
             
@@ -201,7 +248,8 @@ class AutoResetService(QObject):
         """检查日常重置"""
         try:
             # 获取重置时间设置
-            reset_time_str = settings.get("task.daily_reset_time", DEFAULT_DAILY_RESET_TIME)
+            with self._lock:
+                reset_time_str = self._daily_reset_time
             
             # 计算今天的重置时间
             reset_time_today = self._calculate_reset_time(current_time, reset_time_str)
@@ -236,7 +284,8 @@ class AutoResetService(QObject):
         """检查周常重置"""
         try:
             # 获取重置星期设置（0=星期一）
-            reset_weekday = settings.get("task.weekly_reset_day", DEFAULT_WEEKLY_RESET_WEEKDAY)
+            with self._lock:
+                reset_weekday = self._weekly_reset_day
             current_weekday = current_time.weekday()
             current_week = current_time.isocalendar()[1]
             
@@ -285,7 +334,8 @@ class AutoResetService(QObject):
     def force_weekly_reset(self) -> int:
         """强制执行周常重置"""
         try:
-            reset_weekday = settings.get("task.weekly_reset_day", DEFAULT_WEEKLY_RESET_WEEKDAY)
+            with self._lock:
+                reset_weekday = self._weekly_reset_day
             reset_count = self.task_manager.perform_weekly_reset(reset_weekday)
             
             if reset_count > 0:
@@ -316,7 +366,7 @@ class AutoResetService(QObject):
     def _get_next_daily_reset_time(self) -> Optional[str]:
         """获取下次日常重置时间"""
         try:
-            reset_time_str = settings.get("task.daily_reset_time", DEFAULT_DAILY_RESET_TIME)
+            reset_time_str = self._daily_reset_time
             current_time = datetime.now()
             reset_time_today = self._calculate_reset_time(current_time, reset_time_str)
             
@@ -333,7 +383,7 @@ class AutoResetService(QObject):
     def _get_next_weekly_reset_time(self) -> Optional[str]:
         """获取下次周常重置时间"""
         try:
-            reset_weekday = settings.get("task.weekly_reset_day", DEFAULT_WEEKLY_RESET_WEEKDAY)
+            reset_weekday = self._weekly_reset_day
             current_time = datetime.now()
             current_weekday = current_time.weekday()
             current_week = current_time.isocalendar()[1]
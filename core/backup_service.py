@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+数据库备份服务 - 使用 SQLite 在线备份接口分步备份，压缩保存并校验完整性，支持校验后恢复
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from core.change_bus import change_bus, CHANGE_RELOADED
+from core.task_manager import TaskManager
+from config.settings import settings
+from data.database import init_database
+from data.tag_cache import invalidate_tag_cache
+from utils.logger import logger
+
+# 备份目录与文件名
+BACKUP_DIR = "backups"
+BACKUP_PREFIX = "data_"
+BACKUP_SUFFIX = ".db.gz"
+BACKUP_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+# 每步复制的页数与步间休眠（秒）：分步复制，期间其他连接仍可写入
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+# 自动备份检查间隔（秒）
+CHECK_INTERVAL = 3600
+
+# 有效备份必须包含的表
+REQUIRED_TABLES = ("tasks", "tags", "task_tags", "app_state")
+
+# app_state 中记录的上次备份时间
+STATE_LAST_BACKUP = "last_backup"
+
+# 默认配置
+DEFAULT_BACKUP_INTERVAL = 7
+DEFAULT_BACKUP_RETENTION = 7
+
+
+def validate_database_file(path: str) -> bool:
+    """
+    校验数据库文件：完整性检查通过且包含必要的表
+    
+    Args:
+        path: 未压缩的数据库文件路径
+    
+    Returns:
+        bool: 是否有效
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        result = conn.execute("PRAGMA integrity_check").fetchone()
+        if not result or result[0] != "ok":
+            logger.warning(f"备份完整性检查未通过: {path}: {result[0] if result else '无结果'}")
+            return False
+        
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [name for name in REQUIRED_TABLES if name not in tables]
+        if missing:
+            logger.warning(f"备份缺少数据表: {path}: {missing}")
+            return False
+        return True
+    except sqlite3.Error as e:
+        logger.warning(f"备份校验失败: {path}: {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+
+class BackupService(QObject):
+    """数据库备份服务"""
+    
+    # 备份完成信号（{"path", "size", "elapsed_ms"}；失败时为空字典）
+    backup_finished = pyqtSignal(dict)
+    # 恢复完成信号（是否成功）
+    restore_finished = pyqtSignal(bool)
+    
+    def __init__(self, task_manager: Optional[TaskManager] = None, backup_dir: str = BACKUP_DIR):
+        super().__init__()
+        
+        self.task_manager = task_manager or TaskManager()
+        self.repository = self.task_manager.repository
+        self.db_path = self.repository.db_path
+        self.backup_dir = backup_dir
+        
+        # 服务状态
+        self.is_running = False
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._lock = threading.Lock()
+        self._backup_lock = threading.Lock()  # 备份与恢复互斥
+        
+        # 备份配置（订阅变更；stop 时取消订阅）
+        self._subscribe_settings()
+        
+        self.destroyed.connect(self.stop)
+    
+    def _subscribe_settings(self):
+        """读取备份配置并订阅变更"""
+        with self._lock:
+            self._auto_backup = settings.get("data.auto_backup", False)
+            self._interval_days = settings.get("data.backup_interval", DEFAULT_BACKUP_INTERVAL)
+            self._retention = settings.get("data.backup_retention", DEFAULT_BACKUP_RETENTION)
+        settings.subscribe("data.auto_backup", self._on_auto_backup_changed)
+        settings.subscribe("data.backup_interval", self._on_interval_changed)
+        settings.subscribe("data.backup_retention", self._on_retention_changed)
+        
+    def _unsubscribe_settings(self):
+        """取消配置订阅"""
+        settings.unsubscribe("data.auto_backup", self._on_auto_backup_changed)
+        settings.unsubscribe("data.backup_interval", self._on_interval_changed)
+        settings.unsubscribe("data.backup_retention", self._on_retention_changed)
+    
+    def _on_auto_backup_changed(self, enabled: bool):
+        """自动备份开关变更"""
+        with self._lock:
+            self._auto_backup = enabled
+        self._wake_event.set()
+    
+    def _on_interval_changed(self, days: int):
+        """备份间隔变更"""
+        with self._lock:
+            self._interval_days = days
+        self._wake_event.set()
+    
+    def _on_retention_changed(self, retention: int):
+        """备份保留数量变更"""
+        with self._lock:
+            self._retention = retention
+    
+    # ========== 服务控制 ==========
+    @pyqtSlot()
+    def start(self):
+        """启动自动备份检查"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.stop_event.clear()
+        
+        self._subscribe_settings()
+        self.thread = threading.Thread(target=self._run, name="BackupService", daemon=True)
+        self.thread.start()
+        logger.info("备份服务已启动")
+    
+    @pyqtSlot()
+    def stop(self):
+        """停止自动备份检查"""
+        self._unsubscribe_settings()
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.stop_event.set()
+            self._wake_event.set()
+        
+        if self.thread:
+            self.thread.join(timeout=5)
+        
+        logger.info("备份服务已停止")
+    
+    def _run(self):
+        """服务主循环：到期时执行自动备份"""
+        while not self.stop_event.is_set():
+            self._wake_event.clear()
+            try:
+                if self._is_backup_due():
+                    self.backup_now()
+            except Exception as e:
+                logger.error(f"自动备份失败: {e}")
+            
+            self._wake_event.wait(timeout=CHECK_INTERVAL)
+    
+    def _is_backup_due(self) -> bool:
+        """是否需要执行自动备份"""
+        with self._lock:
+            if not self._auto_backup:
+                return False
+            interval = timedelta(days=self._interval_days)
+        
+        last_backup = self.repository.get_app_state(STATE_LAST_BACKUP)
+        if not last_backup:
+            return True
+        try:
+            return datetime.now() - datetime.fromisoformat(last_backup) >= interval
+        except ValueError:
+            return True
+    
+    @pyqtSlot()
+    def backup_async(self):
+        """在后台线程中立即执行一次备份（结果通过 backup_finished 信号返回）"""
+        threading.Thread(target=self.backup_now, name="BackupNow", daemon=True).start()
+    
+    @pyqtSlot(str)
+    def restore_async(self, backup_path: str):
+        """在后台线程中从备份恢复（结果通过 restore_finished 信号返回）"""
+        def worker():
+            self.restore_finished.emit(self.restore(backup_path))
+        
+        threading.Thread(target=worker, name="BackupRestore", daemon=True).start()
+    
+    # ========== 备份 ==========
+    def backup_now(self) -> Optional[str]:
+        """
+        立即备份（同步执行，可在任意线程调用）
+        
+        Returns:
+            Optional[str]: 备份文件路径，失败返回None
+        """
+        with self._backup_lock:
+            start = time.perf_counter()
+            os.makedirs(self.backup_dir, exist_ok=True)
+            
+            timestamp = datetime.now().strftime(BACKUP_TIME_FORMAT)
+            backup_path = os.path.join(self.backup_dir, f"{BACKUP_PREFIX}{timestamp}{BACKUP_SUFFIX}")
+            raw_path = backup_path + ".tmp"
+            partial_path = backup_path + ".partial"
+            
+            try:
+                # 1. 在线分步备份到临时文件
+                self._copy_database(self.db_path, raw_path)
+                
+                # 2. 完整性检查
+                if not validate_database_file(raw_path):
+                    raise RuntimeError("备份完整性检查未通过")
+                
+                # 3. 压缩后原子替换为正式文件
+                with open(raw_path, "rb") as src, gzip.open(partial_path, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(partial_path, backup_path)
+                
+                self.repository.set_app_state(STATE_LAST_BACKUP, datetime.now().isoformat())
+                self._apply_retention()
+                
+                report = {
+                    "path": backup_path,
+                    "size": os.path.getsize(backup_path),
+                    "elapsed_ms": (time.perf_counter() - start) * 1000,
+                }
+                logger.info(
+                    f"数据库备份完成: {backup_path} ({report['size'] / 1024:.0f} KB, "
+                    f"耗时{report['elapsed_ms']:.0f}ms)"
+                )
+                self.backup_finished.emit(report)
+                return backup_path
+            
+            except Exception as e:
+                logger.error(f"数据库备份失败: {e}")
+                self.backup_finished.emit({})
+                return None
+            finally:
+                for path in (raw_path, partial_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+    
+    def _copy_database(self, source_path: str, target_path: str):
+        """使用 SQLite 在线备份接口分步复制数据库"""
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+        finally:
+            target.close()
+            source.close()
+    
+    def _apply_retention(self):
+        """按保留数量删除最旧的备份"""
+        with self._lock:
+            retention = self._retention
+        
+        for backup in self.list_backups()[retention:]:
+            try:
+                os.remove(backup["path"])
+                logger.info(f"删除过期备份: {backup['path']}")
+            except OSError as e:
+                logger.warning(f"删除过期备份失败: {backup['path']}: {e}")
+    
+    def list_backups(self) -> List[Dict]:
+        """
+        获取备份列表（按时间从新到旧）
+        
+        Returns:
+            List[Dict]: path、time（datetime）、size
+        """
+        backups = []
+        if not os.path.isdir(self.backup_dir):
+            return backups
+        
+        for name in os.listdir(self.backup_dir):
+            if not (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)):
+                continue
+            try:
+                backup_time = datetime.strptime(name[len(BACKUP_PREFIX):-len(BACKUP_SUFFIX)], BACKUP_TIME_FORMAT)
+            except ValueError:
+                continue
+            path = os.path.join(self.backup_dir, name)
+            backups.append({"path": path, "time": backup_time, "size": os.path.getsize(path)})
+        
+        backups.sort(key=lambda item: item["time"], reverse=True)
+        return backups
+    
+    # ========== 恢复 ==========
+    def restore(self, backup_path: str) -> bool:
+        """
+        从备份恢复（先解压校验备份，通过后备份当前数据库，再覆盖当前数据库；
+        当前数据库备份失败时取消恢复）
+        
+        Args:
+            backup_path: 备份文件路径（.db.gz 或未压缩的 .db）
+        
+        Returns:
+            bool: 是否成功
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        raw_path = os.path.join(self.backup_dir, "restore.tmp")
+        try:
+            # 1. 解压到临时文件并校验（校验通过前不触碰当前数据库）
+            with self._backup_lock:
+                opener = gzip.open if backup_path.endswith(".gz") else open
+                with opener(backup_path, "rb") as src, open(raw_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            
+            if not validate_database_file(raw_path):
+                logger.error(f"备份校验未通过，已取消恢复: {backup_path}")
+                return False
+            
+            # 2. 备份当前数据库，便于撤销（备份失败时不覆盖当前数据库）
+            if self.backup_now() is None:
+                logger.error(f"备份当前数据库失败，已取消恢复: {backup_path}")
+                return False
+            
+            with self._backup_lock:
+                # 3. 通过备份接口写回当前数据库（已打开的连接无需关闭）
+                self._copy_database(raw_path, self.db_path)
+                
+                # 4. 按当前版本迁移表结构
+                init_database(self.db_path)
+                invalidate_tag_cache(self.db_path)
+            
+            logger.info(f"已从备份恢复数据库: {backup_path}")
+            change_bus.notify(CHANGE_RELOADED)
+            return True
+        
+        except (OSError, EOFError, sqlite3.Error) as e:
+            logger.error(f"从备份恢复失败: {e}")
+            return False
+        finally:
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+变更通知总线 - 合并同一事件循环周期（或显式批处理范围）内的任务变更，统一发出一次通知
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List
+
+from PyQt5.QtCore import QObject, QMetaObject, Qt, pyqtSignal, pyqtSlot
+
+from utils.logger import logger
+
+# 变更类型
+CHANGE_ADDED = "added"
+CHANGE_UPDATED = "updated"
+CHANGE_DELETED = "deleted"          # 软删除（移入回收站）
+CHANGE_RESTORED = "restored"
+CHANGE_PURGED = "purged"            # 永久删除 / 清空回收站
+CHANGE_COMPLETED = "completed"
+CHANGE_UNCOMPLETED = "uncompleted"
+CHANGE_RESET = "reset"              # 日常/周常重置
+CHANGE_TAGS = "tags"
+CHANGE_RELOADED = "reloaded"        # 整库替换（从备份恢复、导入）
+
+# 会影响标签任务数的变更类型
+TAG_AFFECTING_KINDS = frozenset({
+    CHANGE_ADDED, CHANGE_UPDATED, CHANGE_DELETED, CHANGE_RESTORED, CHANGE_PURGED, CHANGE_TAGS,
+    CHANGE_RELOADED,
+})
+
+
+class ChangeBus(QObject):
+    """
+    任务变更合并总线
+    
+    notify() 可在任意线程调用：变更先记入待发送队列，再通过排队调用在总线所属线程
+    （主线程）的下一个事件循环周期统一发出 tasks_changed；batch() 范围内的变更会等到
+    最外层范围结束后再发送，因此一次多步操作只触发一次界面刷新。
+    """
+    
+    # 合并后的变更通知（任务ID列表，变更类型列表；均已去重并保持首次出现顺序）
+    tasks_changed = pyqtSignal(list, list)
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending_ids: dict = {}
+        self._pending_kinds: dict = {}
+        self._batch_depth = 0
+        self._flush_scheduled = False
+        self._flush_count = 0
+        self._notify_count = 0
+    
+    def notify(self, kind: str, task_ids: Iterable[int] = ()):
+        """
+        记录一次变更
+        
+        Args:
+            kind: 变更类型（CHANGE_* 常量）
+            task_ids: 涉及的任务ID（批量操作可为空）
+        """
+        with self._lock:
+            self._notify_count += 1
+            self._pending_kinds.setdefault(kind, None)
+            for task_id in task_ids:
+                self._pending_ids.setdefault(task_id, None)
+            
+            if self._batch_depth == 0:
+                self._schedule_flush_locked()
+    
+    @contextmanager
+    def batch(self):
+        """批处理范围：范围内的所有变更在结束时合并为一次通知"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._pending_kinds:
+                    self._schedule_flush_locked()
+    
+    def _schedule_flush_locked(self):
+        """安排在总线所属线程的下一个事件循环周期发送（调用方需持有锁）"""
+        if self._flush_scheduled:
+            return
+        self._flush_scheduled = True
+        QMetaObject.invokeMethod(self, "_flush", Qt.QueuedConnection)
+    
+    @pyqtSlot()
+    def _flush(self):
+        """发送合并后的变更通知"""
+        with self._lock:
+            self._flush_scheduled = False
+            if self._batch_depth > 0 or not self._pending_kinds:
+                return
+            task_ids: List[int] = list(self._pending_ids)
+            kinds: List[str] = list(self._pending_kinds)
+            self._pending_ids.clear()
+            self._pending_kinds.clear()
+            self._flush_count += 1
+        
+        logger.debug(f"任务变更通知: 类型={kinds}, 任务数={len(task_ids)}")
+        self.tasks_changed.emit(task_ids, kinds)
+    
+    def get_stats(self) -> dict:
+        """获取合并统计（notify 调用次数 / 实际发送次数）"""
+        with self._lock:
+            return {"notified": self._notify_count, "flushed": self._flush_count}
+
+
+# 全局变更总线（需在主线程导入，确保合并后的通知在主线程发出）
+change_bus = ChangeBus()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+命令日志 - 记录任务操作的逆操作（字段差异、标签差异），支持撤销/重做
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+from core.change_bus import (
+    CHANGE_ADDED, CHANGE_UPDATED, CHANGE_DELETED, CHANGE_RESTORED,
+    CHANGE_PURGED, CHANGE_COMPLETED, CHANGE_UNCOMPLETED, CHANGE_TAGS
+)
+from data.repository import TaskRepository, JOURNAL_TASK_COLUMNS
+from utils.logger import logger
+
+# 最多保留的操作记录条数（环形缓冲，超出后删除最早的记录）
+JOURNAL_CAPACITY = 100
+
+# 所有记录的操作数据总字节数上限（超出时同样删除最早的记录）
+JOURNAL_MAX_BYTES = 4 * 1024 * 1024
+
+# 单条记录的操作数据字节数上限，超过的操作不可撤销
+JOURNAL_MAX_ENTRY_BYTES = 1024 * 1024
+
+# 一次永久删除的任务超过此数量时不读取快照，直接视为不可撤销（避免为记录逆操作占用大量内存）
+JOURNAL_MAX_PURGE_TASKS = 1000
+
+# 记录名称中任务标题的最大长度
+LABEL_TITLE_LENGTH = 20
+
+
+class JournalEntry:
+    """已执行（撤销或重做）的记录：名称、涉及的任务与变更类型"""
+    
+    __slots__ = ("label", "task_ids", "kinds")
+    
+    def __init__(self, label: str, task_ids: List[int], kinds: List[str]):
+        self.label = label
+        self.task_ids = task_ids
+        self.kinds = kinds
+    
+    def __repr__(self) -> str:
+        return f"JournalEntry(label={self.label!r}, tasks={len(self.task_ids)}, kinds={self.kinds!r})"
+
+
+def diff_ops(before: Dict[int, Dict], after: Dict[int, Dict]) -> Tuple[List[list], List[list]]:
+    """
+    根据操作前后的任务快照（TaskRepository.get_task_snapshots）计算逆操作与正向操作
+    
+    只在一侧存在的任务记为重新插入/永久删除（需要完整的行）；两侧都存在的任务只记录
+    变化的字段和增减的标签。
+    
+    Returns:
+        Tuple[List[list], List[list]]: (逆操作, 正向操作)
+    """
+    undo_ops: List[list] = []
+    redo_ops: List[list] = []
+    added = [task_id for task_id in after if task_id not in before]
+    purged = [task_id for task_id in before if task_id not in after]
+    
+    for task_id in added:
+        redo_ops.append(_insert_op(after[task_id]))
+    if added:
+        undo_ops.append(["purge", added])
+    
+    for task_id in purged:
+        undo_ops.append(_insert_op(before[task_id]))
+    if purged:
+        redo_ops.append(["purge", purged])
+    
+    for task_id, old in before.items():
+        new = after.get(task_id)
+        if new is None:
+            continue
+        changed = [column for column in JOURNAL_TASK_COLUMNS if old.get(column) != new.get(column)]
+        if changed:
+            undo_ops.append(["set", task_id, {column: old.get(column) for column in changed}])
+            redo_ops.append(["set", task_id, {column: new.get(column) for column in changed}])
+        
+        old_tags, new_tags = set(old["tags"]), set(new["tags"])
+        if old_tags != new_tags:
+            undo_ops.append(["tags", task_id, sorted(old_tags - new_tags), sorted(new_tags - old_tags)])
+            redo_ops.append(["tags", task_id, sorted(new_tags - old_tags), sorted(old_tags - new_tags)])
+    
+    return undo_ops, redo_ops
+
+
+def _insert_op(snapshot: Dict) -> list:
+    """按快照重新插入任务的操作"""
+    values = {column: snapshot.get(column) for column in JOURNAL_TASK_COLUMNS}
+    values["id"] = snapshot["id"]
+    return ["insert", values, snapshot["tags"]]
+
+
+def summarize_ops(ops: List[list]) -> Tuple[List[int], List[str]]:
+    """
+    操作涉及的任务ID与对应的变更类型（用于撤销/重做后发出变更通知）
+    
+    Returns:
+        Tuple[List[int], List[str]]: (任务ID, 变更类型)
+    """
+    task_ids: Dict[int, None] = {}
+    kinds: Dict[str, None] = {}
+    for op in ops:
+        kind = op[0]
+        if kind == "set":
+            task_ids.setdefault(op[1], None)
+            values = op[2]
+            if "deleted_at" in values:
+                kinds.setdefault(CHANGE_DELETED if values["deleted_at"] is not None else CHANGE_RESTORED, None)
+            if "is_completed" in values:
+                kinds.setdefault(CHANGE_COMPLETED if values["is_completed"] else CHANGE_UNCOMPLETED, None)
+            kinds.setdefault(CHANGE_UPDATED, None)
+        elif kind == "insert":
+            task_ids.setdefault(op[1]["id"], None)
+            kinds.setdefault(CHANGE_ADDED, None)
+        elif kind == "purge":
+            task_ids.update(dict.fromkeys(op[1]))
+            kinds.setdefault(CHANGE_PURGED, None)
+        elif kind == "tags":
+            task_ids.setdefault(op[1], None)
+            kinds.setdefault(CHANGE_UPDATED, None)
+        else:
+            if kind in ("link", "unlink"):
+                task_ids.update(dict.fromkeys(op[2]))
+            kinds.setdefault(CHANGE_TAGS, None)
+    return list(task_ids), list(kinds)
+
+
+def _encode(ops: List[list]) -> str:
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+class CommandJournal:
+    """
+    撤销/重做命令日志
+    
+    每次操作后按前后快照记录逆操作与正向操作（字段差异、标签差异；只有永久删除才保存整行），
+    保存在数据库的 command_journal 表中，条数和总字节数都有上限（环形缓冲），内存中不保留记录。
+    撤销/重做在一个事务中执行整条记录的全部操作并更新记录状态。
+    
+    无法记录的操作（过大的永久删除、导入、自动清理回收站）会清空日志：之前的记录可能依赖被删除的数据，
+    不再提供撤销。日常/周常重置不会清空日志，撤销只恢复记录过的字段。执行时发现记录涉及的任务已不存在，
+    同样回滚并清空日志（见 TaskRepository.apply_journal）。
+    """
+    
+    def __init__(self, repository: TaskRepository, capacity: int = JOURNAL_CAPACITY,
+                 max_bytes: int = JOURNAL_MAX_BYTES):
+        self.repository = repository
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+    
+    # ========== 记录 ==========
+    def snapshot(self, task_ids: List[int]) -> Dict[int, Dict]:
+        """读取任务快照（操作前后各读取一次，交给 record_tasks 计算差异）"""
+        return self.repository.get_task_snapshots(task_ids)
+    
+    def record_tasks(self, action: str, before: Dict[int, Dict], after: Dict[int, Dict]) -> bool:
+        """
+        按操作前后的任务快照记录一次操作
+        
+        Args:
+            action: 操作名称（如 "删除任务"），单个任务时附加任务标题
+            before: 操作前的快照
+            after: 操作后的快照
+        
+        Returns:
+            bool: 是否已记录（没有任何变化时不记录）
+        """
+        undo_ops, redo_ops = diff_ops(before, after)
+        return self.record(self._label(action, before or after), undo_ops, redo_ops)
+    
+    def record(self, label: str, undo_ops: List[list], redo_ops: List[list]) -> bool:
+        """记录一次操作的逆操作与正向操作（超过单条上限时视为不可撤销）"""
+        if not undo_ops:
+            return False
+        undo_json, redo_json = _encode(undo_ops), _encode(redo_ops)
+        if len(undo_json.encode("utf-8")) + len(redo_json.encode("utf-8")) > JOURNAL_MAX_ENTRY_BYTES:
+            self.mark_irreversible(label)
+            return False
+        return self.repository.append_journal(label, undo_json, redo_json, self.capacity, self.max_bytes) != -1
+    
+    def mark_irreversible(self, label: str):
+        """记录一次不可撤销的操作：清空日志"""
+        if self.repository.clear_journal():
+            logger.info(f"操作无法撤销，已清空撤销记录: {label}")
+    
+    @staticmethod
+    def _label(action: str, snapshots: Dict[int, Dict]) -> str:
+        """操作名称：单个任务附加标题，多个任务附加数量"""
+        if len(snapshots) == 1:
+            title = next(iter(snapshots.values())).get("title") or ""
+            if len(title) > LABEL_TITLE_LENGTH:
+                title = title[:LABEL_TITLE_LENGTH] + "…"
+            return f"{action}「{title}」"
+        if snapshots:
+            return f"{action}（{len(snapshots)}个任务）"
+        return action
+    
+    # ========== 撤销/重做 ==========
+    def undo(self) -> Optional[JournalEntry]:
+        """撤销最近一次操作（没有可撤销的操作或失败时返回None）"""
+        return self._apply(undo=True)
+    
+    def redo(self) -> Optional[JournalEntry]:
+        """重做最近一次撤销的操作（没有可重做的操作或失败时返回None）"""
+        return self._apply(undo=False)
+    
+    def _apply(self, undo: bool) -> Optional[JournalEntry]:
+        entry = self.repository.apply_journal(undo)
+        if entry is None:
+            return None
+        task_ids, kinds = summarize_ops(entry["ops"])
+        logger.info(f"{'撤销' if undo else '重做'}: {entry['label']}")
+        return JournalEntry(entry["label"], task_ids, kinds)
+    
+    def undo_label(self) -> Optional[str]:
+        """下一个可撤销的操作名称"""
+        return self.repository.get_journal_heads()["undo"]
+    
+    def redo_label(self) -> Optional[str]:
+        """下一个可重做的操作名称"""
+        return self.repository.get_journal_heads()["redo"]
+    
+    def clear(self) -> int:
+        """清空日志"""
+        return self.repository.clear_journal()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+数据库维护调度 - 空闲时转换旧数据库为增量回收模式、分片回收空闲页，并定期更新查询优化器统计信息
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QCursor
+
+from core.change_bus import change_bus
+from core.task_manager import TaskManager
+from data.database import AUTO_VACUUM_INCREMENTAL
+from utils.logger import logger
+
+# 检查间隔（秒）
+CHECK_INTERVAL = 60
+
+# 无用户操作（鼠标移动、任务变更）超过该时长（秒）视为空闲
+IDLE_SECONDS = 120
+
+# 采样鼠标位置的间隔（毫秒）：两次采样之间位置变化视为用户操作
+INPUT_POLL_INTERVAL_MS = 5000
+
+# 旧数据库转换为增量回收模式需 VACUUM 重建整个文件；超过该大小（字节）时跳过转换
+AUTO_VACUUM_CONVERT_MAX_BYTES = 200 * 1024 * 1024
+
+# 每次空闲检查最多回收的页数（分片执行，避免长时间持有写锁）
+VACUUM_SLICE_PAGES = 256
+
+# PRAGMA optimize 与 ANALYZE 的执行间隔
+OPTIMIZE_INTERVAL = timedelta(days=1)
+ANALYZE_INTERVAL = timedelta(days=7)
+
+# app_state 中记录的上次执行时间
+STATE_LAST_VACUUM = "last_incremental_vacuum"
+STATE_LAST_OPTIMIZE = "last_optimize"
+STATE_LAST_ANALYZE = "last_analyze"
+
+
+def format_storage_stats(stats: Dict[str, float]) -> str:
+    """格式化存储统计（用于日志）"""
+    if not stats:
+        return "数据库存储统计不可用"
+    mode = {0: "关闭", 1: "完全", 2: "增量"}.get(stats["auto_vacuum"], "未知")
+    return (
+        f"数据库文件 {stats['file_size'] / 1024:.0f} KB, "
+        f"共 {stats['page_count']} 页, 空闲 {stats['freelist_count']} 页 "
+        f"(碎片率 {stats['fragmentation']:.1%}), auto_vacuum={mode}"
+    )
+
+
+class MaintenanceScheduler(QObject):
+    """数据库维护调度器"""
+    
+    # 维护完成信号（{"vacuum_pages", "converted", "optimized", "analyzed", "storage"}）
+    maintenance_performed = pyqtSignal(dict)
+    
+    def __init__(self, task_manager: Optional[TaskManager] = None):
+        """
+        初始化维护调度器（需在主线程创建：定时采样鼠标位置判断空闲，不为每个事件安装过滤器）
+        
+        Args:
+            task_manager: 任务管理器
+        """
+        super().__init__()
+        
+        self.task_manager = task_manager or TaskManager()
+        self.repository = self.task_manager.repository
+        
+        # 服务状态
+        self.is_running = False
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_input = time.monotonic()
+        self._last_report: Dict = {}
+        self._convert_skipped = False  # 文件过大而跳过转换时只提示一次
+        
+        # 空闲判断：低频采样鼠标位置，任务变更也视为用户操作
+        self._cursor_pos = QCursor.pos()
+        self._input_timer = QTimer(self)
+        self._input_timer.setInterval(INPUT_POLL_INTERVAL_MS)
+        self._input_timer.timeout.connect(self._poll_input)
+        self._input_timer.start()
+        change_bus.tasks_changed.connect(self._on_user_activity)
+        
+        self.destroyed.connect(self.stop)
+    
+    @pyqtSlot()
+    def _poll_input(self):
+        """鼠标位置变化时记录用户操作时间"""
+        pos = QCursor.pos()
+        if pos != self._cursor_pos:
+            self._cursor_pos = pos
+            self._last_input = time.monotonic()
+    
+    @pyqtSlot()
+    def _on_user_activity(self):
+        """记录用户操作时间"""
+        self._last_input = time.monotonic()
+    
+    def is_idle(self) -> bool:
+        """当前是否空闲"""
+        return time.monotonic() - self._last_input >= IDLE_SECONDS
+    
+    @pyqtSlot()
+    def start(self):
+        """启动维护调度"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.stop_event.clear()
+        
+        self.thread = threading.Thread(target=self._run, name="MaintenanceScheduler", daemon=True)
+        self.thread.start()
+        logger.info("数据库维护调度已启动")
+    
+    @pyqtSlot()
+    def stop(self):
+        """停止维护调度"""
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.stop_event.set()
+        
+        if self.thread:
+            self.thread.join(timeout=5)
+        
+        logger.info("数据库维护调度已停止")
+    
+    def _run(self):
+        """调度主循环"""
+        logger.info(format_storage_stats(self.repository.get_storage_stats()))
+        
+        while not self.stop_event.wait(timeout=CHECK_INTERVAL):
+            try:
+                if self.is_idle():
+                    self.run_maintenance()
+            except Exception as e:
+                logger.error(f"数据库维护失败: {e}")
+    
+    def run_maintenance(self, now: Optional[datetime] = None) -> Dict:
+        """
+        执行一轮维护：必要时转换为增量回收模式，回收一片空闲页，并按间隔执行 PRAGMA optimize / ANALYZE
+        
+        Args:
+            now: 当前时间（默认 datetime.now()）
+        
+        Returns:
+            Dict: 本轮维护结果
+        """
+        now = now or datetime.now()
+        report = {"vacuum_pages": 0, "converted": False, "optimized": False, "analyzed": False}
+        states = {}
+        
+        # 0. 旧数据库一次性转换为增量回收模式（启动时不执行，避免阻塞界面）
+        storage = self.repository.get_storage_stats()
+        if storage and storage.get("auto_vacuum") != AUTO_VACUUM_INCREMENTAL:
+            if storage["file_size"] <= AUTO_VACUUM_CONVERT_MAX_BYTES:
+                if self.repository.enable_incremental_vacuum():
+                    report["converted"] = True
+                    storage = self.repository.get_storage_stats()
+            elif not self._convert_skipped:
+                self._convert_skipped = True
+                logger.warning(
+                    f"数据库文件 {storage['file_size'] / 1024 / 1024:.0f} MB 超过 "
+                    f"{AUTO_VACUUM_CONVERT_MAX_BYTES // 1024 // 1024} MB，跳过增量回收模式转换"
+                    f"（可在应用关闭时手动执行 PRAGMA auto_vacuum = INCREMENTAL; VACUUM;）"
+                )
+        
+        # 1. 分片回收空闲页
+        if storage.get("auto_vacuum") == AUTO_VACUUM_INCREMENTAL and storage.get("freelist_count", 0) > 0:
+            report["vacuum_pages"] = self.repository.incremental_vacuum(VACUUM_SLICE_PAGES)
+            states[STATE_LAST_VACUUM] = now.isoformat()
+        
+        # 2. 优化器统计信息
+        last_runs = self.repository.get_app_states([STATE_LAST_OPTIMIZE, STATE_LAST_ANALYZE])
+        if self._is_due(last_runs.get(STATE_LAST_ANALYZE, ""), ANALYZE_INTERVAL, now):
+            if self.repository.optimize(analyze=True):
+                report["optimized"] = report["analyzed"] = True
+                states[STATE_LAST_ANALYZE] = states[STATE_LAST_OPTIMIZE] = now.isoformat()
+        elif self._is_due(last_runs.get(STATE_LAST_OPTIMIZE, ""), OPTIMIZE_INTERVAL, now):
+            if self.repository.optimize():
+                report["optimized"] = True
+                states[STATE_LAST_OPTIMIZE] = now.isoformat()
+        
+        if not states and not report["converted"]:
+            return report
+        
+        if states:
+            self.repository.set_app_states(states)
+        report["storage"] = self.repository.get_storage_stats() if report["vacuum_pages"] else storage
+        
+        with self._lock:
+            self._last_report = report
+        
+        logger.info(
+            f"数据库维护完成: 回收{report['vacuum_pages']}页"
+            + (", 已转换为增量回收模式" if report["converted"] else "")
+            + (", 已执行ANALYZE" if report["analyzed"] else ", 已执行PRAGMA optimize" if report["optimized"] else "")
+            + f"; {format_storage_stats(report['storage'])}"
+        )
+        self.maintenance_performed.emit(report)
+        return report
+    
+    def _is_due(self, last_run: str, interval: timedelta, now: datetime) -> bool:
+        """判断距上次执行是否已超过间隔"""
+        if not last_run:
+            return True
+        try:
+            return now - datetime.fromisoformat(last_run) >= interval
+        except ValueError:
+            return True
+    
+    def get_last_report(self) -> Dict:
+        """获取最近一轮维护结果"""
+        with self._lock:
+            return dict(self._last_report)
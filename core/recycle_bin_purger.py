@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+回收站清理服务 - 在后台线程中按容量和保留天数（默认不按天数清理）分批永久删除回收站任务
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from core.change_bus import change_bus, CHANGE_PURGED
+from core.task_manager import TaskManager
+from config.settings import settings
+from utils.logger import logger
+
+# 单个事务最多删除的任务数（避免长时间持有写锁）
+PURGE_CHUNK_SIZE = 500
+
+# 两个批次之间的间隔（秒），让界面线程的写操作有机会拿到锁
+CHUNK_PAUSE = 0.05
+
+# 清理后增量回收的最大页数
+VACUUM_PAGES = 1000
+
+# 启动后首次清理的延迟与定期清理间隔（秒）
+STARTUP_DELAY = 30
+PURGE_INTERVAL = 3600
+
+# 默认限制
+DEFAULT_CAPACITY = 100
+DEFAULT_MAX_DAYS = 0  # 0 表示不按天数清理
+
+
+class RecycleBinPurger(QObject):
+    """回收站清理服务"""
+    
+    # 清理完成信号（{"rows": 删除任务数, "pages": 回收页数, "elapsed_ms": 耗时}）
+    purge_finished = pyqtSignal(dict)
+    
+    def __init__(self, task_manager: Optional[TaskManager] = None):
+        super().__init__()
+        
+        self.task_manager = task_manager or TaskManager()
+        self.repository = self.task_manager.repository
+        
+        # 服务状态
+        self.is_running = False
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self._wake_event = threading.Event()  # 配置变更或回收站变化时提前唤醒
+        self._lock = threading.Lock()
+        self._purge_lock = threading.Lock()  # 同一时间只允许一次清理
+        
+        # 清理限制（订阅变更；stop 时取消订阅）
+        self._subscribe_settings()
+        
+        self.destroyed.connect(self.stop)
+    
+    def _subscribe_settings(self):
+        """读取清理限制并订阅变更"""
+        with self._lock:
+            self._capacity = settings.get("task.recycle_bin_capacity", DEFAULT_CAPACITY)
+            self._max_days = settings.get("task.recycle_bin_max_days", DEFAULT_MAX_DAYS)
+        settings.subscribe("task.recycle_bin_capacity", self._on_capacity_changed)
+        settings.subscribe("task.recycle_bin_max_days", self._on_max_days_changed)
+        
+    def _unsubscribe_settings(self):
+        """取消配置订阅"""
+        settings.unsubscribe("task.recycle_bin_capacity", self._on_capacity_changed)
+        settings.unsubscribe("task.recycle_bin_max_days", self._on_max_days_changed)
+    
+    def _on_capacity_changed(self, capacity: int):
+        """回收站容量变更"""
+        with self._lock:
+            self._capacity = capacity
+        self.request_purge()
+    
+    def _on_max_days_changed(self, max_days: int):
+        """回收站保留天数变更"""
+        with self._lock:
+            self._max_days = max_days
+        self.request_purge()
+    
+    @pyqtSlot()
+    def request_purge(self):
+        """请求尽快执行一次清理（在后台线程中执行）"""
+        self._wake_event.set()
+    
+    @pyqtSlot()
+    def start(self):
+        """启动清理服务"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.stop_event.clear()
+        
+        self._subscribe_settings()
+        self.thread = threading.Thread(target=self._run, name="RecycleBinPurger", daemon=True)
+        self.thread.start()
+        logger.info("回收站清理服务已启动")
+    
+    @pyqtSlot()
+    def stop(self):
+        """停止清理服务（正在进行的清理会在当前批次结束后停止）"""
+        self._unsubscribe_settings()
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.stop_event.set()
+            self._wake_event.set()
+        
+        if self.thread:
+            self.thread.join(timeout=5)
+        
+        logger.info("回收站清理服务已停止")
+    
+    def _run(self):
+        """服务主循环：启动延迟后清理一次，之后定期或被唤醒时清理"""
+        self._wake_event.wait(timeout=STARTUP_DELAY)
+        
+        while not self.stop_event.is_set():
+            self._wake_event.clear()
+            try:
+                self.purge()
+            except Exception as e:
+                logger.error(f"回收站清理失败: {e}")
+            
+            self._wake_event.wait(timeout=PURGE_INTERVAL)
+    
+    def purge(self) -> Dict[str, float]:
+        """
+        执行一次清理（同步执行，可在任意线程调用）
+        
+        先删除超过保留天数的任务（保留天数为 0 时跳过），再按容量删除最早的任务，
+        每批最多 PURGE_CHUNK_SIZE 个，最后增量回收空闲页。删除了任务时通过 purge_finished
+        通知界面提示用户，并清空撤销记录。
+        
+        Returns:
+            Dict[str, float]: rows（删除任务数）、pages（回收页数）、elapsed_ms（耗时）
+        """
+        with self._purge_lock:
+            start = time.perf_counter()
+            with self._lock:
+                capacity = self._capacity
+                max_days = self._max_days
+            
+            rows = 0
+            if max_days > 0:
+                rows = self._purge_in_chunks(lambda: self.repository.delete_older_than(max_days, PURGE_CHUNK_SIZE))
+            
+            # 计数器读取回收站数量，未超出容量时跳过排序查询
+            if self.repository.get_deleted_count() > capacity:
+                rows += self._purge_in_chunks(lambda: self.repository.keep_latest_n(capacity, PURGE_CHUNK_SIZE))
+            
+            pages = self.repository.incremental_vacuum(VACUUM_PAGES) if rows else 0
+            
+            report = {"rows": rows, "pages": pages, "elapsed_ms": (time.perf_counter() - start) * 1000}
+            if rows:
+                # 清理不记入日志：之前的记录可能引用被删除的任务，不再提供撤销
+                self.task_manager.journal.mark_irreversible("自动清理回收站")
+                change_bus.notify(CHANGE_PURGED)
+                logger.info(
+                    f"回收站清理完成: 删除了{rows}个任务, 回收了{pages}页, 耗时{report['elapsed_ms']:.0f}ms"
+                )
+            self.purge_finished.emit(report)
+            return report
+    
+    def _purge_in_chunks(self, delete_chunk) -> int:
+        """重复执行单批删除，直到不足一批或服务停止"""
+        total = 0
+        while True:
+            affected = delete_chunk()
+            total += affected
+            if affected < PURGE_CHUNK_SIZE or self.stop_event.is_set():
+                return total
+            time.sleep(CHUNK_PAUSE)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+搜索结果缓存 - 按 (关键词, 模式, 筛选条件) 缓存搜索结果的 LRU 缓存，数据版本变化时整体失效
+"""
+
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from data.database import get_write_version
+from utils.logger import logger
+
+# 缓存上限：条目数与估算内存（超出任一上限时淘汰最久未使用的条目）
+SEARCH_CACHE_MAX_ENTRIES = 64
+SEARCH_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+
+class SearchCache:
+    """
+    搜索结果 LRU 缓存
+    
+    每个条目记录写入时的数据版本：(本进程写入版本号, PRAGMA data_version)。前者在本进程
+    每次提交修改后递增，后者由一个常驻的监视连接读取，其他连接（包括其他进程）提交修改后
+    会发生变化。查找时版本不一致则清空全部条目，因此缓存的结果不会比数据库旧。
+    
+    缓存的结果列表与调用方共享任务对象，get() 返回列表的浅拷贝。
+    """
+    
+    def __init__(self, db_path: str, max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                 max_bytes: int = SEARCH_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[List, int]]" = OrderedDict()
+        self._version: Optional[Tuple[int, int]] = None
+        self._bytes = 0
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+    
+    @staticmethod
+    def make_key(keyword: str, mode: str, **filters) -> Tuple:
+        """生成缓存键（筛选条件按名称排序，None 值忽略）"""
+        return (keyword, mode, tuple(sorted((name, value) for name, value in filters.items() if value is not None)))
+    
+    # ========== 版本 ==========
+    def _data_version(self) -> int:
+        """读取监视连接上的 PRAGMA data_version（调用方需持有锁；失败返回-1）"""
+        try:
+            if self._monitor is None:
+                self._monitor = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"读取数据版本失败: {e}")
+            self._close_monitor()
+            return -1
+    
+    def _close_monitor(self):
+        """关闭监视连接（调用方需持有锁）"""
+        if self._monitor is not None:
+            try:
+                self._monitor.close()
+            except sqlite3.Error:
+                pass
+            self._monitor = None
+    
+    def current_version(self) -> Tuple[int, int]:
+        """当前数据版本 (本进程写入版本号, PRAGMA data_version)"""
+        with self._lock:
+            return get_write_version(), self._data_version()
+    
+    def _sync_version(self) -> Tuple[int, int]:
+        """数据版本变化时清空条目（调用方需持有锁）"""
+        version = (get_write_version(), self._data_version())
+        if version != self._version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+        return version
+    
+    # ========== 读写 ==========
+    def get(self, key: Tuple) -> Optional[List]:
+        """查找缓存结果（未命中或数据已变化返回None）"""
+        with self._lock:
+            self._sync_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return list(entry[0])
+    
+    def put(self, key: Tuple, results: List, version: Optional[Tuple[int, int]] = None):
+        """
+        存入搜索结果
+        
+        Args:
+            key: make_key() 生成的缓存键
+            results: 搜索结果
+            version: 开始搜索前取得的数据版本；搜索期间数据发生变化时不缓存
+        """
+        with self._lock:
+            current = self._sync_version()
+            if version is not None and version != current:
+                return
+            
+            size = _estimate_size(key, results)
+            if size > self.max_bytes:
+                return
+            
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (list(results), size)
+            self._bytes += size
+            
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+    
+    def clear(self):
+        """清空缓存并关闭监视连接"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+            self._close_monitor()
+    
+    # ========== 诊断 ==========
+    def get_stats(self) -> Dict[str, float]:
+        """获取命中率与内存占用"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }
+
+
+def _estimate_size(key: Tuple, results: List) -> int:
+    """估算条目占用的内存（列表、任务对象及其文本字段；与其他结果共享的对象也计入）"""
+    size = sys.getsizeof(results) + sum(sys.getsizeof(part) for part in key)
+    for item in results:
+        size += sys.getsizeof(item)
+        task = getattr(item, "task", item)  # SearchHit 包装的任务
+        if task is not item:
+            size += sys.getsizeof(task)
+        title = task.get("title")
+        if title:
+            size += sys.getsizeof(title)
+        description = task.get("description")
+        if description:
+            size += sys.getsizeof(description)
+    return size
+
+
+_caches: Dict[str, SearchCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(db_path: str) -> SearchCache:
+    """获取指定数据库的搜索缓存（同一路径在进程内共享）"""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = _caches[db_path] = SearchCache(db_path)
+        return cache
+
+
+def invalidate_search_cache(db_path: str):
+    """清空指定数据库的搜索缓存（数据库文件被整体替换后调用）"""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+    if cache is not None:
+        cache.clear()
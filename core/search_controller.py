@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+搜索控制器 - 在后台线程中执行边输入边搜索：新请求使进行中的搜索作废，关键词延长时只在上次结果中缩小范围，
+匹配结果按相关度打分，重复的关键词直接取自搜索缓存
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from core.search_query import ParsedQuery, parse_query
+from core.search_ranker import Matcher, SearchHit, SearchRanker, index_entry
+from core.task_manager import TaskManager
+from utils.logger import logger
+
+# 匹配多少个任务检查一次是否已被新请求取代
+CANCEL_CHECK_INTERVAL = 256
+
+
+def display_sort_key(task: Dict) -> Tuple:
+    """任务列表的显示顺序：优先级降序，相同优先级按创建时间"""
+    return -task.get("priority", 1), task.get("created_at", "")
+
+
+class SearchController(QObject):
+    """
+    边输入边搜索控制器
+    
+    search() 只记录最新请求并唤醒后台线程，立即返回；每个请求有递增的代号，后台线程
+    在匹配过程中定期检查代号，发现已有更新的请求时放弃当前搜索。任务快照在首次搜索时
+    加载，数据版本（见 SearchCache）变化后重新加载；模糊搜索的关键词包含上一次完成搜索的
+    关键词时，只在上次的结果中继续筛选。匹配的任务由 SearchRanker 打分，以 SearchHit 列表
+    （按列表显示顺序，未按得分排序）存入搜索缓存并通过 results_ready 发出，界面为每个列表
+    选出得分最高的一页；再次搜索相同关键词时直接使用缓存。
+    
+    含筛选条件、短语、排除或多个词的查询（见 core.search_query）不使用快照，由
+    TaskManager.search_tasks 编译为一条SQL筛选，只满足筛选条件的任务同样作为结果。
+    """
+    
+    # 搜索完成信号（请求代号, 关键词, 按显示顺序排列的 SearchHit 列表）
+    results_ready = pyqtSignal(int, str, list)
+    
+    def __init__(self, task_manager: Optional[TaskManager] = None):
+        super().__init__()
+        
+        self.task_manager = task_manager or TaskManager()
+        self.cache = self.task_manager.search_cache
+        
+        # 服务状态
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._lock = threading.Lock()
+        
+        # 最新请求（代号, 关键词, 模式）
+        self._generation = 0
+        self._request: Optional[Tuple[int, str, str]] = None
+        
+        # 任务快照：搜索索引项 [(任务, 全部字段小写文本, 各字段小写文本)] 及加载时的数据版本（仅后台线程读写快照本身）
+        self._snapshot: Optional[List[Tuple[Dict, str, Tuple[str, ...]]]] = None
+        self._loaded_version: Optional[Tuple[int, int]] = None
+        
+        # 上一次完成的模糊搜索（数据版本, 小写关键词, 匹配项），用于缩小范围
+        self._last_result: Optional[Tuple[Tuple[int, int], str, List[Tuple[Dict, str, Tuple[str, ...]]]]] = None
+        
+        # 统计
+        self._completed = 0
+        self._cancelled = 0
+        self._narrowed = 0
+        
+        self.destroyed.connect(self.stop)
+    
+    # ========== 请求 ==========
+    def search(self, keyword: str, mode: str = "fuzzy") -> int:
+        """
+        提交搜索请求（异步，结果通过 results_ready 发出）
+        
+        Returns:
+            int: 本次请求的代号
+        """
+        with self._lock:
+            self._generation += 1
+            self._request = (self._generation, keyword, mode)
+            generation = self._generation
+        
+        self._ensure_started()
+        self._wake_event.set()
+        return generation
+    
+    def cancel(self) -> int:
+        """作废进行中的搜索（如清空搜索框时），返回新的代号"""
+        with self._lock:
+            self._generation += 1
+            self._request = None
+            return self._generation
+    
+    def is_current(self, generation: int) -> bool:
+        """检查代号是否仍是最新请求"""
+        with self._lock:
+            return generation == self._generation
+    
+    @pyqtSlot()
+    def invalidate(self):
+        """强制下次搜索时重新加载快照（数据版本变化时会自动重新加载，无需调用）"""
+        with self._lock:
+            self._loaded_version = None
+    
+    # ========== 后台线程 ==========
+    def _ensure_started(self):
+        """首次搜索时启动后台线程"""
+        with self._lock:
+            if self.thread is not None:
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="SearchController", daemon=True)
+        self.thread.start()
+    
+    @pyqtSlot()
+    def stop(self):
+        """停止后台线程"""
+        with self._lock:
+            thread = self.thread
+            self.thread = None
+            self._generation += 1
+            self._request = None
+        if thread is None:
+            return
+        
+        self.stop_event.set()
+        self._wake_event.set()
+        thread.join(timeout=5)
+    
+    def _run(self):
+        """后台线程主循环：每次被唤醒时处理最新的请求"""
+        while not self.stop_event.is_set():
+            self._wake_event.wait()
+            self._wake_event.clear()
+            
+            with self._lock:
+                request = self._request
+                self._request = None
+            if request is None:
+                continue
+            
+            generation, keyword, mode = request
+            try:
+                results = self._execute(generation, keyword, mode)
+            except Exception as e:
+                logger.error(f"搜索任务失败: {e}")
+                results = []
+            
+            if results is None:
+                with self._lock:
+                    self._cancelled += 1
+                continue
+            if self.is_current(generation):
+                with self._lock:
+                    self._completed += 1
+                self.results_ready.emit(generation, keyword, results)
+    
+    def _execute(self, generation: int, keyword: str, mode: str) -> Optional[List]:
+        """执行一次搜索（被新请求取代时返回None；快照已按显示顺序排列，结果保持该顺序）"""
+        ranker = SearchRanker.from_settings()
+        key = self.cache.make_key(keyword, mode, order="display", ranking=ranker.signature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        query = parse_query(keyword, mode)
+        if keyword and not query.is_plain:
+            version = self.cache.current_version()
+            results = self._query(generation, query, keyword, mode, ranker)
+        else:
+            snapshot, version = self._load_snapshot()
+            results = self._match(generation, snapshot, version, keyword, mode, ranker)
+        if results is not None:
+            self.cache.put(key, results, version)
+        return results
+    
+    def _query(self, generation: int, query: ParsedQuery, keyword: str, mode: str,
+               ranker: SearchRanker) -> Optional[List]:
+        """结构化查询：由 TaskManager.search_tasks 编译为SQL筛选，再按显示顺序打分（被新请求取代时返回None）"""
+        tasks = self.task_manager.search_tasks(keyword, mode)
+        if not self.is_current(generation):
+            return None
+        tasks.sort(key=display_sort_key)
+        return ranker.rank_filtered(tasks, Matcher.from_query(query, mode), limit=None)
+    
+    def _match(self, generation: int, snapshot: List[Tuple[Dict, str, Tuple[str, ...]]], version: Tuple[int, int],
+               keyword: str, mode: str, ranker: SearchRanker) -> Optional[List]:
+        """在快照中匹配关键词并打分（被新请求取代时返回None）"""
+        matcher = Matcher(keyword, mode)
+        if not keyword:
+            return [SearchHit(task, 0.0, (), matcher) for task, _, _ in snapshot]
+        
+        if mode != "fuzzy":
+            # 正则等其他模式逐字段匹配，不缩小范围
+            hits = []
+            for index, entry in enumerate(snapshot):
+                if index % CANCEL_CHECK_INTERVAL == 0 and not self.is_current(generation):
+                    return None
+                hit = ranker.hit(entry[0], matcher)
+                if hit is not None:
+                    hits.append(hit)
+            return hits
+        
+        # 模糊匹配：关键词包含上次的关键词时，匹配项必然在上次的结果中
+        needle = keyword.lower()
+        candidates = snapshot
+        last = self._last_result
+        if last is not None and last[0] == version and last[1] in needle:
+            candidates = last[2]
+            with self._lock:
+                self._narrowed += 1
+        
+        matches = []
+        for index, entry in enumerate(candidates):
+            if index % CANCEL_CHECK_INTERVAL == 0 and not self.is_current(generation):
+                return None
+            if needle in entry[1]:
+                matches.append(entry)
+        self._last_result = (version, needle, matches)
+        
+        # 只为匹配项打分（按显示顺序返回全部匹配项，由界面为每个列表选出前几页）
+        return ranker.rank_index(matches, keyword, mode, limit=None)
+    
+    def _load_snapshot(self) -> Tuple[List[Tuple[Dict, str, Tuple[str, ...]]], Tuple[int, int]]:
+        """加载（或复用）任务快照，返回快照及其数据版本"""
+        version = self.cache.current_version()
+        with self._lock:
+            valid = self._snapshot is not None and self._loaded_version == version
+        if valid:
+            return self._snapshot, version
+        
+        tasks = self.task_manager.get_tasks()
+        tasks.sort(key=display_sort_key)
+        self._snapshot = [index_entry(task) for task in tasks]
+        with self._lock:
+            self._loaded_version = version
+        self._last_result = None
+        logger.debug(f"搜索快照已加载: {len(tasks)}个任务")
+        return self._snapshot, version
+    
+    # ========== 诊断 ==========
+    def get_stats(self) -> Dict[str, int]:
+        """获取搜索统计"""
+        with self._lock:
+            return {
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+                "narrowed": self._narrowed,
+                "snapshot_size": len(self._snapshot) if self._snapshot is not None else 0,
+            }
+
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+搜索查询语言 - 解析 tag:工作 p:>=2 due:<7d is:done section:weekly "完整短语" 这类查询，编译为参数化SQL条件
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, List, Optional, Tuple
+
+from utils.common import EPOCH_DATE, today_epoch_days
+
+# 筛选键（含别名）-> 筛选类型
+FILTER_KEYS = {
+    "tag": "tag", "标签": "tag",
+    "p": "priority", "priority": "priority", "优先级": "priority",
+    "due": "due", "截止": "due",
+    "is": "is", "状态": "is",
+    "section": "section", "分区": "section",
+}
+
+SECTION_VALUES = {
+    "daily": "daily", "日常": "daily",
+    "weekly": "weekly", "周常": "weekly",
+    "once": "once", "特殊": "once",
+}
+
+PRIORITY_VALUES = {"紧急": 3, "优先": 2, "普通": 1, "建议": 0}
+
+# is: 的取值 -> (条件类型, 取值)
+STATE_VALUES = {
+    "done": ("completed", True), "completed": ("completed", True), "完成": ("completed", True), "已完成": ("completed", True),
+    "open": ("completed", False), "todo": ("completed", False), "pending": ("completed", False),
+    "未完成": ("completed", False), "待办": ("completed", False),
+    "overdue": ("overdue", True), "逾期": ("overdue", True),
+}
+
+# due: 的特殊取值（相对今天的天数）与无截止日期
+DUE_KEYWORDS = {"today": 0, "今天": 0, "tomorrow": 1, "明天": 1, "yesterday": -1, "昨天": -1}
+DUE_NONE_VALUES = {"none", "无"}
+
+# 比较运算符（SQL 运算符与之相同）
+_OPERATORS = (">=", "<=", ">", "<", "=")
+
+# 相对日期：7d（天）、2w（周）
+_RELATIVE_DUE = re.compile(r"^([+-]?\d+)([dw])$")
+
+# 单个记号：可选的否定前缀 "-"、可选的 "键:"、带引号的短语或连续的非空白字符
+_TOKEN = re.compile(r'(-?)(?:([^\s:"]+):)?(?:"([^"]*)"?|(\S+))')
+
+# LIKE 通配符转义字符
+LIKE_ESCAPE = "\\"
+
+# 文本条件匹配的任务字段（标签单独处理）
+_TEXT_COLUMNS = ("t.title", "t.description", "t.requirements")
+
+
+@dataclass
+class QueryTerm:
+    """
+    查询条件
+    
+    kind 取值：text（自由文本）、tag、priority、due、completed、overdue、section；
+    op 为比较运算符（priority/due 使用），negated 表示以 "-" 开头的排除条件。
+    """
+    kind: str
+    value: object
+    op: str = "="
+    negated: bool = False
+
+
+@dataclass
+class ParsedQuery:
+    """解析后的查询：原始文本与各条件（条件之间为 AND 关系）"""
+    raw: str = ""
+    terms: List[QueryTerm] = field(default_factory=list)
+    
+    @property
+    def text_terms(self) -> List[str]:
+        """需要匹配（非排除）的自由文本，用于打分和高亮"""
+        return [term.value for term in self.terms if term.kind == "text" and not term.negated]
+    
+    @property
+    def is_plain(self) -> bool:
+        """是否只是一个普通关键词（没有筛选条件、短语、排除或多个词）"""
+        return (
+            len(self.terms) == 1
+            and self.terms[0].kind == "text"
+            and not self.terms[0].negated
+            and self.terms[0].value == self.raw.strip()
+        )
+
+
+# ========== 解析 ==========
+def parse_query(text: str, mode: str = "fuzzy") -> ParsedQuery:
+    """
+    解析查询文本
+    
+    能识别的 "键:值" 解析为筛选条件，其余内容为自由文本（键不认识或值无效时按自由文本处理，
+    不会报错）。模糊模式下每个词或引号内的短语是一个文本条件；正则模式下除筛选条件外的内容
+    合并为一个正则表达式。
+    
+    Args:
+        text: 查询文本
+        mode: 搜索模式（fuzzy/regular）
+    """
+    query = ParsedQuery(raw=text or "")
+    words = []
+    for match in _TOKEN.finditer(query.raw):
+        token = match.group(0)
+        if not token.strip():
+            continue
+        negated = match.group(1) == "-"
+        key = match.group(2)
+        value = match.group(3) if match.group(3) is not None else match.group(4)
+        
+        if key is not None:
+            term = _parse_filter(key, value, negated)
+            if term is not None:
+                query.terms.append(term)
+                continue
+        
+        if mode != "fuzzy":
+            words.append(token)
+        elif key is None:
+            if value:
+                query.terms.append(QueryTerm("text", value, negated=negated))
+        else:
+            query.terms.append(QueryTerm("text", token[1:] if negated else token, negated=negated))
+    
+    if words:
+        query.terms.append(QueryTerm("text", " ".join(words)))
+    return query
+
+
+def _parse_filter(key: str, value: str, negated: bool) -> Optional[QueryTerm]:
+    """解析 "键:值" 筛选条件（无法识别时返回None）"""
+    kind = FILTER_KEYS.get(key.lower())
+    if kind is None or not value:
+        return None
+    
+    if kind == "tag":
+        return QueryTerm("tag", value, negated=negated)
+    
+    if kind == "section":
+        section = SECTION_VALUES.get(value.lower())
+        return QueryTerm("section", section, negated=negated) if section else None
+    
+    if kind == "is":
+        state = STATE_VALUES.get(value.lower())
+        return QueryTerm(state[0], state[1], negated=negated) if state else None
+    
+    op, operand = _split_operator(value)
+    if kind == "priority":
+        priority = PRIORITY_VALUES.get(operand)
+        if priority is None and operand.isdigit():
+            priority = int(operand)
+        if priority is None or not 0 <= priority <= 3:
+            return None
+        return QueryTerm("priority", priority, op or "=", negated)
+    
+    # due: 相对天数/周数、today 等关键词、ISO 日期或 none
+    if operand.lower() in DUE_NONE_VALUES:
+        return QueryTerm("due", None, "=", negated) if op in (None, "=") else None
+    days = _parse_due(operand)
+    if days is None:
+        return None
+    if op is None and _RELATIVE_DUE.match(operand):
+        # due:7d 表示今天起7天内（due:-7d 为过去7天）
+        return QueryTerm("due", (min(days, 0), max(days, 0)), "between", negated)
+    return QueryTerm("due", days, op or "=", negated)
+
+
+def _split_operator(value: str) -> Tuple[Optional[str], str]:
+    """拆分比较运算符与操作数"""
+    for op in _OPERATORS:
+        if value.startswith(op):
+            return op, value[len(op):]
+    return None, value
+
+
+class _AbsoluteDay(int):
+    """绝对日期（epoch days），与相对今天的天数区分"""
+
+
+def _parse_due(value: str) -> Optional[int]:
+    """
+    解析截止日期取值
+    
+    Returns:
+        Optional[int]: 相对今天的天数（相对日期和关键词），ISO 日期返回 _AbsoluteDay；无法识别返回None
+    """
+    lowered = value.lower()
+    if lowered in DUE_KEYWORDS:
+        return DUE_KEYWORDS[lowered]
+    match = _RELATIVE_DUE.match(lowered)
+    if match:
+        return int(match.group(1)) * (7 if match.group(2) == "w" else 1)
+    try:
+        return _AbsoluteDay((date.fromisoformat(value) - EPOCH_DATE).days)
+    except ValueError:
+        return None
+
+
+# ========== 编译 ==========
+def compile_query(query: ParsedQuery, mode: str = "fuzzy",
+                  resolve_tag: Optional[Callable[[str], Optional[int]]] = None,
+                  today: Optional[int] = None, correlated: bool = False) -> Tuple[List[str], List]:
+    """
+    将查询编译为SQL条件（任务表别名为 t，各条件之间为 AND）
+    
+    分区、完成状态、优先级、截止日期直接比较列值（可使用相应索引）；标签先通过 resolve_tag
+    解析为ID，以 task_tags 子查询筛选；自由文本在模糊模式下为 LIKE，正则模式下为 REGEXP
+    （由 get_connection 注册）。所有取值均通过参数传入。
+    
+    Args:
+        query: parse_query() 的结果
+        mode: 搜索模式（fuzzy/regular）
+        resolve_tag: 标签名称 -> ID（不存在返回None）；未提供时按名称在子查询中匹配
+        today: 今天的 epoch days（默认取当前日期）
+        correlated: 标签条件使用相关子查询（EXISTS ... WHERE task_id = t.id）。只对少数指定任务
+            求值时（如增量维护智能视图）逐行按主键查找更快；筛选全表时 IN 子查询只执行一次，更快
+    
+    Returns:
+        Tuple[List[str], List]: (条件列表, 参数列表)
+    """
+    today = today_epoch_days() if today is None else today
+    conditions = []
+    params = []
+    
+    for term in query.terms:
+        sql, term_params = _compile_term(term, mode, resolve_tag, today, correlated)
+        if sql is None:
+            continue
+        conditions.append(f"NOT ({sql})" if term.negated else sql)
+        params.extend(term_params)
+    
+    return conditions, params
+
+
+def _compile_term(term: QueryTerm, mode: str, resolve_tag: Optional[Callable[[str], Optional[int]]],
+                  today: int, correlated: bool = False) -> Tuple[Optional[str], list]:
+    """编译单个条件（返回 (SQL, 参数)，条件恒成立时 SQL 为None）"""
+    if term.kind == "section":
+        return "t.section = ?", [term.value]
+    
+    if term.kind == "completed":
+        return "t.is_completed = ?", [1 if term.value else 0]
+    
+    if term.kind == "overdue":
+        # 与逾期统计相同的条件（可使用未完成特殊任务的部分索引）
+        return ("t.section = 'once' AND t.is_completed = 0 AND t.due_date IS NOT NULL AND t.due_date < ?",
+                [today])
+    
+    if term.kind == "priority":
+        return f"t.priority {term.op} ?", [term.value]
+    
+    if term.kind == "due":
+        if term.value is None:
+            return "t.due_date IS NULL", []
+        if term.op == "between":
+            start, end = term.value
+            return "t.due_date BETWEEN ? AND ?", [today + start, today + end]
+        day = term.value if isinstance(term.value, _AbsoluteDay) else today + term.value
+        return f"t.due_date {term.op} ?", [int(day)]
+    
+    if term.kind == "tag":
+        if resolve_tag is None:
+            return _tag_subquery("g.name = ?", correlated), [term.value]
+        tag_id = resolve_tag(term.value)
+        if tag_id is None:
+            return "0", []  # 标签不存在：不匹配任何任务（排除条件则恒成立）
+        if correlated:
+            return "EXISTS (SELECT 1 FROM task_tags WHERE task_id = t.id AND tag_id = ?)", [tag_id]
+        return "t.id IN (SELECT task_id FROM task_tags WHERE tag_id = ?)", [tag_id]
+    
+    return _compile_text(term.value, mode, correlated)
+
+
+def _tag_subquery(tag_match: str, correlated: bool) -> str:
+    """按标签名称筛选任务的子查询（tag_match 为对 g.name 的条件）"""
+    if correlated:
+        return f"EXISTS (SELECT 1 FROM task_tags tt JOIN tags g ON g.id = tt.tag_id WHERE tt.task_id = t.id AND {tag_match})"
+    return f"t.id IN (SELECT tt.task_id FROM task_tags tt JOIN tags g ON g.id = tt.tag_id WHERE {tag_match})"
+
+
+def _compile_text(text: str, mode: str, correlated: bool = False) -> Tuple[str, list]:
+    """自由文本：标题、描述、要求或任一标签匹配"""
+    if mode == "fuzzy":
+        pattern = f"%{escape_like(text)}%"
+        matches = [f"IFNULL({column}, '') LIKE ? ESCAPE '{LIKE_ESCAPE}'" for column in _TEXT_COLUMNS]
+        tag_match = f"g.name LIKE ? ESCAPE '{LIKE_ESCAPE}'"
+    else:
+        pattern = text
+        matches = [f"IFNULL({column}, '') REGEXP ?" for column in _TEXT_COLUMNS]
+        tag_match = "g.name REGEXP ?"
+    
+    matches.append(_tag_subquery(tag_match, correlated))
+    return "(" + " OR ".join(matches) + ")", [pattern] * len(matches)
+
+
+def escape_like(text: str) -> str:
+    """转义 LIKE 模式中的通配符"""
+    return text.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", LIKE_ESCAPE + "%").replace("_", LIKE_ESCAPE + "_")
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+搜索排序 - 按字段权重、创建时间和优先级为匹配任务打分，用有界堆选出前K个结果，并提供匹配位置用于高亮
+"""
+
+import heapq
+import re
+import time
+from operator import attrgetter, itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from utils.common import SECONDS_PER_DAY, to_epoch_seconds
+
+# 参与匹配的字段（标签为列表，其余为文本）
+SEARCH_FIELDS = ("title", "tags", "description", "requirements")
+
+# 默认字段权重（标题 > 标签 > 描述 > 要求），可在配置中覆盖
+DEFAULT_FIELD_WEIGHTS = {"title": 8, "tags": 4, "description": 2, "requirements": 1}
+
+# 时间加分：新建任务最多加 RECENCY_WEIGHT 分，每过一个半衰期减半
+RECENCY_WEIGHT = 2.0
+DEFAULT_RECENCY_HALF_LIFE_DAYS = 30
+
+# 优先级加分：每级加 PRIORITY_WEIGHT 分（建议=0 ... 紧急=3）
+PRIORITY_WEIGHT = 0.5
+
+# 默认返回的结果数
+DEFAULT_TOP_K = 50
+
+# 索引文本中分隔各字段的字符（不会出现在输入的关键词中，避免跨字段误匹配）
+FIELD_SEPARATOR = "\x1f"
+
+_score_key = attrgetter("score")
+_first = itemgetter(0)
+
+
+class Matcher:
+    """
+    关键词匹配器（与 TaskManager.match_task 的匹配规则一致）
+    
+    模糊模式在小写文本中查找子串；正则模式忽略大小写，表达式无效时回退为模糊匹配。
+    结构化查询（见 core.search_query）有多个文本条件时，匹配任一条件即可，匹配位置取并集。
+    """
+    
+    __slots__ = ("keyword", "mode", "terms", "_needles", "_patterns")
+    
+    def __init__(self, keyword: str, mode: str = "fuzzy", terms: Optional[Sequence[str]] = None):
+        self.keyword = keyword
+        self.mode = mode
+        self.terms = tuple(term for term in terms if term) if terms is not None else ((keyword,) if keyword else ())
+        self._needles = tuple(term.lower() for term in self.terms)
+        self._patterns = None
+        if mode != "fuzzy":
+            try:
+                self._patterns = tuple(re.compile(term, re.IGNORECASE) for term in self.terms)
+            except re.error:
+                self._patterns = None
+    
+    @classmethod
+    def from_query(cls, query, mode: str = "fuzzy") -> 'Matcher':
+        """按解析后的查询（ParsedQuery）创建，只匹配需要匹配的自由文本"""
+        return cls(query.raw, mode, query.text_terms)
+    
+    def matches(self, text: str) -> bool:
+        """文本是否匹配"""
+        if not text or not self.terms:
+            return False
+        if self._patterns is not None:
+            return any(pattern.search(text) is not None for pattern in self._patterns)
+        lowered = text.lower()
+        return any(needle in lowered for needle in self._needles)
+    
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """文本中所有匹配位置 [(起始, 结束)]，按位置排列、互不重叠"""
+        if not text or not self.terms:
+            return []
+        if self._patterns is not None:
+            spans = [
+                match.span() for pattern in self._patterns
+                for match in pattern.finditer(text) if match.end() > match.start()
+            ]
+        else:
+            lowered = text.lower()
+            if len(lowered) != len(text):
+                return []  # 小写后长度变化（少数 Unicode 字符），位置无法对应
+            spans = []
+            for needle in self._needles:
+                start = lowered.find(needle)
+                while start >= 0:
+                    end = start + len(needle)
+                    spans.append((start, end))
+                    start = lowered.find(needle, end)
+        
+        if len(self.terms) == 1:
+            return spans
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+
+class SearchHit:
+    """
+    一条搜索结果：任务、得分、匹配的字段
+    
+    匹配位置（spans）在首次访问时才计算，只有显示出来的结果需要。
+    """
+    
+    __slots__ = ("task", "score", "fields", "_matcher", "_spans")
+    
+    def __init__(self, task: Dict, score: float, fields: Tuple[str, ...], matcher: Matcher):
+        self.task = task
+        self.score = score
+        self.fields = fields
+        self._matcher = matcher
+        self._spans: Optional[Dict[str, List[Tuple[int, int]]]] = None
+    
+    @property
+    def spans(self) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        各文本字段中的匹配位置
+        
+        Returns:
+            Dict[str, List[Tuple[int, int]]]: {字段名: [(起始, 结束)]}，标签以 "tags" 为键，
+            位置为匹配标签在标签列表中的下标区间 (i, i + 1)
+        """
+        if self._spans is None:
+            spans = {}
+            for field in self.fields:
+                if field == "tags":
+                    tags = self.task.get("tags") or []
+                    spans[field] = [(index, index + 1) for index, tag in enumerate(tags) if self._matcher.matches(tag)]
+                else:
+                    spans[field] = self._matcher.spans(self.task.get(field) or "")
+            self._spans = spans
+        return self._spans
+    
+    def __repr__(self) -> str:
+        return f"SearchHit(id={self.task.get('id')!r}, score={self.score:.2f}, fields={self.fields!r})"
+
+
+class SearchRanker:
+    """
+    搜索结果打分与排序
+    
+    得分 = 匹配字段的权重之和 + 时间加分（按创建时间指数衰减）+ 优先级加分。
+    rank() 通过 heapq.nlargest 维护大小为K的堆选出前K个结果，不对全部匹配项排序；
+    得分相同时保持输入顺序。
+    """
+    
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 recency_half_life_days: float = DEFAULT_RECENCY_HALF_LIFE_DAYS,
+                 now: Optional[int] = None):
+        self.weights = dict(DEFAULT_FIELD_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.recency_half_life_days = max(recency_half_life_days, 1)
+        self.now = int(time.time()) if now is None else now
+    
+    @classmethod
+    def from_settings(cls) -> 'SearchRanker':
+        """按配置中的字段权重与半衰期创建"""
+        weights = {field: settings.get(f"search.weight_{field}", DEFAULT_FIELD_WEIGHTS[field]) for field in SEARCH_FIELDS}
+        half_life = settings.get("search.recency_half_life_days", DEFAULT_RECENCY_HALF_LIFE_DAYS)
+        return cls(weights, half_life)
+    
+    @property
+    def signature(self) -> Tuple:
+        """影响排序结果的参数（用作缓存键的一部分；当前时间按天取整）"""
+        return (
+            tuple(self.weights[field] for field in SEARCH_FIELDS),
+            self.recency_half_life_days,
+            self.now // SECONDS_PER_DAY,
+        )
+    
+    # ========== 打分 ==========
+    def matched_fields(self, task: Dict, matcher: Matcher) -> Tuple[str, ...]:
+        """任务中匹配关键词的字段"""
+        fields = []
+        for field in SEARCH_FIELDS:
+            if field == "tags":
+                if any(matcher.matches(tag) for tag in task.get("tags") or ()):
+                    fields.append(field)
+            elif matcher.matches(task.get(field) or ""):
+                fields.append(field)
+        return tuple(fields)
+    
+    def score(self, task: Dict, fields: Iterable[str]) -> float:
+        """计算得分"""
+        weights = self.weights
+        return self._boost(sum(weights[field] for field in fields), task)
+    
+    def _boost(self, score: float, task: Dict) -> float:
+        """在字段得分上加上时间与优先级加分（TaskRecord 直接读取原始整数，避免换算）"""
+        created_at = getattr(task, "created_at", None)
+        if type(created_at) is not int:
+            created_at = to_epoch_seconds(task.get("created_at"))
+        if created_at is not None:
+            age_days = max(self.now - created_at, 0) / SECONDS_PER_DAY
+            score += RECENCY_WEIGHT * 0.5 ** (age_days / self.recency_half_life_days)
+        
+        priority = getattr(task, "priority", None)
+        if priority is None:
+            priority = task.get("priority")
+        return score + PRIORITY_WEIGHT * (priority or 0)
+    
+    def hit(self, task: Dict, matcher: Matcher, fields: Optional[Tuple[str, ...]] = None) -> Optional[SearchHit]:
+        """为单个任务生成搜索结果（不匹配返回None）"""
+        if fields is None:
+            fields = self.matched_fields(task, matcher)
+        if not fields:
+            return None
+        return SearchHit(task, self.score(task, fields), fields, matcher)
+    
+    # ========== 排序 ==========
+    def rank(self, tasks: Iterable[Dict], keyword: str, mode: str = "fuzzy",
+             limit: Optional[int] = DEFAULT_TOP_K) -> List[SearchHit]:
+        """
+        搜索并按得分返回前 limit 个结果
+        
+        Args:
+            tasks: 候选任务
+            keyword: 搜索关键词
+            mode: 搜索模式（fuzzy/regular）
+            limit: 结果数上限，None 表示返回全部匹配项（按输入顺序，不排序）
+        """
+        matcher = Matcher(keyword, mode)
+        hits = (self.hit(task, matcher) for task in tasks)
+        hits = (hit for hit in hits if hit is not None)
+        if limit is None:
+            return list(hits)
+        return top_hits(hits, limit)
+    
+    def rank_filtered(self, tasks: Iterable[Dict], matcher: Matcher,
+                      limit: Optional[int] = DEFAULT_TOP_K) -> List[SearchHit]:
+        """
+        为已按查询条件筛选出的任务打分（见 TaskManager.search_tasks）
+        
+        每个任务都是结果：匹配文本条件的字段计入字段得分，只满足筛选条件（没有匹配字段）的
+        任务只有时间与优先级加分。
+        
+        Args:
+            tasks: 筛选出的任务
+            matcher: 查询中自由文本的匹配器（Matcher.from_query）
+            limit: 结果数上限，None 表示返回全部（按输入顺序，不排序）
+        """
+        hits = []
+        for task in tasks:
+            fields = self.matched_fields(task, matcher) if matcher.terms else ()
+            hits.append(SearchHit(task, self.score(task, fields), fields, matcher))
+        return hits if limit is None else top_hits(hits, limit)
+    
+    def rank_index(self, entries: Iterable[Tuple[Dict, str, Tuple[str, ...]]], keyword: str,
+                   mode: str = "fuzzy", limit: Optional[int] = DEFAULT_TOP_K) -> List[SearchHit]:
+        """
+        在预先建立的索引项（index_entry）上搜索，结果与 rank() 相同
+        
+        模糊模式先在拼接文本中查找一次，只为匹配项判断各字段并打分；其他模式逐字段匹配。
+        """
+        if not keyword:
+            return []
+        matcher = Matcher(keyword, mode)
+        if mode != "fuzzy":
+            hits = (hit for hit in (self.hit(task, matcher) for task, _, _ in entries) if hit is not None)
+            return list(hits) if limit is None else top_hits(hits, limit)
+        
+        needle = keyword.lower()
+        matches = [entry for entry in entries if needle in entry[1]]
+        if limit is None:
+            return [self.hit(task, matcher, _fields_in(needle, lowered)) for task, _, lowered in matches]
+        
+        # 先只计算得分，选出前 limit 个后再为其生成 SearchHit（得分相同时保持输入顺序）
+        title_weight, tags_weight, description_weight, requirements_weight = (
+            self.weights[field] for field in SEARCH_FIELDS
+        )
+        boost = self._boost
+        scored = []
+        for index, (task, _, (title, tags, description, requirements)) in enumerate(matches):
+            score = 0
+            if needle in title:
+                score += title_weight
+            if needle in tags:
+                score += tags_weight
+            if needle in description:
+                score += description_weight
+            if needle in requirements:
+                score += requirements_weight
+            scored.append((boost(score, task), index))
+        
+        hits = []
+        for score, index in heapq.nlargest(limit, scored, key=_first):
+            task, _, lowered = matches[index]
+            hits.append(SearchHit(task, score, _fields_in(needle, lowered), matcher))
+        return hits
+
+
+def index_entry(task: Dict) -> Tuple[Dict, str, Tuple[str, ...]]:
+    """
+    搜索索引项：(任务, 全部字段的小写文本, 按 SEARCH_FIELDS 顺序的各字段小写文本)
+    
+    各字段（多个标签）以分隔符拼接为一个文本，一次子串查找即可判断是否匹配任一字段。
+    """
+    values = {
+        "title": task["title"] or "",
+        "tags": FIELD_SEPARATOR.join(task.get("tags") or ()),
+        "description": task.get("description") or "",
+        "requirements": task.get("requirements") or "",
+    }
+    lowered = tuple(values[field].lower() for field in SEARCH_FIELDS)
+    return task, FIELD_SEPARATOR.join(lowered), lowered
+
+
+def _fields_in(needle: str, lowered: Tuple[str, ...]) -> Tuple[str, ...]:
+    """索引项中包含关键词的字段"""
+    return tuple(field for field, text in zip(SEARCH_FIELDS, lowered) if needle in text)
+
+
+def top_hits(hits: Iterable[SearchHit], limit: int) -> List[SearchHit]:
+    """按得分选出前 limit 个结果（有界堆，得分相同时保持输入顺序）"""
+    return heapq.nlargest(limit, hits, key=_score_key)
+
+
+def highlight_html(text: str, spans: Sequence[Tuple[int, int]], color: str) -> str:
+    """将匹配位置包裹为带背景色的 HTML（其余文本转义）"""
+    parts = []
+    last = 0
+    for start, end in spans:
+        if start < last:
+            continue
+        parts.append(_escape(text[last:start]))
+        parts.append(f'<span style="background-color: {color};">{_escape(text[start:end])}</span>')
+        last = end
+    parts.append(_escape(text[last:]))
+    return "".join(parts)
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br>")
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+单实例保护 - 同一数据库只运行一个实例；再次启动时通过本地套接字把命令转发给已运行的实例后退出
+"""
+
+import getpass
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QDir, QLockFile, QObject, pyqtSignal, pyqtSlot
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from utils.logger import logger
+
+# 连接已运行实例的超时（毫秒）
+CONNECT_TIMEOUT_MS = 200
+
+# 等待已运行实例确认收到命令的超时（毫秒）
+REPLY_TIMEOUT_MS = 1000
+
+# 已运行的实例可能刚启动、尚未开始监听：在此时长内重试连接（毫秒）
+FORWARD_TIMEOUT_MS = 5000
+FORWARD_RETRY_INTERVAL = 0.05
+
+# 单条命令的最大字节数（超过时断开连接）
+MAX_MESSAGE_BYTES = 64 * 1024
+
+# 命令类型
+COMMAND_ACTIVATE = "activate"   # 显示并激活主窗口
+COMMAND_ADD_TASK = "add_task"   # 快速添加任务（title、section）
+
+# 收到命令后的回复
+REPLY_OK = b"ok\n"
+
+
+def instance_key(db_path: str = "data.db") -> str:
+    """实例标识：按当前用户和数据库的绝对路径区分（使用不同数据库的实例可以同时运行）"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = ""
+    raw = f"{user}|{os.path.abspath(db_path)}"
+    return "youmeng-assistant-" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def send_command(key: str, message: Dict, timeout_ms: int = FORWARD_TIMEOUT_MS) -> bool:
+    """
+    向已运行的实例发送一条命令（阻塞等待确认，不需要事件循环）
+    
+    Args:
+        key: 实例标识（instance_key）
+        message: 命令（至少包含 command）
+        timeout_ms: 连接不上时重试的总时长
+    
+    Returns:
+        bool: 对方是否确认收到
+    """
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        socket = QLocalSocket()
+        socket.connectToServer(key)
+        if socket.waitForConnected(CONNECT_TIMEOUT_MS):
+            socket.write(payload)
+            socket.waitForBytesWritten(REPLY_TIMEOUT_MS)
+            reply = b""
+            while not reply.endswith(b"\n") and socket.waitForReadyRead(REPLY_TIMEOUT_MS):
+                reply += bytes(socket.readAll())
+            socket.disconnectFromServer()
+            return reply == REPLY_OK
+        if time.monotonic() >= deadline:
+            logger.error(f"连接已运行的实例失败: {socket.errorString()}")
+            return False
+        time.sleep(FORWARD_RETRY_INTERVAL)
+
+
+class SingleInstance(QObject):
+    """
+    单实例保护与命令通道
+    
+    用 QLockFile 判断是否已有实例在运行（锁文件记录进程ID，异常退出遗留的锁会被识别为过期）。
+    持有锁的实例在 QLocalServer 上监听，其他实例连接后发送一行 JSON 命令、等待确认后退出，
+    整个过程不创建 QApplication，也不导入界面模块。
+    
+    主窗口就绪前收到的命令先缓存，调用 set_ready() 后依次发出 command_received。
+    """
+    
+    # 收到其他实例转发的命令
+    command_received = pyqtSignal(dict)
+    
+    def __init__(self, db_path: str = "data.db"):
+        super().__init__()
+        self.key = instance_key(db_path)
+        self._lock = QLockFile(os.path.join(QDir.tempPath(), f"{self.key}.lock"))
+        self._lock.setStaleLockTime(0)  # 只按进程是否存在判断锁是否过期
+        self._server: Optional[QLocalServer] = None
+        self._ready = False
+        self._pending: List[Dict] = []
+    
+    def acquire(self) -> bool:
+        """尝试成为主实例（获取锁）；返回False表示已有实例在运行"""
+        return self._lock.tryLock(0)
+    
+    def forward(self, message: Dict) -> bool:
+        """把命令转发给已运行的实例"""
+        return send_command(self.key, message)
+    
+    def listen(self) -> bool:
+        """开始接收其他实例的命令（需先获取锁；在主线程创建 QApplication 之后调用）"""
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        # 已持有锁，残留的同名套接字只能来自异常退出的实例
+        QLocalServer.removeServer(self.key)
+        if not self._server.listen(self.key):
+            logger.error(f"单实例命令通道监听失败: {self._server.errorString()}")
+            return False
+        self._server.newConnection.connect(self._on_new_connection)
+        logger.debug(f"单实例命令通道已启动: {self.key}")
+        return True
+    
+    def set_ready(self):
+        """主窗口已就绪：发出缓存的命令，之后收到的命令直接发出"""
+        self._ready = True
+        pending, self._pending = self._pending, []
+        for message in pending:
+            self.command_received.emit(message)
+    
+    def release(self):
+        """停止监听并释放锁（退出时调用）"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        if self._lock.isLocked():
+            self._lock.unlock()
+    
+    @pyqtSlot()
+    def _on_new_connection(self):
+        while self._server is not None and self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            socket.disconnected.connect(socket.deleteLater)
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            if socket.bytesAvailable():
+                self._on_ready_read(socket)
+    
+    def _on_ready_read(self, socket: QLocalSocket):
+        """读取一行命令，回复确认后分发"""
+        if not socket.canReadLine():
+            if socket.bytesAvailable() > MAX_MESSAGE_BYTES:
+                logger.warning("单实例命令过长，已断开连接")
+                socket.abort()
+            return
+        
+        line = bytes(socket.readLine(MAX_MESSAGE_BYTES + 1))
+        try:
+            message = json.loads(line.decode("utf-8"))
+            if not isinstance(message, dict) or not isinstance(message.get("command"), str):
+                raise ValueError("缺少 command")
+        except ValueError as e:
+            logger.warning(f"无效的单实例命令: {e}")
+            socket.abort()
+            return
+        
+        socket.write(REPLY_OK)
+        socket.flush()
+        socket.disconnectFromServer()
+        
+        logger.info(f"收到其他实例的命令: {message['command']}")
+        if self._ready:
+            self.command_received.emit(message)
+        else:
+            self._pending.append(message)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+智能视图 - 保存在数据库中的搜索查询，每个视图维护一个成员集合（任务ID），根据任务变更通知增量更新
+"""
+
+from typing import Dict, List, Optional, Set
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from core.change_bus import change_bus, CHANGE_RESET, CHANGE_RELOADED, CHANGE_TAGS
+from core.search_query import compile_query, parse_query
+from core.task_manager import TaskManager
+from utils.common import escape_sql_in_list, today_epoch_days
+from utils.logger import logger
+
+# 这些变更不附带任务ID或会影响大量任务（重置、标签改名/合并），收到后重新计算全部视图
+FULL_REFRESH_KINDS = frozenset({CHANGE_RESET, CHANGE_TAGS})
+
+# 一次通知涉及的任务超过此数量时不再逐个判断，直接重新计算
+INCREMENTAL_MAX_IDS = 500
+
+
+class SmartView:
+    """智能视图：名称、查询语句与当前成员集合"""
+    
+    __slots__ = ("id", "name", "query", "members")
+    
+    def __init__(self, view_id: int, name: str, query: str):
+        self.id = view_id
+        self.name = name
+        self.query = query
+        self.members: Set[int] = set()
+    
+    @property
+    def count(self) -> int:
+        return len(self.members)
+    
+    def __repr__(self) -> str:
+        return f"SmartView(id={self.id!r}, name={self.name!r}, count={len(self.members)})"
+
+
+class SmartViewManager(QObject):
+    """
+    智能视图管理器
+    
+    视图的查询按搜索语法（见 core.search_query，模糊模式）编译为SQL条件。加载时每个视图执行一次
+    只读取ID的查询得到成员集合；之后收到 change_bus.tasks_changed 时，只对变更的任务用一条查询
+    求值全部视图的条件，从成员集合中移除后加入仍满足条件的任务。不附带任务ID的批量变更、
+    标签改名以及日期变化（due:<7d 等相对日期）时重新计算全部视图。
+    
+    视图数量（侧边栏角标）即成员集合的大小；打开视图按成员ID读取任务，不再执行查询本身。
+    需在主线程创建（变更通知在主线程发出）。
+    """
+    
+    # 视图列表变化（增删改）
+    views_changed = pyqtSignal()
+    # 视图成员数变化 {视图ID: 成员数}（只包含变化的视图）
+    counts_changed = pyqtSignal(dict)
+    
+    def __init__(self, task_manager: TaskManager):
+        super().__init__()
+        self.task_manager = task_manager
+        self.repository = task_manager.repository
+        self._views: Dict[int, SmartView] = {}
+        self._today: Optional[int] = None
+        self._full_refreshes = 0
+        self._incremental_updates = 0
+        
+        self.load()
+        change_bus.tasks_changed.connect(self.apply_changes)
+    
+    # ========== 视图 ==========
+    def load(self):
+        """从数据库读取视图并计算全部成员集合"""
+        self._views = {
+            row["id"]: SmartView(row["id"], row["name"], row["query"])
+            for row in self.repository.get_saved_views()
+        }
+        self._refresh_all()
+        logger.debug(f"智能视图已加载: {len(self._views)}个")
+    
+    def get_views(self) -> List[SmartView]:
+        """所有视图（按保存顺序）"""
+        self._check_day()
+        return list(self._views.values())
+    
+    def get_view(self, view_id: int) -> Optional[SmartView]:
+        """按ID获取视图（不存在返回None）"""
+        self._check_day()
+        return self._views.get(view_id)
+    
+    def get_counts(self) -> Dict[int, int]:
+        """各视图的成员数 {视图ID: 成员数}"""
+        self._check_day()
+        return {view_id: view.count for view_id, view in self._views.items()}
+    
+    def add_view(self, name: str, query: str) -> int:
+        """
+        保存新视图
+        
+        Returns:
+            int: 视图ID，失败（如名称重复）返回-1
+        """
+        view_id = self.repository.add_saved_view(name, query)
+        if view_id == -1:
+            return -1
+        view = self._views[view_id] = SmartView(view_id, name.strip(), query.strip())
+        self._refresh(view)
+        self.views_changed.emit()
+        logger.info(f"智能视图已保存: {view.name} ({view.count}个任务)")
+        return view_id
+    
+    def update_view(self, view_id: int, name: str, query: str) -> bool:
+        """修改视图的名称与查询（查询变化时重新计算成员）"""
+        view = self._views.get(view_id)
+        if view is None or not self.repository.update_saved_view(view_id, name, query):
+            return False
+        view.name = name.strip()
+        if view.query != query.strip():
+            view.query = query.strip()
+            self._refresh(view)
+        self.views_changed.emit()
+        return True
+    
+    def delete_view(self, view_id: int) -> bool:
+        """删除视图"""
+        if not self.repository.delete_saved_view(view_id):
+            return False
+        self._views.pop(view_id, None)
+        self.views_changed.emit()
+        return True
+    
+    def get_tasks(self, view_id: int, section: Optional[str] = None) -> List[Dict]:
+        """
+        读取视图中的任务（按成员ID读取，不重新执行视图查询）
+        
+        Args:
+            view_id: 视图ID
+            section: 分区筛选（daily/weekly/once）
+        """
+        view = self.get_view(view_id)
+        if view is None or not view.members:
+            return []
+        conditions = [f"t.id IN {escape_sql_in_list(list(view.members))}"]
+        params = []
+        if section:
+            conditions.append("t.section = ?")
+            params.append(section)
+        return self.repository.find_tasks(conditions, params)
+    
+    # ========== 成员维护 ==========
+    def _compile(self, view: SmartView, correlated: bool = False):
+        """编译视图查询为SQL条件（相对日期按当天计算；correlated 见 compile_query）"""
+        return compile_query(
+            parse_query(view.query), "fuzzy", self.repository.tag_cache.get_id, self._today, correlated
+        )
+    
+    def _refresh(self, view: SmartView):
+        """重新计算单个视图的成员集合"""
+        if self._today is None:
+            self._today = today_epoch_days()
+        conditions, params = self._compile(view)
+        view.members = self.repository.find_task_ids(conditions, params)
+    
+    def _refresh_all(self):
+        """重新计算全部视图的成员集合，发出成员数变化"""
+        self._today = today_epoch_days()
+        changed = {}
+        for view in self._views.values():
+            before = view.count
+            self._refresh(view)
+            if view.count != before:
+                changed[view.id] = view.count
+        self._full_refreshes += 1
+        if changed:
+            self.counts_changed.emit(changed)
+    
+    def _check_day(self):
+        """日期变化后（相对日期的条件随之变化）重新计算全部视图"""
+        if self._views and self._today != today_epoch_days():
+            self._refresh_all()
+    
+    @pyqtSlot(list, list)
+    def apply_changes(self, task_ids: list, kinds: list):
+        """
+        应用任务变更（连接到 change_bus.tasks_changed）：只对变更的任务重新求值各视图条件
+        
+        Args:
+            task_ids: 变更的任务ID（为空表示批量变更）
+            kinds: 变更类型（CHANGE_* 常量）
+        """
+        try:
+            if CHANGE_RELOADED in kinds:
+                # 整库替换（从备份恢复）：视图本身也可能不同，重新读取
+                self.load()
+                self.views_changed.emit()
+                return
+            if not self._views:
+                return
+            if (not task_ids or len(task_ids) > INCREMENTAL_MAX_IDS
+                    or FULL_REFRESH_KINDS.intersection(kinds) or self._today != today_epoch_days()):
+                self._refresh_all()
+                return
+            
+            # 一条查询对变更的任务求值全部视图的条件
+            views = list(self._views.values())
+            flags = self.repository.match_task_ids([self._compile(view, correlated=True) for view in views], task_ids)
+            if flags is None:
+                # 求值失败时不能按"都不满足"处理（会从所有视图中移除这些任务），改为重新计算
+                self._refresh_all()
+                return
+            changed = {}
+            for index, view in enumerate(views):
+                before = view.count
+                view.members.difference_update(task_ids)
+                view.members.update(task_id for task_id, matched in flags.items() if matched[index])
+                if view.count != before:
+                    changed[view.id] = view.count
+            self._incremental_updates += 1
+            if changed:
+                self.counts_changed.emit(changed)
+        except Exception as e:
+            logger.error(f"更新智能视图失败: {e}")
+    
+    # ========== 诊断 ==========
+    def verify_consistency(self) -> List[str]:
+        """对比各视图的成员集合与重新执行查询的结果，返回不一致的视图说明"""
+        problems = []
+        for view in self._views.values():
+            conditions, params = self._compile(view)
+            expected = self.repository.find_task_ids(conditions, params)
+            if expected != view.members:
+                problems.append(
+                    f"{view.name}: 多{len(view.members - expected)}个, 少{len(expected - view.members)}个"
+                )
+        return problems
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取视图数量与更新统计"""
+        return {
+            "views": len(self._views),
+            "members": sum(view.count for view in self._views.values()),
+            "full_refreshes": self._full_refreshes,
+            "incremental_updates": self._incremental_updates,
+        }
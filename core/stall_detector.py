@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+事件循环卡顿检测 - 看门狗线程定时向Qt事件循环发送探测信号，超时未响应时抓取主线程调用栈
+"""
+
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from config.settings import settings
+from utils.logger import logger, get_log_manager
+
+# 探测间隔（秒）
+PING_INTERVAL = 0.5
+
+# 默认卡顿阈值（毫秒）
+DEFAULT_STALL_THRESHOLD_MS = 100
+
+# 持续无响应超过该时长（秒）时立即写一次日志，防止程序卡死后没有记录
+HANG_REPORT_SECONDS = 5.0
+
+# 保留的最近卡顿记录数
+MAX_RECENT_STALLS = 20
+
+
+class StallDetector(QObject):
+    """
+    事件循环卡顿检测器
+    
+    探测信号由看门狗线程发出，经排队连接在主线程执行；主线程在阈值内未处理探测，
+    即视为一次卡顿，此时通过 sys._current_frames 抓取主线程的Python调用栈，
+    待事件循环恢复后连同卡顿时长写入会话目录下的 stalls.log。
+    """
+    
+    # 看门狗线程 -> 主线程的探测信号（参数为序号）
+    _ping = pyqtSignal(int)
+    
+    # 卡顿结束信号（卡顿时长毫秒）
+    stall_detected = pyqtSignal(float)
+    
+    def __init__(self, threshold_ms: Optional[int] = None):
+        """
+        初始化卡顿检测器（需在主线程创建）
+        
+        Args:
+            threshold_ms: 卡顿阈值（毫秒），为None时读取配置
+        """
+        super().__init__()
+        
+        self.is_running = False
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self._pong_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pending_seq = 0
+        self._main_thread_id = threading.main_thread().ident
+        self._recent: List[Dict] = []
+        self._stall_count = 0
+        
+        # 未指定阈值时跟随配置（订阅变更；stop 时取消订阅）
+        self._follow_settings = threshold_ms is None
+        if self._follow_settings:
+            threshold_ms = settings.get("ui.stall_threshold_ms", DEFAULT_STALL_THRESHOLD_MS)
+            settings.subscribe("ui.stall_threshold_ms", self._on_threshold_changed)
+        self._threshold = threshold_ms / 1000
+        
+        self._stall_logger = get_log_manager().get_file_logger("stalls", "stalls.log")
+        
+        self._ping.connect(self._on_ping)
+        self.destroyed.connect(self.stop)
+    
+    def _on_threshold_changed(self, threshold_ms: int):
+        """卡顿阈值变更"""
+        with self._lock:
+            self._threshold = threshold_ms / 1000
+    
+    @pyqtSlot()
+    def start(self):
+        """启动检测线程"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.stop_event.clear()
+        
+        if self._follow_settings:
+            self._on_threshold_changed(settings.get("ui.stall_threshold_ms", DEFAULT_STALL_THRESHOLD_MS))
+            settings.subscribe("ui.stall_threshold_ms", self._on_threshold_changed)
+        self.thread = threading.Thread(target=self._run, name="StallDetector", daemon=True)
+        self.thread.start()
+        logger.info("卡顿检测已启动")
+    
+    @pyqtSlot()
+    def stop(self):
+        """停止检测线程"""
+        settings.unsubscribe("ui.stall_threshold_ms", self._on_threshold_changed)
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.stop_event.set()
+            self._pong_event.set()
+        
+        if self.thread:
+            self.thread.join(timeout=2)
+        
+        if self._stall_count:
+            logger.info(f"本次会话共检测到 {self._stall_count} 次界面卡顿，详见 stalls.log")
+    
+    @pyqtSlot(int)
+    def _on_ping(self, seq: int):
+        """主线程响应探测"""
+        with self._lock:
+            if seq == self._pending_seq:
+                self._pong_event.set()
+    
+    def _run(self):
+        """看门狗主循环"""
+        seq = 0
+        while not self.stop_event.is_set():
+            seq += 1
+            with self._lock:
+                self._pending_seq = seq
+                self._pong_event.clear()
+                threshold = self._threshold
+            
+            sent_at = time.perf_counter()
+            self._ping.emit(seq)
+            
+            if not self._pong_event.wait(timeout=threshold) and not self.stop_event.is_set():
+                try:
+                    self._handle_stall(sent_at)
+                except Exception as e:
+                    logger.error(f"记录界面卡顿失败: {e}")
+            
+            self.stop_event.wait(timeout=PING_INTERVAL)
+    
+    def _handle_stall(self, sent_at: float):
+        """抓取主线程调用栈并等待事件循环恢复"""
+        stack = self.capture_main_stack()
+        
+        # 长时间无响应：先写一次日志，避免程序卡死后没有任何记录
+        if not self._pong_event.wait(timeout=HANG_REPORT_SECONDS):
+            if self.stop_event.is_set():
+                return
+            waited_ms = (time.perf_counter() - sent_at) * 1000
+            self._stall_logger.warning(
+                f"主线程已 {waited_ms:.0f} ms 未响应，当前调用栈:\n{self.capture_main_stack()}"
+            )
+            self._pong_event.wait()
+            if self.stop_event.is_set():
+                return
+        
+        duration_ms = (time.perf_counter() - sent_at) * 1000
+        with self._lock:
+            self._stall_count += 1
+            self._recent.append({"time": time.time(), "duration_ms": duration_ms, "stack": stack})
+            del self._recent[:-MAX_RECENT_STALLS]
+        
+        self._stall_logger.warning(f"界面卡顿 {duration_ms:.0f} ms，卡顿时主线程调用栈:\n{stack}")
+        self.stall_detected.emit(duration_ms)
+    
+    def capture_main_stack(self) -> str:
+        """获取主线程当前的Python调用栈"""
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return "（无法获取主线程调用栈）"
+        return "".join(traceback.format_stack(frame))
+    
+    def get_recent_stalls(self) -> List[Dict]:
+        """获取最近的卡顿记录（time/duration_ms/stack）"""
+        with self._lock:
+            return list(self._recent)
+    
+    def get_stall_count(self) -> int:
+        """获取本次会话的卡顿次数"""
+        with self._lock:
+            return self._stall_count
@@ -4,12 +4,36 @@ from datetime import datetime, date
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 from data.repository import TaskRepository
 from data.models import TaskSection
+from data.query_stats import query_stats
+from core.change_bus import (
+    change_bus, CHANGE_ADDED, CHANGE_UPDATED, CHANGE_DELETED, CHANGE_RESTORED,
+    CHANGE_PURGED, CHANGE_COMPLETED, CHANGE_UNCOMPLETED, CHANGE_RESET, CHANGE_TAGS
+)
+from data import bulk_io
+from core.command_journal import CommandJournal, JournalEntry, JOURNAL_MAX_PURGE_TASKS
+from core.search_cache import get_search_cache
+from core.search_query import QueryTerm, compile_query, parse_query
+from core.search_ranker import DEFAULT_TOP_K, Matcher, SearchHit, SearchRanker
+from config.settings import settings
 from utils.logger import logger
+from utils.startup_profiler import startup_profiler
 from utils.exceptions import DatabaseError
 
 # 常量定义
 DEFAULT_DAILY_RESET_TIME = "06:00"
 
+# 回收站每页读取的任务数
+RECYCLE_PAGE_SIZE = 100
+
+# 旧版本存放在 app_state 表中的配置项 -> config.json 中的配置键
+LEGACY_APP_STATE_SETTINGS = {
+    "daily_reset_time": "task.daily_reset_time",
+    "recycle_bin_capacity": "task.recycle_bin_capacity",
+}
+
+# SQL统计配置是否已绑定（进程内只绑定一次）
+_query_stats_bound = False
+
 # 类型提示增强
 class TaskStats(TypedDict):
     pending: int
@@ -32,18 +56,18 @@ class TaskDict(TypedDict):
     requirements: str
     priority: int
     is_completed: bool
-    due_date: Optional[str]
+    due_date: Optional[date]
     reset_weekday: Optional[int]
     reset_time: Optional[str]
     sort_order: int
     tags: List[str]
-    completed_at: Optional[str]
+    completed_at: Optional[datetime]
 
 
 class TaskManager(QObject):
     """任务管理器，业务逻辑层"""
     
-    # 信号定义
+    # 信号定义（界面刷新统一订阅 change_bus.tasks_changed 的合并通知）
     task_added = pyqtSignal(int)  # task_id
     task_updated = pyqtSignal(int)  # task_id
     task_deleted = pyqtSignal(int)  # task_id (软删除)
@@ -66,8 +90,45 @@ class TaskManager(QObject):
         """
         super().__init__()
         self.repository = repository or TaskRepository(db_path)
+        self.search_cache = get_search_cache(self.repository.db_path)  # 同一数据库共享
+        self.journal = CommandJournal(self.repository)  # 撤销/重做
+        with startup_profiler.phase("migrations.settings"):
+            self._migrate_legacy_settings()
+        self._bind_query_stats_settings()
         logger.info("任务管理器初始化完成")
     
+    @staticmethod
+    def _bind_query_stats_settings():
+        """
+        将SQL统计开关和慢查询阈值与配置绑定
+        
+        回调属于进程内全局的 query_stats、不引用任务管理器，进程内只订阅一次，
+        随进程存在，不随某个任务管理器实例订阅或取消。
+        """
+        global _query_stats_bound
+        if _query_stats_bound:
+            return
+        _query_stats_bound = True
+        query_stats.set_enabled(settings.get("data.query_stats_enabled", True))
+        query_stats.set_slow_threshold(settings.get("data.slow_query_threshold_ms", 50))
+        settings.subscribe("data.query_stats_enabled", query_stats.set_enabled)
+        settings.subscribe("data.slow_query_threshold_ms", query_stats.set_slow_threshold)
+    
+    def _migrate_legacy_settings(self):
+        """一次性迁移：将旧版 app_state 表中的配置项移入 config.json"""
+        try:
+            legacy = self.repository.get_app_states(list(LEGACY_APP_STATE_SETTINGS))
+            if not legacy:
+                return
+            
+            settings.import_legacy_values({
+                LEGACY_APP_STATE_SETTINGS[key]: value for key, value in legacy.items()
+            })
+            self.repository.delete_app_states(list(legacy))
+            logger.info(f"已清理旧版配置项: {', '.join(legacy)}")
+        except Exception as e:
+            logger.error(f"迁移旧版配置失败: {e}")
+    
     # ========== 通用匹配方法 ==========
     def _match_text(self, text: str, keyword: str, mode: str = "fuzzy") -> bool:
         """
@@ -97,6 +158,26 @@ class TaskManager(QObject):
                 # 正则表达式无效，回退到模糊匹配
                 return keyword_lower in text_lower
     
+    def match_task(self, task: Dict, keyword: str, mode: str = "fuzzy") -> bool:
+        """
+        检查任务的标题、描述、要求、标签是否匹配关键词（任一字段匹配即可）
+        
+        Args:
+            task: 任务数据
+            keyword: 搜索关键词
+            mode: 匹配模式（fuzzy/regular）
+            
+        Returns:
+            bool: 是否匹配
+        """
+        if self._match_text(task["title"], keyword, mode):
+            return True
+        if self._match_text(task.get("description", ""), keyword, mode):
+            return True
+        if self._match_text(task.get("requirements", ""), keyword, mode):
+            return True
+        return any(self._match_text(tag, keyword, mode) for tag in task.get("tags", []))
+    
     # ========== 任务核心操作 ==========
     @pyqtSlot(str, str, dict, result=int)
     def add_task(self, title: str, section: str, **kwargs) -> int:
@@ -138,7 +219,9 @@ class TaskManager(QObject):
             task_id = self.repository.add_task(task_dict)
             
             if task_id != -1:
+                self.journal.record_tasks("添加任务", {}, self.journal.snapshot([task_id]))
                 self.task_added.emit(task_id)
+                change_bus.notify(CHANGE_ADDED, (task_id,))
                 logger.info(f"任务添加成功: ID={task_id}, 标题={title}")
             
             return task_id
@@ -205,10 +288,13 @@ class TaskManager(QObject):
             bool: 是否成功
         """
         try:
+            before = self.journal.snapshot([task_id])
             success = self.repository.update_task(task_id, updates)
             
             if success:
+                self.journal.record_tasks("编辑任务", before, self.journal.snapshot([task_id]))
                 self.task_updated.emit(task_id)
+                change_bus.notify(CHANGE_UPDATED, (task_id,))
                 logger.info(f"任务更新成功: ID={task_id}")
             
             return success
@@ -232,10 +318,13 @@ class TaskManager(QObject):
             bool: 是否成功
         """
         try:
+            before = self.journal.snapshot([task_id])
             success = self.repository.soft_delete(task_id)
             
             if success:
+                self.journal.record_tasks("删除任务", before, self.journal.snapshot([task_id]))
                 self.task_deleted.emit(task_id)
+                change_bus.notify(CHANGE_DELETED, (task_id,))
                 self.recycle_bin_updated.emit()
                 logger.info(f"任务删除成功: ID={task_id}")
             
@@ -260,10 +349,13 @@ class TaskManager(QObject):
             bool: 是否成功
         """
         try:
+            before = self.journal.snapshot([task_id])
             success = self.repository.restore(task_id)
             
             if success:
+                self.journal.record_tasks("恢复任务", before, self.journal.snapshot([task_id]))
                 self.task_restored.emit(task_id)
+                change_bus.notify(CHANGE_RESTORED, (task_id,))
                 self.recycle_bin_updated.emit()
                 logger.info(f"任务恢复成功: ID={task_id}")
             
@@ -288,10 +380,13 @@ class TaskManager(QObject):
             bool: 是否成功
         """
         try:
+            before = self.journal.snapshot([task_id])
             success = self.repository.permanent_delete(task_id)
             
             if success:
+                self.journal.record_tasks("永久删除任务", before, self.journal.snapshot([task_id]))
                 self.task_permanent_deleted.emit(task_id)
+                change_bus.notify(CHANGE_PURGED, (task_id,))
                 self.recycle_bin_updated.emit()
                 logger.info(f"任务永久删除成功: ID={task_id}")
             
@@ -316,10 +411,13 @@ class TaskManager(QObject):
             bool: 是否成功
         """
         try:
+            before = self.journal.snapshot([task_id])
             success = self.repository.complete_task(task_id)
             
             if success:
+                self.journal.record_tasks("完成任务", before, self.journal.snapshot([task_id]))
                 self.task_completed.emit(task_id)
+                change_bus.notify(CHANGE_COMPLETED, (task_id,))
                 logger.info(f"任务完成: ID={task_id}")
             
             return success
@@ -343,10 +441,13 @@ class TaskManager(QObject):
             bool: 是否成功
         """
         try:
+            before = self.journal.snapshot([task_id])
             success = self.repository.uncomplete_task(task_id)
             
             if success:
+                self.journal.record_tasks("取消完成任务", before, self.journal.snapshot([task_id]))
                 self.task_uncompleted.emit(task_id)
+                change_bus.notify(CHANGE_UNCOMPLETED, (task_id,))
                 logger.info(f"任务取消完成: ID={task_id}")
             
             return success
@@ -376,6 +477,37 @@ class TaskManager(QObject):
             logger.error(f"获取已删除任务失败: {e}")
             return []
 
+    def get_deleted_page(self, limit: int = RECYCLE_PAGE_SIZE, after: Optional[Tuple[int, int]] = None,
+                         keyword: str = "") -> List[Dict]:
+        """
+        分页获取回收站中的任务（按删除时间倒序，键集分页）
+        
+        Args:
+            limit: 每页行数
+            after: 上一页最后一行的 (deleted_at, id)，None 表示第一页
+            keyword: 搜索关键词（支持查询语言，见 core.search_query）
+            
+        Returns:
+            List[Dict]: id、title、deleted_at（Unix 秒）、age_bucket（0=7天内，1=30天内，2=30天以上）
+        """
+        try:
+            conditions, params = compile_query(parse_query(keyword), "fuzzy", self.repository.tag_cache.get_id)
+            return self.repository.get_deleted_page(limit, after, conditions, params)
+        except DatabaseError as e:
+            logger.error(f"数据库分页获取已删除任务失败: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"分页获取已删除任务失败: {e}")
+            return []
+    
+    def get_deleted_count(self) -> int:
+        """获取回收站任务数（读取计数器，与回收站大小无关）"""
+        try:
+            return self.repository.get_deleted_count()
+        except Exception as e:
+            logger.error(f"获取回收站任务数失败: {e}")
+            return 0
+    
     @pyqtSlot(result=int)
     def empty_recycle_bin(self) -> int:
         """
@@ -385,10 +517,19 @@ class TaskManager(QObject):
             int: 删除的任务数量
         """
         try:
+            # 任务过多时不读取快照（避免为撤销占用大量内存），清空后不可撤销
+            before = None
+            if self.repository.get_deleted_count() <= JOURNAL_MAX_PURGE_TASKS:
+                before = self.journal.snapshot(self.repository.get_deleted_task_ids())
             count = self.repository.empty_recycle_bin()
             
             if count > 0:
+                if before is None:
+                    self.journal.mark_irreversible("清空回收站")
+                else:
+                    self.journal.record_tasks("清空回收站", before, {})
                 self.recycle_bin_updated.emit()
+                change_bus.notify(CHANGE_PURGED)
                 logger.info(f"清空回收站成功: 删除了{count}个任务")
             
             return count
@@ -416,8 +557,11 @@ class TaskManager(QObject):
             total_completed = sum(section_stats["completed"] for section_stats in stats.values())
             total_tasks = total_pending + total_completed
             
-            # 获取回收站数量
-            deleted_count = len(self.repository.get_deleted_tasks())
+            # 获取回收站数量（计数器读取，无需加载已删除任务）
+            deleted_count = self.repository.get_deleted_count()
+            
+            # 逾期的特殊任务（整数比较，走部分索引）
+            overdue_count = self.repository.get_overdue_count()
             
             return {
                 "sections": stats,
@@ -425,16 +569,17 @@ class TaskManager(QObject):
                     "pending": total_pending,
                     "completed": total_completed,
                     "tasks": total_tasks,
-                    "deleted": deleted_count
+                    "deleted": deleted_count,
+                    "overdue": overdue_count
                 }
             }
             
         except DatabaseError as e:
             logger.error(f"数据库获取统计信息失败: {e}")
-            return {"sections": {}, "total": {"pending": 0, "completed": 0, "tasks": 0, "deleted": 0}}
+            return {"sections": {}, "total": {"pending": 0, "completed": 0, "tasks": 0, "deleted": 0, "overdue": 0}}
         except Exception as e:
             logger.error(f"获取统计信息失败: {e}")
-            return {"sections": {}, "total": {"pending": 0, "completed": 0, "tasks": 0, "deleted": 0}}
+            return {"sections": {}, "total": {"pending": 0, "completed": 0, "tasks": 0, "deleted": 0, "overdue": 0}}
     
     # ========== 重置 ==========
     @pyqtSlot(result=int)
@@ -450,6 +595,7 @@ class TaskManager(QObject):
             
             if count > 0:
                 self.daily_reset_performed.emit(count)
+                change_bus.notify(CHANGE_RESET)
                 logger.info(f"每日任务重置完成: 重置了{count}个任务")
             
             return count
@@ -481,6 +627,7 @@ class TaskManager(QObject):
             
             if count > 0:
                 self.weekly_reset_performed.emit(count)
+                change_bus.notify(CHANGE_RESET)
                 logger.info(f"周常任务重置完成: 星期{weekday}, 重置了{count}个任务")
             
             return count
@@ -501,11 +648,8 @@ class TaskManager(QObject):
             str: 重置时间字符串（HH:MM格式）
         """
         try:
-            reset_time = self.repository.get_app_state("daily_reset_time")
+            reset_time = settings.get("task.daily_reset_time", DEFAULT_DAILY_RESET_TIME)
             return reset_time if reset_time else DEFAULT_DAILY_RESET_TIME
-        except DatabaseError as e:
-            logger.error(f"数据库获取每日重置时间失败: {e}")
-            return DEFAULT_DAILY_RESET_TIME
         except Exception as e:
             logger.error(f"获取每日重置时间失败: {e}")
             return DEFAULT_DAILY_RESET_TIME
@@ -535,7 +679,7 @@ class TaskManager(QObject):
             # 验证时间格式
             datetime.strptime(normalized_time, "%H:%M")
             
-            success = self.repository.set_app_state("daily_reset_time", normalized_time)
+            success = settings.set("task.daily_reset_time", normalized_time)
             
             if success:
                 logger.info(f"每日重置时间已更新: {normalized_time}")
@@ -545,9 +689,6 @@ class TaskManager(QObject):
         except ValueError as e:
             logger.error(f"时间格式无效: {time_str} - {e}")
             return False
-        except DatabaseError as e:
-            logger.error(f"数据库设置每日重置时间失败: {e}")
-            return False
         except Exception as e:
             logger.error(f"设置每日重置时间失败: {e}")
             return False
@@ -572,43 +713,169 @@ class TaskManager(QObject):
             logger.error(f"获取所有标签失败: {e}")
             return []
     
+    @pyqtSlot(int, int, result=bool)
+    def merge_tags(self, source_id: int, target_id: int) -> bool:
+        """
+        合并标签（源标签的任务改为目标标签，源标签删除；可撤销）
+        
+        Args:
+            source_id: 源标签ID
+            target_id: 目标标签ID
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            source_name = self.repository.tag_cache.get_name(source_id)
+            target_name = self.repository.tag_cache.get_name(target_id)
+            source_tasks = self.repository.get_tag_task_ids(source_id)
+            gained = sorted(set(source_tasks) - set(self.repository.get_tag_task_ids(target_id)))
+            
+            success = self.repository.merge_tags(source_id, target_id)
+            
+            if success:
+                # 逆操作：重建源标签及其关联，移除合并时新增的目标标签关联
+                self.journal.record(
+                    f"合并标签「{source_name}」到「{target_name}」",
+                    [["tag_create", source_id, source_name], ["link", source_id, source_tasks],
+                     ["unlink", target_id, gained]],
+                    [["link", target_id, gained], ["tag_drop", source_id]]
+                )
+                self.tags_updated.emit()
+                change_bus.notify(CHANGE_TAGS, source_tasks)
+                logger.info(f"标签合并成功: {source_name} -> {target_name}")
+            
+            return success
+            
+        except DatabaseError as e:
+            logger.error(f"数据库合并标签失败: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"合并标签失败: {e}")
+            return False
+    
+    # ========== 撤销/重做 ==========
+    @pyqtSlot(result=str)
+    def undo(self) -> Optional[str]:
+        """
+        撤销最近一次操作
+        
+        Returns:
+            Optional[str]: 撤销的操作名称，没有可撤销的操作或失败时返回None
+        """
+        try:
+            return self._notify_replayed(self.journal.undo())
+        except Exception as e:
+            logger.error(f"撤销失败: {e}")
+            return None
+    
+    @pyqtSlot(result=str)
+    def redo(self) -> Optional[str]:
+        """
+        重做最近一次撤销的操作
+        
+        Returns:
+            Optional[str]: 重做的操作名称，没有可重做的操作或失败时返回None
+        """
+        try:
+            return self._notify_replayed(self.journal.redo())
+        except Exception as e:
+            logger.error(f"重做失败: {e}")
+            return None
+    
+    def _notify_replayed(self, entry: Optional[JournalEntry]) -> Optional[str]:
+        """撤销/重做后按涉及的任务与变更类型发出通知"""
+        if entry is None:
+            return None
+        with change_bus.batch():
+            for kind in entry.kinds:
+                change_bus.notify(kind, entry.task_ids)
+        if {CHANGE_DELETED, CHANGE_RESTORED, CHANGE_PURGED, CHANGE_ADDED}.intersection(entry.kinds):
+            self.recycle_bin_updated.emit()
+        if CHANGE_TAGS in entry.kinds:
+            self.tags_updated.emit()
+        return entry.label
+    
+    # ========== 导入导出 ==========
+    def export_tasks(self, path: str, include_deleted: bool = False) -> int:
+        """
+        导出任务到 JSON Lines / CSV 文件（按扩展名判断格式，可在后台线程调用）
+        
+        Args:
+            path: 目标文件路径
+            include_deleted: 是否包含回收站中的任务
+            
+        Returns:
+            int: 导出的任务数，失败返回-1
+        """
+        try:
+            return bulk_io.export_tasks(self.repository.db_path, path, include_deleted=include_deleted)
+            
+        except DatabaseError as e:
+            logger.error(f"数据库导出任务失败: {e}")
+            return -1
+        except Exception as e:
+            logger.error(f"导出任务失败: {e}")
+            return -1
+    
+    def import_tasks(self, path: str) -> Dict[str, int]:
+        """
+        从 JSON Lines / CSV 文件导入任务（追加到现有任务，可在后台线程调用）
+        
+        Args:
+            path: 源文件路径
+            
+        Returns:
+            Dict[str, int]: imported、skipped、tags_created；失败返回空字典
+        """
+        try:
+            stats = bulk_io.import_tasks(self.repository.db_path, path)
+            
+            if stats["imported"] > 0:
+                # 导入不记入日志：之前的记录不再提供撤销
+                self.journal.mark_irreversible("导入任务")
+                change_bus.notify(CHANGE_ADDED)
+                if stats["tags_created"] > 0:
+                    change_bus.notify(CHANGE_TAGS)
+            
+            return stats
+            
+        except DatabaseError as e:
+            logger.error(f"数据库导入任务失败: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"导入任务失败: {e}")
+            return {}
+    
     # ========== 搜索功能 ==========
     @pyqtSlot(str, str)
-    def search_tasks(self, keyword: str, mode: str = "fuzzy") -> List[TaskDict]:
+    def search_tasks(self, keyword: str, mode: str = "fuzzy", section: Optional[str] = None,
+                     tag: Optional[str] = None) -> List[TaskDict]:
         """
-        搜索任务（优化：提取通用匹配方法，提前导入 re）
+        搜索任务（结果按关键词、模式与筛选条件缓存，数据变化后自动失效）
+        
+        关键词支持查询语言（见 core.search_query），如 tag:工作 p:>=2 due:<7d is:done
+        section:weekly "完整短语"；整个查询编译为一条参数化SQL，不在内存中二次筛选。
         
         Args:
-            keyword: 搜索关键词
+            keyword: 搜索关键词或查询语句
             mode: 搜索模式（fuzzy/regular）
+            section: 分区筛选（daily/weekly/once）
+            tag: 标签筛选
             
         Returns:
             List[TaskDict]: 搜索结果列表
         """
         try:
-            if not keyword:
-                return self.get_tasks()
-            
-            # 获取所有未删除的任务
-            all_tasks = self.repository.get_tasks(include_deleted=False)
-            results = []
-            
-            for task in all_tasks:
-                # 检查标题、描述、要求、标签
-                title_match = self._match_text(task["title"], keyword, mode)
-                desc_match = self._match_text(task.get("description", ""), keyword, mode)
-                req_match = self._match_text(task.get("requirements", ""), keyword, mode)
-                
-                tag_match = False
-                for tag in task.get("tags", []):
-                    if self._match_text(tag, keyword, mode):
-                        tag_match = True
-                        break
-                
-                # 任何字段匹配则加入结果
-                if title_match or desc_match or req_match or tag_match:
-                    results.append(task)
+            key = self.search_cache.make_key(keyword, mode, section=section, tag=tag)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return cached
+            version = self.search_cache.current_version()
+            
+            results = self.repository.find_tasks(*self._compile_search(keyword, mode, section, tag))
             
+            self.search_cache.put(key, results, version)
             return results
             
         except DatabaseError as e:
@@ -616,4 +883,55 @@ class TaskManager(QObject):
             return []
         except Exception as e:
             logger.error(f"搜索任务失败: {e}")
+            return []
+    
+    def _compile_search(self, keyword: str, mode: str, section: Optional[str] = None,
+                        tag: Optional[str] = None) -> Tuple[List[str], List]:
+        """将关键词（查询语句）与分区、标签筛选编译为SQL条件"""
+        query = parse_query(keyword, mode)
+        if section:
+            query.terms.append(QueryTerm("section", TaskSection.from_str(section).value))
+        if tag:
+            query.terms.append(QueryTerm("tag", tag.strip()))
+        return compile_query(query, mode, self.repository.tag_cache.get_id)
+    
+    def search_ranked(self, keyword: str, mode: str = "fuzzy", limit: int = DEFAULT_TOP_K,
+                      section: Optional[str] = None, tag: Optional[str] = None) -> List[SearchHit]:
+        """
+        按相关度搜索任务（字段权重、创建时间、优先级打分，返回得分最高的 limit 个结果）
+        
+        筛选与 search_tasks 相同（查询语言编译为SQL），只为筛选出的任务打分。
+        
+        Args:
+            keyword: 搜索关键词或查询语句
+            mode: 搜索模式（fuzzy/regular）
+            limit: 结果数上限
+            section: 分区筛选（daily/weekly/once）
+            tag: 标签筛选
+            
+        Returns:
+            List[SearchHit]: 按得分从高到低排列的结果（含匹配位置）
+        """
+        try:
+            ranker = SearchRanker.from_settings()
+            key = self.search_cache.make_key(
+                keyword, mode, section=section, tag=tag, limit=limit, ranking=ranker.signature
+            )
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return cached
+            version = self.search_cache.current_version()
+            
+            tasks = self.search_tasks(keyword, mode, section=section, tag=tag)
+            matcher = Matcher.from_query(parse_query(keyword, mode), mode)
+            results = ranker.rank_filtered(tasks, matcher, limit)
+            
+            self.search_cache.put(key, results, version)
+            return results
+            
+        except DatabaseError as e:
+            logger.error(f"数据库搜索任务失败: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"按相关度搜索任务失败: {e}")
             return []
\ No newline at end of file
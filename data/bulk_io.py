@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+批量导入导出 - 以 JSON Lines / CSV 流式导出任务，分批 executemany 导入（内存占用恒定）
+"""
+
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data.database import get_connection
+from data.models import TaskSection
+from data.query_stats import query_stats, suspend_tracing
+from data.tag_cache import invalidate_tag_cache
+from utils.common import now_epoch, to_epoch_seconds, to_epoch_days
+from utils.logger import logger
+
+# 支持的格式
+FORMAT_JSONL = "jsonl"
+FORMAT_CSV = "csv"
+
+# 导出时每次从游标读取的行数 / 导入时每个事务写入的任务数
+EXPORT_FETCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 5000
+
+# 导出字段（顺序即 CSV 列顺序）
+TASK_FIELDS = [
+    "title", "description", "requirements", "priority", "section", "is_completed",
+    "created_at", "due_date", "completed_at", "reset_weekday", "reset_time",
+    "sort_order", "deleted_at",
+]
+EXPORT_FIELDS = TASK_FIELDS + ["tags"]
+
+# 整数存储的时间字段在导出文件中写为可读文本（本地时间 / ISO 日期），其余字段原样导出
+_EXPORT_COLUMN_SQL = {
+    "created_at": "datetime(t.created_at, 'unixepoch', 'localtime')",
+    "completed_at": "datetime(t.completed_at, 'unixepoch', 'localtime')",
+    "deleted_at": "datetime(t.deleted_at, 'unixepoch', 'localtime')",
+    "due_date": "date(t.due_date * 86400, 'unixepoch')",
+}
+
+# 批量写入语句（逐行跟踪已暂停，每批汇总记录一次）
+_INSERT_TASKS_SQL = (
+    f"INSERT INTO tasks (id, {', '.join(TASK_FIELDS)}) "
+    f"VALUES ({', '.join('?' * (len(TASK_FIELDS) + 1))})"
+)
+_INSERT_TASK_TAGS_SQL = "INSERT OR IGNORE INTO task_tags (task_id, tag_id) VALUES (?, ?)"
+_NEXT_TASK_ID_SQL = (
+    "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0), "
+    "COALESCE((SELECT MAX(id) FROM tasks), 0)) + 1"
+)
+
+# CSV 中多个标签的分隔符；GROUP_CONCAT 使用不会出现在标签名中的单元分隔符
+CSV_TAG_SEPARATOR = ";"
+_CONCAT_SEPARATOR = "\x1f"
+
+_VALID_SECTIONS = {section.value for section in TaskSection}
+
+
+def detect_format(path: str) -> str:
+    """根据扩展名判断格式（.csv 为 CSV，其余按 JSON Lines 处理）"""
+    return FORMAT_CSV if os.path.splitext(path)[1].lower() == ".csv" else FORMAT_JSONL
+
+
+# ========== 导出 ==========
+def iter_task_rows(db_path: str, include_deleted: bool = False) -> Iterator[Dict]:
+    """
+    逐行读取任务（含标签列表），游标分批读取，不一次性加载全部数据
+    
+    Args:
+        db_path: 数据库路径
+        include_deleted: 是否包含回收站中的任务
+    
+    Yields:
+        Dict: 任务字段 + tags
+    """
+    where = "" if include_deleted else "WHERE t.deleted_at IS NULL"
+    query = f"""
+        SELECT {", ".join(f"{_EXPORT_COLUMN_SQL.get(field, 't.' + field)} AS {field}" for field in TASK_FIELDS)},
+               GROUP_CONCAT(tg.name, '{_CONCAT_SEPARATOR}') AS tag_names
+        FROM tasks t
+        LEFT JOIN task_tags tt ON tt.task_id = t.id
+        LEFT JOIN tags tg ON tg.id = tt.tag_id
+        {where}
+        GROUP BY t.id
+        ORDER BY t.id
+    """
+    with get_connection(db_path) as conn:
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                task = {field: row[field] for field in TASK_FIELDS}
+                task["is_completed"] = bool(task["is_completed"])
+                task["tags"] = row["tag_names"].split(_CONCAT_SEPARATOR) if row["tag_names"] else []
+                yield task
+
+
+def export_tasks(db_path: str, path: str, fmt: Optional[str] = None,
+                 include_deleted: bool = False) -> int:
+    """
+    导出任务到文件
+    
+    Args:
+        db_path: 数据库路径
+        path: 目标文件路径
+        fmt: jsonl / csv（默认按扩展名判断）
+        include_deleted: 是否包含回收站中的任务
+    
+    Returns:
+        int: 导出的任务数
+    """
+    fmt = fmt or detect_format(path)
+    count = 0
+    partial_path = path + ".partial"
+    
+    with open(partial_path, "w", encoding="utf-8", newline="") as f:
+        if fmt == FORMAT_CSV:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for task in iter_task_rows(db_path, include_deleted):
+                task["is_completed"] = int(task["is_completed"])
+                task["tags"] = CSV_TAG_SEPARATOR.join(task["tags"])
+                writer.writerow(task)
+                count += 1
+        else:
+            for task in iter_task_rows(db_path, include_deleted):
+                f.write(json.dumps(task, ensure_ascii=False))
+                f.write("\n")
+                count += 1
+    
+    os.replace(partial_path, path)
+    logger.info(f"导出任务完成: {path}, 共{count}个任务")
+    return count
+
+
+# ========== 导入 ==========
+def _iter_records(path: str, fmt: str) -> Iterator[Optional[Dict]]:
+    """逐条读取源文件记录（无法解析的 JSON 行返回None，由调用方计为无效记录）"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == FORMAT_CSV:
+            for record in csv.DictReader(f):
+                tags = record.get("tags") or ""
+                record["tags"] = tags.split(CSV_TAG_SEPARATOR)
+                yield record
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+
+
+def _optional_text(value) -> Optional[str]:
+    """空字符串视为 NULL"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _optional_int(value) -> Optional[int]:
+    """空值视为 NULL，其余转换为整数"""
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _parse_bool(value) -> bool:
+    """解析布尔值（兼容 CSV 中的 0/1、true/false）"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def _normalize_record(record: Dict) -> Optional[Tuple[tuple, List[str]]]:
+    """
+    校验并转换一条记录
+    
+    Returns:
+        Optional[Tuple[tuple, List[str]]]: (任务字段参数, 标签名列表)，无效记录返回None
+    """
+    title = (record.get("title") or "").strip()
+    section = (record.get("section") or "").strip()
+    if not title or section not in _VALID_SECTIONS:
+        return None
+    
+    is_completed = _parse_bool(record.get("is_completed"))
+    priority = _optional_int(record.get("priority"))
+    reset_weekday = _optional_int(record.get("reset_weekday"))
+    if reset_weekday is not None and not 0 <= reset_weekday <= 6:
+        reset_weekday = None
+    
+    params = (
+        title,
+        record.get("description") or "",
+        record.get("requirements") or "",
+        1 if priority is None else priority,
+        section,
+        1 if is_completed else 0,
+        to_epoch_seconds(_optional_text(record.get("created_at"))) or now_epoch(),
+        to_epoch_days(_optional_text(record.get("due_date"))),
+        to_epoch_seconds(_optional_text(record.get("completed_at"))),
+        reset_weekday,
+        _optional_text(record.get("reset_time")),
+        _optional_int(record.get("sort_order")) or 0,
+        to_epoch_seconds(_optional_text(record.get("deleted_at"))),
+    )
+    
+    tags = record.get("tags") or []
+    tag_names = [name.strip() for name in tags if isinstance(name, str) and name.strip()]
+    return params, list(dict.fromkeys(tag_names))
+
+
+def import_tasks(db_path: str, path: str, fmt: Optional[str] = None) -> Dict[str, int]:
+    """
+    从文件导入任务（追加，不覆盖现有任务）
+    
+    边读边写：每 IMPORT_BATCH_SIZE 个任务一个事务；任务ID在事务内按自增序列顺延分配，
+    标签通过内存中的 名称->ID 映射解析，缺失的标签在同一事务中创建。
+    
+    Args:
+        db_path: 数据库路径
+        path: 源文件路径
+        fmt: jsonl / csv（默认按扩展名判断）
+    
+    Returns:
+        Dict[str, int]: imported（导入任务数）、skipped（无效记录数）、tags_created（新建标签数）
+    """
+    fmt = fmt or detect_format(path)
+    stats = {"imported": 0, "skipped": 0, "tags_created": 0}
+    
+    with get_connection(db_path) as conn:
+        tag_ids = {name: tag_id for tag_id, name in conn.execute("SELECT id, name FROM tags")}
+        batch: List[Tuple[tuple, List[str]]] = []
+        
+        for line_no, record in enumerate(_iter_records(path, fmt), start=1):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("无法解析" if record is None else "不是 JSON 对象")
+                normalized = _normalize_record(record)
+            except (TypeError, ValueError, AttributeError) as e:
+                logger.warning(f"导入第{line_no}条记录无效: {e}")
+                normalized = None
+            
+            if normalized is None:
+                stats["skipped"] += 1
+                continue
+            
+            batch.append(normalized)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _write_batch(conn, batch, tag_ids, stats)
+                batch.clear()
+        
+        if batch:
+            _write_batch(conn, batch, tag_ids, stats)
+    
+    # 标签直接写入了 tags 表，仓库共享的标签缓存需重新加载
+    if stats["tags_created"]:
+        invalidate_tag_cache(db_path)
+    
+    logger.info(
+        f"导入任务完成: {path}, 导入{stats['imported']}个任务, "
+        f"跳过{stats['skipped']}条无效记录, 新建{stats['tags_created']}个标签"
+    )
+    return stats
+
+
+def _write_batch(conn, batch: List[Tuple[tuple, List[str]]], tag_ids: Dict[str, int],
+                 stats: Dict[str, int]):
+    """在一个事务中写入一批任务及其标签关联"""
+    conn.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    try:
+        # 按 AUTOINCREMENT 的序列顺延分配ID（不复用已永久删除任务的ID，撤销记录等按ID引用的状态
+        # 不会指向导入的任务）；插入更大的显式ID时 SQLite 在同一事务中更新 sqlite_sequence
+        next_id = conn.execute(_NEXT_TASK_ID_SQL).fetchone()[0]
+        
+        task_rows = []
+        links = []
+        for offset, (params, tag_names) in enumerate(batch):
+            task_id = next_id + offset
+            task_rows.append((task_id,) + params)
+            for name in tag_names:
+                tag_id = tag_ids.get(name)
+                if tag_id is None:
+                    tag_id = conn.execute("INSERT INTO tags (name) VALUES (?)", (name,)).lastrowid
+                    tag_ids[name] = tag_id
+                    stats["tags_created"] += 1
+                links.append((task_id, tag_id))
+        
+        with suspend_tracing(conn):
+            conn.executemany(_INSERT_TASKS_SQL, task_rows)
+            conn.executemany(_INSERT_TASK_TAGS_SQL, links)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    query_stats.record(_INSERT_TASKS_SQL, (time.perf_counter() - start) * 1000, len(task_rows))
+    stats["imported"] += len(batch)
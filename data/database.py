@@ -1,9 +1,106 @@
 import sqlite3
 import os
+import re
+import threading
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Callable
 from utils.logger import logger
+from utils.startup_profiler import startup_profiler
 from utils.exceptions import DatabaseError
+from data.query_stats import TracedConnection, install_tracer, close_tracer
+
+# PRAGMA auto_vacuum 取值：2 = INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+# 进程内数据版本号：每次提交了修改的连接关闭前递增（供结果缓存判断数据是否变化）
+_write_version = 0
+_write_version_lock = threading.Lock()
+
+# 计数器键：按分区和完成状态统计未删除任务，回收站单独计数
+COUNTER_DELETED_KEY = "tasks.deleted"
+COUNTER_KEYS = [
+    f"tasks.{section}.{status}"
+    for section in ("daily", "weekly", "once")
+    for status in ("pending", "completed")
+] + [COUNTER_DELETED_KEY]
+
+# 任务行所属计数器键的SQL表达式（{row} 为 NEW 或 OLD）
+_COUNTER_KEY_SQL = (
+    "CASE WHEN {row}.deleted_at IS NOT NULL THEN '" + COUNTER_DELETED_KEY + "' "
+    "ELSE 'tasks.' || {row}.section || "
+    "CASE WHEN {row}.is_completed = 0 THEN '.pending' ELSE '.completed' END END"
+)
+
+# 任务表结构（时间字段为整数：created_at/completed_at/deleted_at 为 Unix 秒，due_date 为 epoch days）
+_TASKS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        requirements TEXT DEFAULT '',
+        priority INTEGER DEFAULT 1,
+        section TEXT NOT NULL CHECK(section IN ('daily', 'weekly', 'once')),
+        is_completed BOOLEAN DEFAULT 0,
+        created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        due_date INTEGER,
+        completed_at INTEGER,
+        reset_weekday INTEGER CHECK(reset_weekday BETWEEN 0 AND 6),
+        reset_time TEXT,
+        sort_order INTEGER DEFAULT 0,
+        deleted_at INTEGER
+    )
+"""
+
+# 旧数据库时间字段（ISO 文本，本地时间）换算为整数的SQL表达式
+_EPOCH_SECONDS_SQL = (
+    "CASE WHEN typeof({col}) IN ('integer', 'real') THEN CAST({col} AS INTEGER) "
+    "WHEN {col} IS NULL OR {col} = '' THEN NULL "
+    "ELSE CAST(strftime('%s', {col}, 'utc') AS INTEGER) END"
+)
+_EPOCH_DAYS_SQL = (
+    "CASE WHEN typeof({col}) IN ('integer', 'real') THEN CAST({col} AS INTEGER) "
+    "WHEN {col} IS NULL OR {col} = '' THEN NULL "
+    "ELSE CAST(strftime('%s', date({col})) AS INTEGER) / 86400 END"
+)
+
+# 维护计数器与标签任务数的触发器（级联删除 task_tags 时同样会触发）
+COUNTER_TRIGGERS = {
+    "trg_tasks_counter_insert": f"""
+        AFTER INSERT ON tasks BEGIN
+            UPDATE counters SET value = value + 1 WHERE key = {_COUNTER_KEY_SQL.format(row="NEW")};
+        END
+    """,
+    "trg_tasks_counter_delete": f"""
+        AFTER DELETE ON tasks BEGIN
+            UPDATE counters SET value = value - 1 WHERE key = {_COUNTER_KEY_SQL.format(row="OLD")};
+        END
+    """,
+    "trg_tasks_counter_update": f"""
+        AFTER UPDATE OF section, is_completed, deleted_at ON tasks
+        WHEN {_COUNTER_KEY_SQL.format(row="OLD")} IS NOT {_COUNTER_KEY_SQL.format(row="NEW")}
+        BEGIN
+            UPDATE counters SET value = value - 1 WHERE key = {_COUNTER_KEY_SQL.format(row="OLD")};
+            UPDATE counters SET value = value + 1 WHERE key = {_COUNTER_KEY_SQL.format(row="NEW")};
+        END
+    """,
+    "trg_task_tags_count_insert": """
+        AFTER INSERT ON task_tags BEGIN
+            UPDATE tags SET task_count = task_count + 1 WHERE id = NEW.tag_id;
+        END
+    """,
+    "trg_task_tags_count_delete": """
+        AFTER DELETE ON task_tags BEGIN
+            UPDATE tags SET task_count = task_count - 1 WHERE id = OLD.tag_id;
+        END
+    """,
+    "trg_task_tags_count_update": """
+        AFTER UPDATE OF tag_id ON task_tags WHEN OLD.tag_id IS NOT NEW.tag_id BEGIN
+            UPDATE tags SET task_count = task_count - 1 WHERE id = OLD.tag_id;
+            UPDATE tags SET task_count = task_count + 1 WHERE id = NEW.tag_id;
+        END
+    """,
+}
 
 
 @contextmanager
@@ -28,14 +125,18 @@ def get_connection(db_path: str = "data.db"):
             os.makedirs(dir_path, exist_ok=True)
         
         # 创建连接
-        conn = sqlite3.connect(db_path)
+        conn = sqlite3.connect(db_path, factory=TracedConnection)
+        install_tracer(conn, db_path)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON")
+        conn.create_function("regexp", 2, _sqlite_regexp)  # 支持 "列 REGEXP ?"（正则搜索）
         
         logger.debug(f"数据库连接已建立: {db_path}")
         yield conn
         
         conn.commit()
+        if conn.total_changes:
+            _bump_write_version()
     except sqlite3.Error as e:
         if conn:
             conn.rollback()
@@ -43,47 +144,82 @@ def get_connection(db_path: str = "data.db"):
         raise DatabaseError(str(e)) from e
     finally:
         if conn:
+            close_tracer(conn)
             conn.close()
             logger.debug(f"数据库连接已关闭: {db_path}")
 
 
+@lru_cache(maxsize=64)
+def _compile_regexp(pattern: str) -> Optional[re.Pattern]:
+    """编译正则表达式（忽略大小写；无效返回None）"""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return None
+
+
+def _sqlite_regexp(pattern: Optional[str], value: Optional[str]) -> bool:
+    """
+    SQLite REGEXP 函数（X REGEXP Y 调用 regexp(Y, X)）
+    
+    与界面正则搜索一致：忽略大小写，表达式无效时按子串匹配（不区分大小写）。
+    """
+    if not pattern or value is None:
+        return False
+    compiled = _compile_regexp(pattern)
+    if compiled is None:
+        return pattern.lower() in value.lower()
+    return compiled.search(value) is not None
+
+
+def _bump_write_version():
+    """递增进程内数据版本号"""
+    global _write_version
+    with _write_version_lock:
+        _write_version += 1
+
+
+def get_write_version() -> int:
+    """
+    获取进程内数据版本号
+    
+    本进程通过 get_connection 提交的每次修改都会使其递增；其他进程的写入不会体现在这里，
+    需要时配合 PRAGMA data_version 判断。
+    """
+    return _write_version
+
+
 def init_database(db_path: str = "data.db") -> bool:
     """初始化数据库表结构（优化索引和初始数据）"""
     try:
         with get_connection(db_path) as conn:
             cursor = conn.cursor()
             
+            # 启用增量回收（需在建表/写入前设置；旧数据库由维护调度在空闲时转换）
+            with startup_profiler.phase("migrations.auto_vacuum"):
+                _migrate_auto_vacuum(conn)
+            
             # 任务表（优化字段约束）
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT DEFAULT '',
-                    requirements TEXT DEFAULT '',
-                    priority INTEGER DEFAULT 1,
-                    section TEXT NOT NULL CHECK(section IN ('daily', 'weekly', 'once')),
-                    is_completed BOOLEAN DEFAULT 0,
-                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    due_date DATE,
-                    completed_at TIMESTAMP,
-                    reset_weekday INTEGER CHECK(reset_weekday BETWEEN 0 AND 6),
-                    reset_time TEXT,
-                    sort_order INTEGER DEFAULT 0,
-                    deleted_at TIMESTAMP
-                )
-            """)
+            cursor.execute(_TASKS_TABLE_SQL.format(name="tasks"))
             
             # 数据库迁移：为旧数据库添加新字段
-            _migrate_add_column(cursor, "tasks", "requirements", "TEXT DEFAULT ''")
-            _migrate_add_column(cursor, "tasks", "priority", "INTEGER DEFAULT 1")
+            with startup_profiler.phase("migrations.schema"):
+                _migrate_add_column(cursor, "tasks", "requirements", "TEXT DEFAULT ''")
+                _migrate_add_column(cursor, "tasks", "priority", "INTEGER DEFAULT 1")
             
-            # 标签表（唯一索引优化）
+            # 数据库迁移：时间字段由 ISO 文本改为整数（重建任务表，触发器与索引随后重新创建）
+            with startup_profiler.phase("migrations.epoch_timestamps"):
+                _migrate_epoch_timestamps(conn)
+            
+            # 标签表（唯一索引优化；task_count 由触发器维护）
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS tags (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL
+                    name TEXT UNIQUE NOT NULL,
+                    task_count INTEGER NOT NULL DEFAULT 0
                 )
             """)
+            tag_count_added = _migrate_add_column(cursor, "tags", "task_count", "INTEGER NOT NULL DEFAULT 0")
             
             # 任务-标签关联表（优化外键级联）
             cursor.execute("""
@@ -104,20 +240,70 @@ def init_database(db_path: str = "data.db") -> bool:
                 )
             """)
             
+            # 智能视图表（保存的搜索查询，语法见 core.search_query）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS saved_views (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    query TEXT NOT NULL DEFAULT '',
+                    sort_order INTEGER NOT NULL DEFAULT 0,
+                    created_at INTEGER
+                )
+            """)
+            
+            # 命令日志表（撤销/重做，环形缓冲：只保留最近的若干条，见 core.command_journal）
+            # undo_ops/redo_ops 为 JSON 编码的逆操作与正向操作，size 为两者的字节数；undone=1 表示已撤销、可重做
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS command_journal (
+                    id INTEGER PRIMARY KEY,
+                    label TEXT NOT NULL,
+                    undo_ops TEXT NOT NULL,
+                    redo_ops TEXT NOT NULL,
+                    undone INTEGER NOT NULL DEFAULT 0,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    created_at INTEGER
+                )
+            """)
+            
+            # 统计计数器表（由触发器维护，统计查询直接读取）
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counters'")
+            counters_exist = cursor.fetchone() is not None
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.executemany(
+                "INSERT OR IGNORE INTO counters (key, value) VALUES (?, 0)",
+                [(key,) for key in COUNTER_KEYS]
+            )
+            
+            for trigger_name, trigger_body in COUNTER_TRIGGERS.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {trigger_body}")
+            
+            # 旧数据库：按现有数据回填计数器
+            if not counters_exist or tag_count_added:
+                with startup_profiler.phase("migrations.counters"):
+                    rebuild_counters(cursor)
+            
             # 初始数据（原子操作）
+            # 注：用户配置统一存放在 config.json，app_state 只保存运行时状态
             cursor.execute("""
                 INSERT OR IGNORE INTO app_state (key, value) VALUES 
-                    ('daily_reset_time', '06:00'),
-                    ('last_daily_reset', ''),
-                    ('recycle_bin_capacity', '100')
+                    ('last_daily_reset', '')
             """)
             
             # 优化索引（减少冗余索引）
             indexes = [
                 ("idx_tasks_section_deleted", "tasks(section, deleted_at)"),
                 ("idx_tasks_completed", "tasks(is_completed)"),
+                ("idx_tasks_deleted_at", "tasks(deleted_at)"),  # 回收站排序与清理
                 ("idx_tasks_created_sort", "tasks(sort_order, created_at)"),
                 ("idx_tasks_priority", "tasks(priority)"),
+                # 未完成特殊任务的截止日期（逾期统计为整数比较）
+                ("idx_tasks_due_open", "tasks(due_date) WHERE section = 'once' AND is_completed = 0 "
+                                       "AND deleted_at IS NULL AND due_date IS NOT NULL"),
                 ("idx_task_tags_task", "task_tags(task_id)"),
                 ("idx_task_tags_tag", "task_tags(tag_id)"),
                 ("idx_tags_name", "tags(name)")  # 加速标签查询
@@ -134,8 +320,8 @@ def init_database(db_path: str = "data.db") -> bool:
         return False
 
 
-def _migrate_add_column(cursor, table: str, column: str, definition: str):
-    """数据库迁移：安全添加新列"""
+def _migrate_add_column(cursor, table: str, column: str, definition: str) -> bool:
+    """数据库迁移：安全添加新列（返回是否新添加）"""
     try:
         # 检查列是否存在
         cursor.execute(f"PRAGMA table_info({table})")
@@ -144,17 +330,122 @@ def _migrate_add_column(cursor, table: str, column: str, definition: str):
         if column not in columns:
             cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
             logger.info(f"数据库迁移：添加列 {table}.{column}")
+            return True
     except Exception as e:
         logger.warning(f"添加列 {table}.{column} 失败: {e}")
+    return False
+
+
+def _migrate_epoch_timestamps(conn) -> bool:
+    """
+    数据库迁移：时间字段由 ISO 文本改为整数（返回是否执行了迁移）
+    
+    按 SQLite 推荐的方式重建任务表：关闭外键约束，新表复制并换算数据后替换旧表，
+    检查外键后恢复约束。DROP TABLE 不会触发触发器，计数器无需回填。
+    """
+    try:
+        columns = {row[1]: (row[2] or "").upper() for row in conn.execute("PRAGMA table_info(tasks)")}
+        if columns.get("created_at") == "INTEGER":
+            return False
+        
+        # 外键开关不能在事务中修改
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            conn.execute("BEGIN")
+            conn.execute("DROP TABLE IF EXISTS tasks_new")
+            conn.execute(_TASKS_TABLE_SQL.format(name="tasks_new"))
+            conn.execute(f"""
+                INSERT INTO tasks_new (
+                    id, title, description, requirements, priority, section, is_completed,
+                    created_at, due_date, completed_at, reset_weekday, reset_time, sort_order, deleted_at
+                )
+                SELECT
+                    id, title, description, requirements, priority, section, is_completed,
+                    COALESCE({_EPOCH_SECONDS_SQL.format(col="created_at")}, CAST(strftime('%s', 'now') AS INTEGER)),
+                    {_EPOCH_DAYS_SQL.format(col="due_date")},
+                    {_EPOCH_SECONDS_SQL.format(col="completed_at")},
+                    reset_weekday, reset_time, sort_order,
+                    {_EPOCH_SECONDS_SQL.format(col="deleted_at")}
+                FROM tasks
+            """)
+            conn.execute("DROP TABLE tasks")
+            conn.execute("ALTER TABLE tasks_new RENAME TO tasks")
+            
+            violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if violations:
+                raise sqlite3.IntegrityError(f"外键检查失败: {len(violations)}条")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON")
+        
+        logger.info("数据库迁移：任务时间字段已转换为整数存储")
+        return True
+    except Exception as e:
+        logger.warning(f"转换任务时间字段失败: {e}")
+        return False
 
 
-def execute_query(query: str, params: tuple = (), db_path: str = "data.db") -> List[Dict[str, Any]]:
-    """执行查询语句（优化结果转换）"""
+def _migrate_auto_vacuum(conn):
+    """
+    数据库迁移：新数据库直接使用 auto_vacuum=INCREMENTAL，使空闲页可以被增量回收
+    
+    已有数据的数据库需 VACUUM 重建整个文件后模式才生效，不在启动时执行，
+    由维护调度在空闲时于后台线程转换（见 TaskRepository.enable_incremental_vacuum）。
+    """
+    try:
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode == AUTO_VACUUM_INCREMENTAL:
+            return
+        
+        has_tables = conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is not None
+        if not has_tables:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    except Exception as e:
+        logger.warning(f"启用增量回收失败: {e}")
+
+
+def rebuild_counters(cursor) -> None:
+    """按现有数据重新计算统计计数器和标签任务数（迁移及修复时使用）"""
+    cursor.execute(f"""
+        UPDATE counters SET value = (
+            SELECT COUNT(*) FROM tasks WHERE {_COUNTER_KEY_SQL.format(row="tasks")} = counters.key
+        )
+    """)
+    cursor.execute("""
+        UPDATE tags SET task_count = (
+            SELECT COUNT(*) FROM task_tags WHERE task_tags.tag_id = tags.id
+        )
+    """)
+    logger.info("数据库迁移：已回填统计计数器")
+
+
+def tuple_row(cursor, row: tuple) -> tuple:
+    """行工厂：保留原始元组（只需按位置取值的大批量查询使用）"""
+    return row
+
+
+def execute_query(query: str, params: tuple = (), db_path: str = "data.db",
+                  row_factory: Optional[Callable] = None) -> List[Any]:
+    """
+    执行查询语句（优化结果转换）
+    
+    Args:
+        row_factory: 自定义行工厂（如 TaskRecord.from_row），指定时直接返回其构造的对象，
+            不再转换为字典
+    """
     try:
         with get_connection(db_path) as conn:
             cursor = conn.cursor()
+            if row_factory is not None:
+                cursor.row_factory = row_factory
             cursor.execute(query, params)
             results = cursor.fetchall()
+            if row_factory is not None:
+                return results
             return [dict(row) for row in results]
     except DatabaseError:
         return []
@@ -1,8 +1,14 @@
+import sys
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
 from datetime import datetime, date
+from operator import itemgetter
 from typing import Optional, List
 from enum import Enum
-from utils.common import safe_isoformat, safe_parse_isoformat
+from utils.common import (
+    parse_datetime, parse_date, to_epoch_seconds, to_epoch_days,
+    from_epoch_seconds, from_epoch_days, today_epoch_days
+)
 
 
 class TaskSection(str, Enum):
@@ -40,7 +46,7 @@ class Task:
     tags: List[str] = field(default_factory=list)
 
     def to_dict(self) -> dict:
-        """转换为数据库存储字典"""
+        """转换为数据库存储字典（时间为 Unix 秒，日期为 epoch days）"""
         return {
             "id": self.id,
             "title": self.title.strip(),
@@ -49,23 +55,23 @@ class Task:
             "priority": self.priority,
             "section": self.section.value,
             "is_completed": 1 if self.is_completed else 0,
-            "created_at": safe_isoformat(self.created_at),
-            "due_date": safe_isoformat(self.due_date),
-            "completed_at": safe_isoformat(self.completed_at),
+            "created_at": to_epoch_seconds(self.created_at),
+            "due_date": to_epoch_days(self.due_date),
+            "completed_at": to_epoch_seconds(self.completed_at),
             "reset_weekday": self.reset_weekday,
             "reset_time": self.reset_time,
             "sort_order": self.sort_order,
-            "deleted_at": safe_isoformat(self.deleted_at)
+            "deleted_at": to_epoch_seconds(self.deleted_at)
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Task':
-        """从字典创建实例（优化日期解析）"""
+        """从字典创建实例（日期字段可为对象、ISO字符串或存储用的整数）"""
         # 日期字段解析
-        created_at = safe_parse_isoformat(data.get("created_at")) or datetime.now()
-        due_date = safe_parse_isoformat(data.get("due_date"), is_date=True)
-        completed_at = safe_parse_isoformat(data.get("completed_at"))
-        deleted_at = safe_parse_isoformat(data.get("deleted_at"))
+        created_at = parse_datetime(data.get("created_at")) or datetime.now()
+        due_date = parse_date(data.get("due_date"))
+        completed_at = parse_datetime(data.get("completed_at"))
+        deleted_at = parse_datetime(data.get("deleted_at"))
 
         # 分区解析
         section = TaskSection.from_str(data.get("section", ""))
@@ -111,6 +117,174 @@ class Task:
         return max(delta.days, 0) if delta.days < 0 else delta.days
 
 
+# tasks 表字段（TaskRecord 的槽位顺序）
+TASK_FIELDS = (
+    "id", "title", "description", "requirements", "priority", "section", "is_completed",
+    "created_at", "due_date", "completed_at", "reset_weekday", "reset_time", "sort_order", "deleted_at",
+)
+
+# 取值范围小、大量重复的字段（驻留后所有任务共享同一个字符串对象）
+_INTERNED_FIELDS = frozenset({"section", "reset_time"})
+
+# 整数存储的时间字段：读取时换算为 datetime/date（换算结果有缓存），写入时换算回整数
+_DECODERS = {
+    "created_at": from_epoch_seconds,
+    "completed_at": from_epoch_seconds,
+    "deleted_at": from_epoch_seconds,
+    "due_date": from_epoch_days,
+}
+_FALLBACK_DECODERS = {
+    "created_at": parse_datetime,
+    "completed_at": parse_datetime,
+    "deleted_at": parse_datetime,
+    "due_date": parse_date,
+}
+_ENCODERS = {
+    "created_at": to_epoch_seconds,
+    "completed_at": to_epoch_seconds,
+    "deleted_at": to_epoch_seconds,
+    "due_date": to_epoch_days,
+}
+
+# 行工厂的列布局缓存：(cursor.description, 取值函数, 额外列名)；同一语句的所有行共用同一个 description 对象
+_row_layout = (None, None, ())
+
+
+class TaskRecord(MutableMapping):
+    """
+    紧凑的任务记录（读取路径使用，替代每行一个字典）
+
+    使用 __slots__ 存储固定字段，重复出现的字符串驻留共享；同时实现字典接口
+    （task["title"]、task.get()、update()、dict(task) 等），现有界面代码无需修改。
+
+    时间字段以整数保存（属性访问得到原始整数，可直接比较排序）；通过字典接口读取时
+    才换算为 datetime/date。
+    """
+
+    __slots__ = TASK_FIELDS + ("tags", "_extra")
+
+    def __init__(self, id=None, title="", description="", requirements="", priority=1, section="daily",
+                 is_completed=0, created_at=None, due_date=None, completed_at=None, reset_weekday=None,
+                 reset_time=None, sort_order=0, deleted_at=None, tags=()):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.requirements = requirements
+        self.priority = priority
+        self.section = sys.intern(section) if section else section
+        self.is_completed = is_completed
+        self.created_at = created_at
+        self.due_date = due_date
+        self.completed_at = completed_at
+        self.reset_weekday = reset_weekday
+        self.reset_time = sys.intern(reset_time) if reset_time else reset_time
+        self.sort_order = sort_order
+        self.deleted_at = deleted_at
+        self.tags = tags
+        self._extra = None
+
+    @classmethod
+    def from_row(cls, cursor, row: tuple) -> 'TaskRecord':
+        """sqlite3 行工厂：按列名直接构造记录（查询中的非任务字段保存为额外键）"""
+        global _row_layout
+        layout = _row_layout
+        description = cursor.description
+        if layout[0] is not description:
+            layout = _row_layout = _build_row_layout(description)
+
+        record = cls(*layout[1](row + (None,)))
+        if layout[2]:
+            record._extra = {name: row[index] for index, name in layout[2]}
+        return record
+
+    def _decoded(self, key: str):
+        """读取字段；时间字段按需换算"""
+        value = getattr(self, key)
+        if value is None or key not in _DECODERS:
+            return value
+        if type(value) is int:
+            return _DECODERS[key](value)
+        return _FALLBACK_DECODERS[key](value)
+
+    def days_until_due(self, today: Optional[int] = None) -> Optional[int]:
+        """距截止日期的天数（整数运算，无需解析日期；负数表示已过期）"""
+        if type(self.due_date) is not int:
+            return None
+        return self.due_date - (today_epoch_days() if today is None else today)
+
+    # ========== 字典接口 ==========
+    def __getitem__(self, key: str):
+        if key in _RECORD_KEY_SET:
+            return self._decoded(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in _RECORD_KEY_SET:
+            if key in _ENCODERS:
+                value = _ENCODERS[key](value)
+            elif key in _INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        yield from _RECORD_KEYS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(_RECORD_KEYS) + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key) -> bool:
+        return key in _RECORD_KEY_SET or (self._extra is not None and key in self._extra)
+
+    def get(self, key: str, default=None):
+        if key in _RECORD_KEY_SET:
+            return self._decoded(key)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def copy(self) -> 'TaskRecord':
+        """浅拷贝（标签列表单独复制）"""
+        record = TaskRecord(*(getattr(self, name) for name in TASK_FIELDS), tags=list(self.tags))
+        if self._extra:
+            record._extra = dict(self._extra)
+        return record
+
+    def to_dict(self) -> dict:
+        """转换为普通字典"""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"TaskRecord(id={self.id!r}, title={self.title!r}, section={self.section!r})"
+
+
+# 记录对外暴露的键（字段 + tags；元组用于保持迭代顺序，集合用于查找）
+_RECORD_KEYS = TASK_FIELDS + ("tags",)
+_RECORD_KEY_SET = frozenset(_RECORD_KEYS)
+
+
+def _build_row_layout(description) -> tuple:
+    """根据查询列生成取值函数：按 TASK_FIELDS 顺序取值，缺失的字段取补在行尾的 None"""
+    columns = [column[0] for column in description]
+    missing = len(columns)
+    indexes = [columns.index(name) if name in columns else missing for name in TASK_FIELDS]
+    extra = tuple((index, name) for index, name in enumerate(columns) if name not in TASK_FIELDS)
+    return description, itemgetter(*indexes), extra
+
+
 @dataclass
 class Tag:
     """标签数据模型"""
@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+"""
+SQL执行统计模块 - 在游标执行与读取结果的调用前后计时，记录语句耗时、影响行数和慢查询
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+from utils.logger import logger, get_log_manager
+
+# 延迟直方图桶上界（毫秒），最后一桶为溢出桶
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# 默认慢查询阈值（毫秒）
+DEFAULT_SLOW_THRESHOLD_MS = 50
+
+# 最近调用记录数
+RECENT_CALLS_SIZE = 200
+
+# 最多统计的不同语句数（防止拼接SQL导致无限增长）
+MAX_STATEMENTS = 500
+
+# 慢查询日志文件名（位于会话日志目录）
+SLOW_QUERY_LOG = "slow_queries.log"
+
+# 不做执行计划分析的语句前缀
+_NO_EXPLAIN_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "SAVEPOINT", "RELEASE", "EXPLAIN")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """
+    归一化SQL：字面量替换为 ?，IN 列表折叠，空白压缩
+    
+    Args:
+        sql: 原始SQL（参数为占位符，同一语句命中缓存；拼接进SQL的字面量同样替换）
+    
+    Returns:
+        str: 归一化后的SQL
+    """
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class StatementStats:
+    """单条归一化语句的累计统计"""
+    
+    __slots__ = ("sql", "count", "total_ms", "max_ms", "rows", "buckets")
+    
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    
+    def add(self, elapsed_ms: float, rows: int):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(rows, 0)
+        
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+    
+    def percentile(self, fraction: float) -> float:
+        """按直方图估算分位数（取所在桶上界）"""
+        if not self.count:
+            return 0.0
+        
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "histogram": dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["overflow"], self.buckets)),
+        }
+
+
+class QueryStats:
+    """SQL执行统计（进程内全局，线程安全）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements: Dict[str, StatementStats] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_CALLS_SIZE)
+        self._slow_count = 0
+        self._slow_logger = None
+        self.enabled = True
+        self.slow_threshold_ms = DEFAULT_SLOW_THRESHOLD_MS
+    
+    # ========== 配置 ==========
+    def set_enabled(self, enabled: bool):
+        """启用/停用统计（只影响之后新建的连接）"""
+        self.enabled = bool(enabled)
+    
+    def set_slow_threshold(self, threshold_ms: float):
+        """设置慢查询阈值（毫秒）"""
+        if threshold_ms and threshold_ms > 0:
+            self.slow_threshold_ms = threshold_ms
+    
+    # ========== 记录 ==========
+    def record(self, sql: str, elapsed_ms: float, rows: int = -1,
+               params: Optional[tuple] = None) -> bool:
+        """
+        记录一次语句执行
+        
+        Returns:
+            bool: 是否超过慢查询阈值
+        """
+        normalized = normalize_sql(sql)
+        is_slow = elapsed_ms >= self.slow_threshold_ms
+        
+        with self._lock:
+            stats = self._statements.get(normalized)
+            if stats is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    normalized = "<other>"
+                    stats = self._statements.setdefault(normalized, StatementStats(normalized))
+                else:
+                    stats = self._statements[normalized] = StatementStats(normalized)
+            stats.add(elapsed_ms, rows)
+            
+            self._recent.append({
+                "time": time.time(),
+                "sql": normalized,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "rows": rows,
+                "thread": threading.current_thread().name,
+            })
+            if is_slow:
+                self._slow_count += 1
+        
+        return is_slow
+    
+    def log_slow_query(self, sql: str, elapsed_ms: float, rows: int,
+                       params: Optional[tuple], plan: List[str], db_path: str):
+        """写入慢查询日志（会话目录下的 slow_queries.log）"""
+        try:
+            if self._slow_logger is None:
+                self._slow_logger = get_log_manager().get_file_logger("slow_query", SLOW_QUERY_LOG)
+            
+            lines = [
+                f"慢查询 {elapsed_ms:.1f} ms（阈值 {self.slow_threshold_ms} ms） db={db_path} rows={rows} "
+                f"thread={threading.current_thread().name}",
+                f"  SQL: {_WHITESPACE.sub(' ', sql).strip()}",
+            ]
+            if params:
+                lines.append(f"  参数: {params!r}")
+            if plan:
+                lines.append("  执行计划:")
+                lines.extend(f"    {line}" for line in plan)
+            self._slow_logger.warning("\n".join(lines))
+        except Exception as e:
+            logger.error(f"写入慢查询日志失败: {e}")
+    
+    # ========== 读取 ==========
+    def snapshot(self, order_by: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        获取按语句聚合的统计
+        
+        Args:
+            order_by: 排序字段（total_ms/count/max_ms/mean_ms）
+            limit: 返回条数
+        """
+        with self._lock:
+            items = [stats.to_dict() for stats in self._statements.values()]
+        
+        items.sort(key=lambda item: item.get(order_by, 0), reverse=True)
+        return items[:limit] if limit else items
+    
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """获取最近的语句调用（新的在后）"""
+        with self._lock:
+            calls = list(self._recent)
+        return calls[-limit:]
+    
+    def summary(self) -> Dict[str, Any]:
+        """获取总体统计"""
+        with self._lock:
+            total_count = sum(stats.count for stats in self._statements.values())
+            total_ms = sum(stats.total_ms for stats in self._statements.values())
+            return {
+                "statements": len(self._statements),
+                "calls": total_count,
+                "total_ms": round(total_ms, 3),
+                "slow_calls": self._slow_count,
+                "slow_threshold_ms": self.slow_threshold_ms,
+            }
+    
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._statements.clear()
+            self._recent.clear()
+            self._slow_count = 0
+    
+    def format_report(self, limit: int = 20) -> str:
+        """生成文本报告（供命令行或日志输出）"""
+        summary = self.summary()
+        lines = [
+            f"SQL统计: {summary['calls']} 次调用, {summary['statements']} 条语句, "
+            f"总耗时 {summary['total_ms']:.1f} ms, 慢查询 {summary['slow_calls']} 次",
+            f"{'次数':>8} {'总计ms':>10} {'平均ms':>8} {'p95ms':>8} {'最大ms':>8} {'行数':>8}  SQL",
+        ]
+        for item in self.snapshot(limit=limit):
+            lines.append(
+                f"{item['count']:>8} {item['total_ms']:>10.1f} {item['mean_ms']:>8.2f} "
+                f"{item['p95_ms']:>8.2f} {item['max_ms']:>8.2f} {item['rows']:>8}  {item['sql'][:120]}"
+            )
+        return "\n".join(lines)
+
+
+# 全局统计实例
+query_stats = QueryStats()
+
+
+class StatementTracer:
+    """
+    单个连接的语句跟踪器
+    
+    TracedCursor 在 execute/executemany、fetch* 与迭代每一步前后计时，语句耗时为这些调用的耗时之和，
+    不包含两次调用之间的调用方处理和事务提交。语句在结果读完、同一游标执行下一条语句
+    或连接关闭时结束并计入统计。
+    """
+    
+    def __init__(self, conn: sqlite3.Connection, db_path: str):
+        self._conn = conn
+        self._db_path = db_path
+        self._open: Dict[int, Dict[str, Any]] = {}  # 游标ID -> 未结束的语句
+        self._slow: List[Dict[str, Any]] = []
+        self.paused = False
+    
+    def begin(self, cursor: sqlite3.Cursor, sql: str, params: Any, elapsed_ms: float, rows: int,
+              plan_params: Any = None):
+        """语句执行完成（结束该游标上一条语句；没有结果集的语句直接结束）"""
+        self.finish(cursor)
+        entry = {
+            "sql": sql, "params": params, "plan_params": params if plan_params is None else plan_params,
+            "elapsed_ms": elapsed_ms, "rows": rows,
+        }
+        if cursor.description is None:
+            self._record(entry)
+        else:
+            entry["rows"] = 0
+            self._open[id(cursor)] = entry
+    
+    def fetched(self, cursor: sqlite3.Cursor, elapsed_ms: float, rows: int, exhausted: bool):
+        """从结果集读取了 rows 行；exhausted 表示结果已读完"""
+        entry = self._open.get(id(cursor))
+        if entry is None:
+            return
+        entry["elapsed_ms"] += elapsed_ms
+        entry["rows"] += rows
+        if exhausted:
+            self.finish(cursor)
+    
+    def finish(self, cursor: sqlite3.Cursor):
+        """结束游标上未结束的语句"""
+        entry = self._open.pop(id(cursor), None)
+        if entry is not None:
+            self._record(entry)
+        
+    def _record(self, entry: Dict[str, Any]):
+        if query_stats.record(entry["sql"], entry["elapsed_ms"], entry["rows"], entry["params"]):
+            self._slow.append(entry)
+    
+    def close(self):
+        """连接关闭前调用：结束所有语句并为慢查询生成执行计划"""
+        for entry in self._open.values():
+            self._record(entry)
+        self._open.clear()
+        if not self._slow:
+            return
+        
+        # 分析执行计划时不再跟踪
+        self.paused = True
+        for entry in self._slow:
+            plan = self._explain(entry["sql"], entry["plan_params"])
+            query_stats.log_slow_query(
+                entry["sql"], entry["elapsed_ms"], entry["rows"], entry["params"], plan, self._db_path
+            )
+        self._slow.clear()
+    
+    def _explain(self, sql: str, params: Any) -> List[str]:
+        """获取 EXPLAIN QUERY PLAN 输出（使用语句执行时的参数）"""
+        stripped = sql.lstrip().upper()
+        if stripped.startswith(_NO_EXPLAIN_PREFIXES):
+            return []
+        try:
+            rows = self._conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+            return [f"{row[0]}|{row[1]}| {row[3]}" for row in rows]
+        except sqlite3.Error as e:
+            return [f"（无法获取执行计划: {e}）"]
+
+
+class TracedCursor(sqlite3.Cursor):
+    """在执行与读取结果的调用前后计时的游标（由 TracedConnection 创建）"""
+    
+    def execute(self, sql, parameters=()):
+        tracer = self.connection.tracer
+        if tracer is None or tracer.paused:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        tracer.begin(self, sql, parameters, (time.perf_counter() - start) * 1000, self.rowcount)
+        return self
+    
+    def executemany(self, sql, seq_of_parameters):
+        tracer = self.connection.tracer
+        if tracer is None or tracer.paused or not isinstance(seq_of_parameters, (list, tuple)):
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        tracer.begin(
+            self, sql, (f"<{len(seq_of_parameters)} 组参数>",), (time.perf_counter() - start) * 1000,
+            self.rowcount, seq_of_parameters[0] if seq_of_parameters else ()
+        )
+        return self
+    
+    def fetchone(self):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().fetchone()
+        start = time.perf_counter()
+        row = super().fetchone()
+        tracer.fetched(self, (time.perf_counter() - start) * 1000, 0 if row is None else 1, row is None)
+        return row
+    
+    def fetchmany(self, size=None):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        tracer.fetched(self, (time.perf_counter() - start) * 1000, len(rows), not rows)
+        return rows
+    
+    def fetchall(self):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().fetchall()
+        start = time.perf_counter()
+        rows = super().fetchall()
+        tracer.fetched(self, (time.perf_counter() - start) * 1000, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().__next__()
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            tracer.fetched(self, (time.perf_counter() - start) * 1000, 0, True)
+            raise
+        tracer.fetched(self, (time.perf_counter() - start) * 1000, 1, False)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """带语句跟踪器的连接（用作 sqlite3.connect 的 factory）"""
+    
+    tracer: Optional[StatementTracer] = None
+    
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TracedCursor if self.tracer is not None else sqlite3.Cursor
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        tracer = self.tracer
+        if tracer is None or tracer.paused:
+            return super().executescript(sql_script)
+        start = time.perf_counter()
+        cursor = super().executescript(sql_script)
+        query_stats.record(sql_script, (time.perf_counter() - start) * 1000)
+        return cursor
+
+
+def install_tracer(conn: sqlite3.Connection, db_path: str):
+    """为连接安装跟踪回调（统计停用时不安装）"""
+    if not query_stats.enabled or not isinstance(conn, TracedConnection):
+        return
+    conn.tracer = StatementTracer(conn, db_path)
+
+
+def close_tracer(conn: sqlite3.Connection):
+    """连接关闭前结束跟踪"""
+    tracer = getattr(conn, "tracer", None)
+    if tracer is None:
+        return
+    try:
+        tracer.close()
+    except Exception as e:
+        logger.error(f"结束SQL跟踪失败: {e}")
+    finally:
+        conn.tracer = None
+
+
+@contextmanager
+def suspend_tracing(conn: sqlite3.Connection):
+    """
+    暂停语句跟踪（批量写入由调用方汇总计时）
+    
+    范围内的语句不计入统计，调用方可自行用 query_stats.record() 记录汇总结果。
+    """
+    tracer = getattr(conn, "tracer", None)
+    if tracer is None or tracer.paused:
+        yield
+        return
+    
+    tracer.paused = True
+    try:
+        yield
+    finally:
+        tracer.paused = False
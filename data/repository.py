@@ -1,13 +1,29 @@
+import json
+import os
+import time
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, date, timedelta
-from data.models import Task, Tag, AppState, TaskSection
+from data.models import Task, Tag, AppState, TaskSection, TaskRecord
 from data.database import (
     execute_query, execute_update, execute_many,
-    get_last_insert_id, get_connection
+    get_last_insert_id, get_connection, tuple_row, COUNTER_DELETED_KEY, AUTO_VACUUM_INCREMENTAL
 )
+from data.tag_cache import get_tag_cache
 from utils.logger import logger
-from utils.common import safe_isoformat, validate_weekday, escape_sql_in_list
-from utils.exceptions import TaskNotFoundError, TagNotFoundError, TaskRepositoryError
+from utils.common import (
+    validate_weekday, escape_sql_in_list, now_epoch, today_epoch_days,
+    to_epoch_seconds, to_epoch_days, SECONDS_PER_DAY
+)
+from utils.exceptions import TaskNotFoundError, TagNotFoundError, TaskRepositoryError, JournalConflictError
+
+
+# 回收站年龄分组（删除后的天数上限）：0=7天内，1=30天内，2=30天以上
+RECYCLE_AGE_BUCKET_DAYS = (7, 30)
+
+# 命令日志中可撤销/重做的任务列（id 只用于按原ID重新插入）
+JOURNAL_TASK_COLUMNS = (
+    "title", "description", "requirements", "priority", "section", "is_completed", "created_at",
+    "due_date", "completed_at", "reset_weekday", "reset_time", "sort_order", "deleted_at",
+)
 
 
 class TaskRepository:
@@ -15,6 +31,7 @@ class TaskRepository:
 
     def __init__(self, db_path: str = "data.db"):
         self.db_path = db_path
+        self.tag_cache = get_tag_cache(db_path)  # 同一数据库的仓库共享
 
     # ========== 任务操作 ==========
     def add_task(self, task_dict: Dict) -> int:
@@ -44,13 +61,13 @@ class TaskRepository:
                     task_dict.get("priority", 1),
                     task.section.value,
                     1 if task.is_completed else 0,
-                    safe_isoformat(task.created_at) or datetime.now().isoformat(),
-                    safe_isoformat(task.due_date),
-                    safe_isoformat(task.completed_at),
+                    to_epoch_seconds(task.created_at) or now_epoch(),
+                    to_epoch_days(task.due_date),
+                    to_epoch_seconds(task.completed_at),
                     task.reset_weekday,
                     task.reset_time,
                     task.sort_order,
-                    safe_isoformat(task.deleted_at)
+                    to_epoch_seconds(task.deleted_at)
                 )
 
                 cursor.execute(query, params)
@@ -95,7 +112,7 @@ class TaskRepository:
                 query = "SELECT * FROM tasks WHERE id = ?"
             else:
                 query = "SELECT * FROM tasks WHERE id = ? AND deleted_at IS NULL"
-            results = execute_query(query, (task_id,), self.db_path)
+            results = execute_query(query, (task_id,), self.db_path, row_factory=TaskRecord.from_row)
 
             if not results:
                 raise TaskNotFoundError(f"任务ID {task_id} 不存在")
@@ -134,11 +151,11 @@ class TaskRepository:
             # 标签筛选（JOIN优化）
             join_clause = ""
             if tag:
-                tag_id = self.get_tag_id(tag)
+                tag_id = self.tag_cache.get_id(tag.strip())
                 if not tag_id:
                     return []
-                join_clause = "JOIN task_tags tt ON t.id = tt.task_id JOIN tags tg ON tt.tag_id = tg.id"
-                conditions.append("tg.id = ?")
+                join_clause = "JOIN task_tags tt ON t.id = tt.task_id"
+                conditions.append("tt.tag_id = ?")
                 params.append(tag_id)
 
             # 构建最终查询
@@ -149,22 +166,31 @@ class TaskRepository:
                 ORDER BY t.sort_order ASC, t.created_at DESC
             """
 
-            tasks = execute_query(query, tuple(params), self.db_path)
+            tasks = execute_query(query, tuple(params), self.db_path, row_factory=TaskRecord.from_row)
+            return self._attach_tags(tasks)
 
-            # 批量获取标签（减少SQL查询次数）
-            task_ids = [task["id"] for task in tasks]
-            if task_ids:
-                tag_map = self._get_task_tags_batch(task_ids)
-                for task in tasks:
-                    task["tags"] = tag_map.get(task["id"], [])
-            else:
-                for task in tasks:
-                    task["tags"] = []
+        except Exception as e:
+            logger.error(f"获取任务列表失败: {e}")
+            return []
 
-            return tasks
+    def find_tasks(self, conditions: List[str], params: List) -> List[Dict]:
+        """
+        按SQL条件查找未删除的任务（条件中任务表别名为 t，见 core.search_query.compile_query）
 
+        全部筛选在一条参数化查询中完成，排序与 get_tasks 相同。
+        """
+        try:
+            where = " AND ".join(["t.deleted_at IS NULL"] + [f"({condition})" for condition in conditions])
+            query = f"""
+                SELECT t.*
+                FROM tasks t
+                WHERE {where}
+                ORDER BY t.sort_order ASC, t.created_at DESC
+            """
+            tasks = execute_query(query, tuple(params), self.db_path, row_factory=TaskRecord.from_row)
+            return self._attach_tags(tasks)
         except Exception as e:
-            logger.error(f"获取任务列表失败: {e}")
+            logger.error(f"查找任务失败: {e}")
             return []
 
     def update_task(self, task_id: int, updates: Dict) -> bool:
@@ -191,14 +217,14 @@ class TaskRepository:
                 elif key == "is_completed":
                     set_clauses.append(f"{key} = ?")
                     params.append(1 if value else 0)
-                elif key in ["due_date", "completed_at", "deleted_at"] and value:
-                    # 处理日期时间字段
-                    if isinstance(value, (datetime, date)):
-                        set_clauses.append(f"{key} = ?")
-                        params.append(safe_isoformat(value))
-                    else:
-                        set_clauses.append(f"{key} = ?")
-                        params.append(value)
+                elif key == "due_date":
+                    # 日期字段存储为 epoch days（接受 date/datetime/ISO字符串/整数）
+                    set_clauses.append(f"{key} = ?")
+                    params.append(to_epoch_days(value))
+                elif key in ["created_at", "completed_at", "deleted_at"]:
+                    # 时间字段存储为 Unix 秒
+                    set_clauses.append(f"{key} = ?")
+                    params.append(to_epoch_seconds(value))
                 else:
                     set_clauses.append(f"{key} = ?")
                     params.append(value)
@@ -240,8 +266,7 @@ class TaskRepository:
 
         try:
             query = "UPDATE tasks SET deleted_at = ? WHERE id = ?"
-            deleted_at = datetime.now().isoformat()
-            affected = execute_update(query, (deleted_at, task_id), self.db_path)
+            affected = execute_update(query, (now_epoch(), task_id), self.db_path)
 
             success = affected > 0
             if success:
@@ -301,8 +326,7 @@ class TaskRepository:
 
         try:
             query = "UPDATE tasks SET is_completed = 1, completed_at = ? WHERE id = ?"
-            completed_at = datetime.now().isoformat()
-            affected = execute_update(query, (completed_at, task_id), self.db_path)
+            affected = execute_update(query, (now_epoch(), task_id), self.db_path)
 
             success = affected > 0
             if success:
@@ -361,24 +385,14 @@ class TaskRepository:
             return None
 
         try:
-            # 先尝试获取现有标签
-            query = "SELECT id FROM tags WHERE name = ? LIMIT 1"
-            results = execute_query(query, (tag_name,), self.db_path)
-
-            if results:
-                return results[0]["id"]
-
-            # 创建新标签（在同一个连接中获取ID）
-            with get_connection(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO tags (name) VALUES (?)", (tag_name,))
-                
-                if cursor.rowcount > 0:
-                    tag_id = cursor.lastrowid
-                    logger.debug(f"标签创建成功: ID={tag_id}, 名称={tag_name}")
-                    return tag_id
+            # 先从缓存获取现有标签
+            tag_id = self.tag_cache.get_id(tag_name)
+            if tag_id is not None:
+                return tag_id
 
-            return None
+            # 创建新标签
+            tag_id = self._create_tag(tag_name)
+            return tag_id if tag_id != -1 else None
 
         except Exception as e:
             logger.error(f"获取/创建标签失败: {e}")
@@ -391,31 +405,38 @@ class TaskRepository:
             return -1
 
         try:
-            # 先查询是否存在
-            query = "SELECT id FROM tags WHERE name = ? LIMIT 1"
-            results = execute_query(query, (tag_name,), self.db_path)
-            if results:
-                return results[0]["id"]
+            # 先查询缓存
+            tag_id = self.tag_cache.get_id(tag_name)
+            if tag_id is not None:
+                return tag_id
             
-            # 在同一个连接中插入并获取ID
-            with get_connection(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag_name,))
-                
-                if cursor.rowcount > 0:
-                    tag_id = cursor.lastrowid
-                    logger.info(f"标签添加成功: ID={tag_id}, 名称={tag_name}")
-                    return tag_id
-                else:
-                    # 如果INSERT被忽略（标签已存在），重新查询
-                    cursor.execute("SELECT id FROM tags WHERE name = ? LIMIT 1", (tag_name,))
-                    result = cursor.fetchone()
-                    return result[0] if result else -1
+            return self._create_tag(tag_name)
 
         except Exception as e:
             logger.error(f"添加标签失败: {e}")
             return -1
 
+    def _create_tag(self, tag_name: str) -> int:
+        """创建标签并写入缓存（标签已存在时返回现有ID）"""
+        with get_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag_name,))
+            
+            if cursor.rowcount > 0:
+                tag_id = cursor.lastrowid
+                logger.info(f"标签添加成功: ID={tag_id}, 名称={tag_name}")
+            else:
+                # 如果INSERT被忽略（标签已存在），重新查询
+                cursor.execute("SELECT id FROM tags WHERE name = ? LIMIT 1", (tag_name,))
+                result = cursor.fetchone()
+                if not result:
+                    return -1
+                tag_id = result[0]
+        
+        # 提交成功后再更新缓存
+        self.tag_cache.put(tag_id, tag_name)
+        return tag_id
+
     def rename_tag(self, tag_id: int, new_name: str) -> bool:
         """重命名标签（优化参数验证）"""
         if not isinstance(tag_id, int) or tag_id <= 0:
@@ -433,6 +454,7 @@ class TaskRepository:
 
             success = affected > 0
             if success:
+                self.tag_cache.rename(tag_id, new_name)
                 logger.info(f"标签重命名成功: ID={tag_id}, 新名称={new_name}")
             return success
         except Exception as e:
@@ -447,9 +469,7 @@ class TaskRepository:
 
         try:
             # 检查标签是否存在
-            source_exists = execute_query("SELECT 1 FROM tags WHERE id = ?", (source_id,), self.db_path)
-            target_exists = execute_query("SELECT 1 FROM tags WHERE id = ?", (target_id,), self.db_path)
-            if not source_exists or not target_exists:
+            if self.tag_cache.get_name(source_id) is None or self.tag_cache.get_name(target_id) is None:
                 raise TagNotFoundError("源标签或目标标签不存在")
 
             # 使用上下文管理器确保事务安全
@@ -468,6 +488,7 @@ class TaskRepository:
                 # 3. 删除源标签
                 cursor.execute("DELETE FROM tags WHERE id = ?", (source_id,))
 
+            self.tag_cache.remove([source_id])
             logger.info(f"标签合并成功: 源ID={source_id} -> 目标ID={target_id}")
             return True
 
@@ -490,6 +511,7 @@ class TaskRepository:
 
             success = affected > 0
             if success:
+                self.tag_cache.remove([tag_id])
                 logger.info(f"标签删除成功: ID={tag_id}")
             return success
         except Exception as e:
@@ -572,16 +594,370 @@ class TaskRepository:
             logger.error(f"设置应用状态失败: {e}")
             return False
 
+    def get_app_states(self, keys: List[str]) -> Dict[str, str]:
+        """批量获取应用状态（一次查询，缺失的键不出现在结果中）"""
+        keys = [key.strip() for key in keys if key and key.strip()]
+        if not keys:
+            return {}
+
+        try:
+            placeholders = ",".join("?" * len(keys))
+            query = f"SELECT key, value FROM app_state WHERE key IN ({placeholders})"
+            results = execute_query(query, tuple(keys), self.db_path)
+            return {row["key"]: row["value"] for row in results}
+        except Exception as e:
+            logger.error(f"批量获取应用状态失败: {e}")
+            return {}
+
+    def set_app_states(self, states: Dict[str, str]) -> bool:
+        """批量设置应用状态（单个事务）"""
+        params = [(key.strip(), str(value).strip()) for key, value in states.items() if key and key.strip()]
+        if not params:
+            return False
+
+        try:
+            query = """
+                INSERT OR REPLACE INTO app_state (key, value) 
+                VALUES (?, ?)
+            """
+            affected = execute_many(query, params, self.db_path)
+            success = affected > 0
+            if success:
+                logger.debug(f"应用状态批量设置成功: {dict(params)}")
+            return success
+        except Exception as e:
+            logger.error(f"批量设置应用状态失败: {e}")
+            return False
+
+    def delete_app_states(self, keys: List[str]) -> int:
+        """批量删除应用状态"""
+        keys = [key.strip() for key in keys if key and key.strip()]
+        if not keys:
+            return 0
+
+        try:
+            placeholders = ",".join("?" * len(keys))
+            query = f"DELETE FROM app_state WHERE key IN ({placeholders})"
+            return execute_update(query, tuple(keys), self.db_path)
+        except Exception as e:
+            logger.error(f"删除应用状态失败: {e}")
+            return 0
+
+    # ========== 智能视图 ==========
+    def get_saved_views(self) -> List[Dict]:
+        """获取所有智能视图（按排序值和创建顺序）"""
+        try:
+            query = "SELECT id, name, query, sort_order FROM saved_views ORDER BY sort_order ASC, id ASC"
+            return execute_query(query, (), self.db_path)
+        except Exception as e:
+            logger.error(f"获取智能视图失败: {e}")
+            return []
+
+    def add_saved_view(self, name: str, query: str) -> int:
+        """添加智能视图（名称唯一），返回ID，失败返回-1"""
+        name = name.strip()
+        if not name:
+            logger.warning("视图名称不能为空")
+            return -1
+
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO saved_views (name, query, sort_order, created_at)
+                    VALUES (?, ?, (SELECT IFNULL(MAX(sort_order), 0) + 1 FROM saved_views), ?)
+                    """,
+                    (name, query.strip(), now_epoch())
+                )
+                view_id = cursor.lastrowid
+            logger.debug(f"智能视图添加成功: {name}")
+            return view_id
+        except Exception as e:
+            logger.error(f"添加智能视图失败: {e}")
+            return -1
+
+    def update_saved_view(self, view_id: int, name: str, query: str) -> bool:
+        """修改智能视图的名称与查询"""
+        name = name.strip()
+        if not name:
+            logger.warning("视图名称不能为空")
+            return False
+
+        try:
+            affected = execute_update(
+                "UPDATE saved_views SET name = ?, query = ? WHERE id = ?",
+                (name, query.strip(), view_id), self.db_path
+            )
+            return affected > 0
+        except Exception as e:
+            logger.error(f"修改智能视图失败: {e}")
+            return False
+
+    def delete_saved_view(self, view_id: int) -> bool:
+        """删除智能视图"""
+        try:
+            return execute_update("DELETE FROM saved_views WHERE id = ?", (view_id,), self.db_path) > 0
+        except Exception as e:
+            logger.error(f"删除智能视图失败: {e}")
+            return False
+
+    # ========== 命令日志（撤销/重做） ==========
+    def get_task_snapshots(self, task_ids: List[int]) -> Dict[int, Dict]:
+        """
+        读取任务的原始列值与标签（供命令日志计算字段差异与标签差异）
+
+        Returns:
+            Dict[int, Dict]: {任务ID: 原始列值（时间为整数）及 tags（标签名称列表）}，不存在的任务不出现在结果中
+        """
+        if not task_ids:
+            return {}
+
+        try:
+            ids_str = escape_sql_in_list(task_ids)
+            # 操作前后各读取一次，任务与标签在同一个连接中读取
+            with get_connection(self.db_path) as conn:
+                # 取完结果集再处理，读取耗时与行数计入SQL统计
+                task_rows = conn.execute(f"SELECT * FROM tasks WHERE id IN {ids_str}").fetchall()
+                snapshots = {row["id"]: dict(row) for row in task_rows}
+                for row in snapshots.values():
+                    row["tags"] = []
+                tag_rows = conn.execute(f"""
+                    SELECT tt.task_id, g.name FROM task_tags tt JOIN tags g ON g.id = tt.tag_id
+                    WHERE tt.task_id IN {ids_str} ORDER BY g.name
+                """).fetchall()
+                for task_id, name in tag_rows:
+                    snapshots[task_id]["tags"].append(name)
+            return snapshots
+        except Exception as e:
+            logger.error(f"读取任务快照失败: {e}")
+            return {}
+
+    def get_deleted_task_ids(self) -> List[int]:
+        """获取回收站中所有任务的ID"""
+        try:
+            query = "SELECT id FROM tasks WHERE deleted_at IS NOT NULL"
+            return [row[0] for row in execute_query(query, (), self.db_path, row_factory=tuple_row)]
+        except Exception as e:
+            logger.error(f"获取已删除任务ID失败: {e}")
+            return []
+
+    def get_tag_task_ids(self, tag_id: int) -> List[int]:
+        """获取带有指定标签的任务ID（含已删除的任务）"""
+        try:
+            query = "SELECT task_id FROM task_tags WHERE tag_id = ? ORDER BY task_id"
+            return [row[0] for row in execute_query(query, (tag_id,), self.db_path, row_factory=tuple_row)]
+        except Exception as e:
+            logger.error(f"获取标签任务失败: {e}")
+            return []
+
+    def append_journal(self, label: str, undo_ops: str, redo_ops: str, capacity: int, max_bytes: int) -> int:
+        """
+        追加一条命令日志（环形缓冲）
+
+        先丢弃已撤销的记录（新操作之后不能再重做），再写入新记录，最后删除超出条数上限
+        或总字节数上限的最早记录。
+
+        Args:
+            label: 操作名称
+            undo_ops: JSON 编码的逆操作（格式见 apply_journal）
+            redo_ops: JSON 编码的正向操作
+            capacity: 最多保留的记录条数
+            max_bytes: 所有记录的操作数据总字节数上限
+
+        Returns:
+            int: 记录ID，失败返回-1
+        """
+        try:
+            size = len(undo_ops.encode("utf-8")) + len(redo_ops.encode("utf-8"))
+            with get_connection(self.db_path) as conn:
+                conn.execute("DELETE FROM command_journal WHERE undone = 1")
+                cursor = conn.execute(
+                    """
+                    INSERT INTO command_journal (label, undo_ops, redo_ops, undone, size, created_at)
+                    VALUES (?, ?, ?, 0, ?, ?)
+                    """,
+                    (label, undo_ops, redo_ops, size, now_epoch())
+                )
+                entry_id = cursor.lastrowid
+
+                # 从最新的记录往前累计，超出条数或字节数上限的部分删除
+                total = 0
+                cutoff = 0
+                rows = conn.execute(
+                    "SELECT id, size FROM command_journal ORDER BY id DESC LIMIT ?", (capacity + 1,)
+                ).fetchall()
+                for index, (row_id, row_size) in enumerate(rows):
+                    total += row_size
+                    if index >= capacity or (total > max_bytes and row_id != entry_id):
+                        cutoff = row_id
+                        break
+                if cutoff:
+                    conn.execute("DELETE FROM command_journal WHERE id <= ?", (cutoff,))
+            return entry_id
+        except Exception as e:
+            logger.error(f"写入命令日志失败: {e}")
+            return -1
+
+    def get_journal_heads(self) -> Dict[str, Optional[str]]:
+        """获取下一个可撤销与可重做的操作名称 {"undo": 名称或None, "redo": 名称或None}"""
+        try:
+            rows = execute_query(
+                """
+                SELECT
+                    (SELECT label FROM command_journal WHERE undone = 0 ORDER BY id DESC LIMIT 1),
+                    (SELECT label FROM command_journal WHERE undone = 1 ORDER BY id ASC LIMIT 1)
+                """,
+                (), self.db_path, row_factory=tuple_row
+            )
+            undo_label, redo_label = rows[0] if rows else (None, None)
+            return {"undo": undo_label, "redo": redo_label}
+        except Exception as e:
+            logger.error(f"读取命令日志失败: {e}")
+            return {"undo": None, "redo": None}
+
+    def clear_journal(self) -> int:
+        """清空命令日志，返回删除的记录数"""
+        try:
+            return execute_update("DELETE FROM command_journal", (), self.db_path)
+        except Exception as e:
+            logger.error(f"清空命令日志失败: {e}")
+            return 0
+
+    def apply_journal(self, undo: bool) -> Optional[Dict]:
+        """
+        在一个事务中执行最近一条可撤销记录的逆操作（undo=True）或最早一条已撤销记录的正向操作，
+        并更新记录的撤销状态；任一操作失败时整个事务回滚
+
+        记录涉及的任务已被未记录的操作删除（或要重新插入的ID已被占用）时，记录与数据不再对应：
+        回滚后清空整个日志，返回None
+
+        操作为 JSON 数组，每项为 [类型, 参数...]：
+            set        [任务ID, {列: 原始值}]          更新任务字段
+            insert     [{列: 原始值（含id）}, 标签名称]  按原ID重新插入任务
+            purge      [任务ID列表]                    永久删除任务
+            tags       [任务ID, 添加的标签名, 移除的标签名]
+            tag_create [标签ID, 名称]   tag_drop [标签ID]   tag_rename [标签ID, 名称]
+            link / unlink [标签ID, 任务ID列表]
+
+        Returns:
+            Optional[Dict]: {"id", "label", "ops"}，没有可执行的记录或失败时返回None
+        """
+        try:
+            if undo:
+                select = "SELECT id, label, undo_ops FROM command_journal WHERE undone = 0 ORDER BY id DESC LIMIT 1"
+            else:
+                select = "SELECT id, label, redo_ops FROM command_journal WHERE undone = 1 ORDER BY id ASC LIMIT 1"
+
+            with get_connection(self.db_path) as conn:
+                row = conn.execute(select).fetchone()
+                if row is None:
+                    return None
+                entry_id, label, ops_json = row
+                ops = json.loads(ops_json)
+                for op in ops:
+                    self._apply_journal_op(conn, op)
+                conn.execute("UPDATE command_journal SET undone = ? WHERE id = ?", (1 if undo else 0, entry_id))
+
+            # 操作可能新建、删除或重命名标签：提交后重新加载标签缓存
+            if any(op[0] not in ("set", "purge") for op in ops):
+                self.tag_cache.invalidate()
+            return {"id": entry_id, "label": label, "ops": ops}
+        except JournalConflictError as e:
+            logger.warning(f"{'撤销' if undo else '重做'}记录已失效（{e}），已清空撤销记录")
+            self.clear_journal()
+            return None
+        except Exception as e:
+            logger.error(f"{'撤销' if undo else '重做'}操作失败: {e}")
+            return None
+
+    def _apply_journal_op(self, conn, op: list) -> None:
+        """执行单个命令日志操作（在调用方的事务中）"""
+        kind, args = op[0], op[1:]
+        if kind == "set":
+            task_id, values = args
+            columns = [column for column in values if column in JOURNAL_TASK_COLUMNS]
+            if columns:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                cursor = conn.execute(
+                    f"UPDATE tasks SET {assignments} WHERE id = ?",
+                    [values[column] for column in columns] + [task_id]
+                )
+                if cursor.rowcount == 0:
+                    raise JournalConflictError(f"任务 {task_id} 不存在")
+        elif kind == "insert":
+            values, tag_names = args
+            columns = ["id"] + [column for column in values if column in JOURNAL_TASK_COLUMNS]
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO tasks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [values[column] for column in columns]
+            )
+            if cursor.rowcount == 0:
+                raise JournalConflictError(f"任务ID {values['id']} 已被占用")
+            self._journal_link_names(conn, values["id"], tag_names)
+        elif kind == "purge":
+            conn.execute(f"DELETE FROM tasks WHERE id IN {escape_sql_in_list(args[0])}")
+        elif kind == "tags":
+            task_id, added, removed = args
+            if conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is None:
+                raise JournalConflictError(f"任务 {task_id} 不存在")
+            if removed:
+                conn.execute(
+                    f"""
+                    DELETE FROM task_tags WHERE task_id = ?
+                    AND tag_id IN (SELECT id FROM tags WHERE name IN ({', '.join('?' * len(removed))}))
+                    """,
+                    [task_id] + list(removed)
+                )
+            self._journal_link_names(conn, task_id, added)
+        elif kind == "tag_create":
+            conn.execute("INSERT OR IGNORE INTO tags (id, name) VALUES (?, ?)", args)
+        elif kind == "tag_drop":
+            conn.execute("DELETE FROM tags WHERE id = ?", args)
+        elif kind == "tag_rename":
+            tag_id, name = args
+            conn.execute("UPDATE tags SET name = ? WHERE id = ?", (name, tag_id))
+        elif kind in ("link", "unlink"):
+            tag_id, task_ids = args
+            if kind == "link":
+                conn.executemany(
+                    "INSERT OR IGNORE INTO task_tags (task_id, tag_id) SELECT id, ? FROM tasks WHERE id = ?",
+                    [(tag_id, task_id) for task_id in task_ids]
+                )
+            else:
+                conn.executemany(
+                    "DELETE FROM task_tags WHERE task_id = ? AND tag_id = ?",
+                    [(task_id, tag_id) for task_id in task_ids]
+                )
+        else:
+            raise TaskRepositoryError(f"未知的命令日志操作: {kind}")
+
+    def _journal_link_names(self, conn, task_id: int, tag_names: List[str]) -> None:
+        """按名称为任务添加标签（标签不存在时创建，在调用方的事务中）"""
+        for name in tag_names:
+            conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO task_tags (task_id, tag_id)
+                SELECT tasks.id, tags.id FROM tasks, tags WHERE tasks.id = ? AND tags.name = ?
+                """,
+                (task_id, name)
+            )
+
     # ========== 回收站操作 ==========
     def get_deleted_tasks(self) -> List[Dict]:
-        """获取已删除任务（优化批量标签查询）"""
+        """获取已删除任务（优化批量标签查询；age_bucket 为SQL中按整数比较得到的年龄分组）"""
         try:
+            recent_days, month_days = RECYCLE_AGE_BUCKET_DAYS
+            now = now_epoch()
             query = """
-                SELECT * FROM tasks 
+                SELECT *,
+                    CASE WHEN deleted_at >= ? THEN 0 WHEN deleted_at >= ? THEN 1 ELSE 2 END AS age_bucket
+                FROM tasks 
                 WHERE deleted_at IS NOT NULL
                 ORDER BY deleted_at DESC
             """
-            tasks = execute_query(query, (), self.db_path)
+            params = (now - recent_days * SECONDS_PER_DAY, now - month_days * SECONDS_PER_DAY)
+            tasks = execute_query(query, params, self.db_path, row_factory=TaskRecord.from_row)
 
             # 批量获取标签
             task_ids = [task["id"] for task in tasks]
@@ -594,6 +970,46 @@ class TaskRepository:
             logger.error(f"获取已删除任务失败: {e}")
             return []
 
+    def get_deleted_page(self, limit: int, after: Optional[Tuple[int, int]] = None,
+                         conditions: Optional[List[str]] = None, params: Optional[List] = None) -> List[Dict]:
+        """
+        按删除时间倒序分页读取回收站（键集分页，每页耗时与回收站大小无关）
+
+        只读取列表显示需要的列（id、title、deleted_at 及SQL中计算的 age_bucket），
+        任务详情与标签在选中时再读取。
+
+        Args:
+            limit: 每页行数
+            after: 上一页最后一行的 (deleted_at, id)，None 表示第一页
+            conditions: 额外的筛选条件（任务表别名为 t，见 core.search_query.compile_query）
+            params: 筛选条件的参数
+        """
+        try:
+            recent_days, month_days = RECYCLE_AGE_BUCKET_DAYS
+            now = now_epoch()
+            query_params = [now - recent_days * SECONDS_PER_DAY, now - month_days * SECONDS_PER_DAY]
+
+            where = ["t.deleted_at IS NOT NULL"] + [f"({condition})" for condition in conditions or ()]
+            query_params.extend(params or ())
+            if after is not None:
+                # 行值比较可直接使用 deleted_at 索引（索引项按 (deleted_at, rowid) 排列）
+                where.append("(t.deleted_at, t.id) < (?, ?)")
+                query_params.extend(after)
+            query_params.append(limit)
+
+            query = f"""
+                SELECT t.id, t.title, t.deleted_at,
+                    CASE WHEN t.deleted_at >= ? THEN 0 WHEN t.deleted_at >= ? THEN 1 ELSE 2 END AS age_bucket
+                FROM tasks t
+                WHERE {' AND '.join(where)}
+                ORDER BY t.deleted_at DESC, t.id DESC
+                LIMIT ?
+            """
+            return execute_query(query, tuple(query_params), self.db_path)
+        except Exception as e:
+            logger.error(f"分页获取已删除任务失败: {e}")
+            return []
+
     def empty_recycle_bin(self) -> int:
         """清空回收站，永久删除所有已删除的任务
         
@@ -617,28 +1033,32 @@ class TaskRepository:
             logger.error(f"清空回收站失败: {e}")
             return 0
 
-    def delete_older_than(self, days: int) -> int:
-        """删除早于指定天数的任务（优化参数验证）"""
+    def delete_older_than(self, days: int, batch_size: Optional[int] = None) -> int:
+        """删除早于指定天数的任务（batch_size 限制单次删除数量，从最早删除的开始）"""
         if not isinstance(days, int) or days < 1:
             logger.warning(f"无效的天数: {days}")
             return 0
 
         try:
-            cutoff_date = safe_isoformat(datetime.now() - timedelta(days=days))
+            cutoff_date = now_epoch() - days * SECONDS_PER_DAY
             query = """
-                DELETE FROM tasks 
-                WHERE deleted_at IS NOT NULL 
-                AND deleted_at < ?
+                DELETE FROM tasks WHERE id IN (
+                    SELECT id FROM tasks
+                    WHERE deleted_at IS NOT NULL
+                    AND deleted_at < ?
+                    ORDER BY deleted_at
+                    LIMIT ?
+                )
             """
-            affected = execute_update(query, (cutoff_date,), self.db_path)
+            affected = execute_update(query, (cutoff_date, batch_size or -1), self.db_path)
             logger.info(f"删除早于{days}天的已删除任务: 删除了{affected}个任务")
             return affected
         except Exception as e:
             logger.error(f"删除旧任务失败: {e}")
             return 0
 
-    def keep_latest_n(self, limit: int) -> int:
-        """保留最新N个已删除任务（修复SQL注入风险）"""
+    def keep_latest_n(self, limit: int, batch_size: Optional[int] = None) -> int:
+        """保留最新N个已删除任务（batch_size 限制单次删除数量，从最早删除的开始）"""
         if not isinstance(limit, int) or limit < 0:
             logger.warning(f"无效的保留数量: {limit}")
             return 0
@@ -646,12 +1066,16 @@ class TaskRepository:
         try:
             # 安全获取需要删除的任务ID
             query = """
-                SELECT id FROM tasks 
-                WHERE deleted_at IS NOT NULL
-                ORDER BY deleted_at DESC
-                LIMIT -1 OFFSET ?
+                SELECT id FROM (
+                    SELECT id, deleted_at FROM tasks 
+                    WHERE deleted_at IS NOT NULL
+                    ORDER BY deleted_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                ORDER BY deleted_at
+                LIMIT ?
             """
-            results = execute_query(query, (limit,), self.db_path)
+            results = execute_query(query, (limit, batch_size or -1), self.db_path)
             task_ids = [row["id"] for row in results]
 
             if not task_ids:
@@ -668,19 +1092,112 @@ class TaskRepository:
             logger.error(f"保留最新任务失败: {e}")
             return 0
 
+    def incremental_vacuum(self, pages: int) -> int:
+        """
+        回收空闲页（需数据库为 auto_vacuum=INCREMENTAL，否则不回收）
+        
+        Args:
+            pages: 本次最多回收的页数
+            
+        Returns:
+            int: 实际回收的页数
+        """
+        try:
+            with get_connection(self.db_path) as conn:
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                # executescript 会一直执行到结束；execute 单步执行只能回收一页
+                conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+                after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            return max(before - after, 0)
+        except Exception as e:
+            logger.error(f"增量回收空闲页失败: {e}")
+            return 0
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        将旧数据库转换为 auto_vacuum=INCREMENTAL（执行一次 VACUUM 重建整个文件，耗时与文件大小成正比）
+        
+        Returns:
+            bool: 是否成功（已是增量模式时直接返回True）
+        """
+        try:
+            file_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+            start = time.perf_counter()
+            with get_connection(self.db_path) as conn:
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+                    return True
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                # VACUUM 不能在事务中执行
+                conn.commit()
+                conn.execute("VACUUM")
+            logger.info(
+                f"已启用增量回收（auto_vacuum=INCREMENTAL）: 重建 {file_size / 1024:.0f} KB 的数据库文件, "
+                f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"启用增量回收失败: {e}")
+            return False
+
+    def get_storage_stats(self) -> Dict[str, float]:
+        """
+        获取数据库存储统计
+        
+        Returns:
+            Dict[str, float]: file_size（字节）、page_size、page_count、freelist_count、
+                fragmentation（空闲页占比）、auto_vacuum（0=关闭, 1=完全, 2=增量）
+        """
+        try:
+            with get_connection(self.db_path) as conn:
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            
+            return {
+                "file_size": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+                "page_size": page_size,
+                "page_count": page_count,
+                "freelist_count": freelist_count,
+                "fragmentation": freelist_count / page_count if page_count else 0.0,
+                "auto_vacuum": auto_vacuum,
+            }
+        except Exception as e:
+            logger.error(f"获取数据库存储统计失败: {e}")
+            return {}
+
+    def optimize(self, analyze: bool = False) -> bool:
+        """
+        更新查询优化器统计信息
+        
+        Args:
+            analyze: 是否执行完整 ANALYZE（否则只执行开销很小的 PRAGMA optimize）
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            with get_connection(self.db_path) as conn:
+                if analyze:
+                    conn.execute("ANALYZE")
+                conn.execute("PRAGMA optimize").fetchall()
+            return True
+        except Exception as e:
+            logger.error(f"优化数据库失败: {e}")
+            return False
+
     # ========== 辅助方法 ==========
     def _batch_add_task_tags(self, task_id: int, tags: List[str]) -> None:
         """批量添加任务标签（提升性能）"""
         if not tags or not isinstance(task_id, int) or task_id <= 0:
             return
 
-        # 批量获取/创建标签ID
+        # 通过缓存批量解析标签ID，仅为缺失的标签访问数据库
+        names = [name for name in (tag_name.strip() for tag_name in tags) if name]
         tag_params = []
-        for tag_name in tags:
-            tag_name = tag_name.strip()
-            if not tag_name:
-                continue
-            tag_id = self.add_tag(tag_name)
+        for tag_name, tag_id in self.tag_cache.resolve(names).items():
+            if tag_id is None:
+                tag_id = self.add_tag(tag_name)
             if tag_id != -1:
                 tag_params.append((task_id, tag_id))
 
@@ -700,6 +1217,57 @@ class TaskRepository:
         except Exception as e:
             logger.error(f"移除任务所有标签失败: {e}")
 
+    def find_task_ids(self, conditions: List[str], params: List) -> set:
+        """按SQL条件查找未删除任务的ID（只读取ID，不加载任务数据和标签）"""
+        try:
+            conditions = ["t.deleted_at IS NULL"] + [f"({condition})" for condition in conditions]
+            query = f"SELECT t.id FROM tasks t WHERE {' AND '.join(conditions)}"
+            return {row[0] for row in execute_query(query, tuple(params), self.db_path, row_factory=tuple_row)}
+        except Exception as e:
+            logger.error(f"查找任务ID失败: {e}")
+            return set()
+
+    def match_task_ids(self, predicates: List[Tuple[List[str], List]],
+                       task_ids: List[int]) -> Optional[Dict[int, Tuple]]:
+        """
+        在一条查询中对指定任务逐个求值多组SQL条件
+
+        Args:
+            predicates: [(条件列表, 参数列表)]，条件列表为空表示恒成立
+            task_ids: 要求值的任务ID（已删除的任务不出现在结果中）
+
+        Returns:
+            Optional[Dict[int, Tuple]]: {任务ID: 各组条件是否成立（0/1，与 predicates 顺序一致）}，
+            查询失败返回None（与"没有任务满足条件"区分）
+        """
+        if not task_ids or not predicates:
+            return {}
+
+        try:
+            columns = []
+            params = []
+            for conditions, condition_params in predicates:
+                columns.append(" AND ".join(f"({condition})" for condition in conditions) if conditions else "1")
+                params.extend(condition_params)
+            query = f"""
+                SELECT t.id, {', '.join(f'({column}) IS 1' for column in columns)}
+                FROM tasks t
+                WHERE t.deleted_at IS NULL AND t.id IN {escape_sql_in_list(task_ids)}
+            """
+            rows = execute_query(query, tuple(params), self.db_path, row_factory=tuple_row)
+            return {row[0]: row[1:] for row in rows}
+        except Exception as e:
+            logger.error(f"求值任务条件失败: {e}")
+            return None
+
+    def _attach_tags(self, tasks: List[Dict]) -> List[Dict]:
+        """为任务列表批量填充标签（减少SQL查询次数）"""
+        task_ids = [task["id"] for task in tasks]
+        tag_map = self._get_task_tags_batch(task_ids) if task_ids else {}
+        for task in tasks:
+            task["tags"] = tag_map.get(task["id"], [])
+        return tasks
+
     def _get_task_tags_batch(self, task_ids: List[int]) -> Dict[int, List[str]]:
         """批量获取多个任务的标签（减少SQL查询）"""
         if not task_ids:
@@ -707,18 +1275,21 @@ class TaskRepository:
 
         try:
             ids_str = escape_sql_in_list(task_ids)
-            query = f"""
-                SELECT tt.task_id, t.name 
-                FROM tags t
-                JOIN task_tags tt ON t.id = tt.tag_id
-                WHERE tt.task_id IN {ids_str}
-            """
-            results = execute_query(query, (), self.db_path)
+            query = f"SELECT task_id, tag_id FROM task_tags WHERE task_id IN {ids_str}"
+            results = execute_query(query, (), self.db_path, row_factory=tuple_row)
+
+            # 标签名称取自标签缓存，所有任务共享同一组字符串对象
+            names = self.tag_cache.get_names()
+            if any(tag_id not in names for _, tag_id in results):
+                self.tag_cache.invalidate()
+                names = self.tag_cache.get_names()
 
             # 构建标签映射
             tag_map = {task_id: [] for task_id in task_ids}
-            for row in results:
-                tag_map[row["task_id"]].append(row["name"])
+            for task_id, tag_id in results:
+                name = names.get(tag_id)
+                if name is not None:
+                    tag_map[task_id].append(name)
 
             return tag_map
         except Exception as e:
@@ -752,11 +1323,7 @@ class TaskRepository:
         """
         try:
             # 查找没有关联任务的标签
-            query = """
-                SELECT t.id FROM tags t
-                LEFT JOIN task_tags tt ON t.id = tt.tag_id
-                WHERE tt.task_id IS NULL
-            """
+            query = "SELECT id FROM tags WHERE task_count = 0"
             results = execute_query(query, (), self.db_path)
             
             if not results:
@@ -769,6 +1336,7 @@ class TaskRepository:
             affected = execute_update(delete_query, (), self.db_path)
             
             if affected > 0:
+                self.tag_cache.remove(tag_ids)
                 logger.info(f"清理了 {affected} 个未使用的标签")
             
             return affected
@@ -778,62 +1346,55 @@ class TaskRepository:
             return []
 
     def get_all_tags_with_task_count(self) -> List[Dict]:
-        """获取所有标签及其任务数（优化JOIN查询）"""
+        """获取所有标签及其任务数（task_count 由触发器维护，无需关联 task_tags）"""
         try:
-            query = """
-                SELECT 
-                    t.id,
-                    t.name,
-                    COUNT(tt.task_id) as task_count
-                FROM tags t
-                LEFT JOIN task_tags tt ON t.id = tt.tag_id
-                GROUP BY t.id, t.name
-                ORDER BY LOWER(t.name)
-            """
-            results = execute_query(query, (), self.db_path)
-            
-            # 确保task_count是整数类型
-            for row in results:
-                row["task_count"] = int(row["task_count"]) if row["task_count"] else 0
-            
-            return results
+            query = "SELECT id, name, task_count FROM tags ORDER BY LOWER(name)"
+            return execute_query(query, (), self.db_path)
         except Exception as e:
             logger.error(f"获取标签及任务数失败: {e}")
             return []
 
-    def get_task_count_by_section(self) -> Dict[str, Dict[str, int]]:
-        """按分区统计任务（优化SQL查询）"""
+    def get_counters(self) -> Dict[str, int]:
+        """获取全部统计计数器（键见 data.database.COUNTER_KEYS）"""
         try:
-            # 单次查询获取所有统计数据（减少SQL调用）
-            query = """
-                SELECT 
-                    section,
-                    is_completed,
-                    COUNT(*) as count
-                FROM tasks 
-                WHERE deleted_at IS NULL
-                GROUP BY section, is_completed
-            """
-            results = execute_query(query, (), self.db_path)
+            results = execute_query("SELECT key, value FROM counters", (), self.db_path)
+            return {row["key"]: row["value"] for row in results}
+        except Exception as e:
+            logger.error(f"获取统计计数器失败: {e}")
+            return {}
 
-            # 初始化统计结果
-            stats = {
-                section.value: {"pending": 0, "completed": 0, "total": 0}
-                for section in TaskSection
-            }
+    def get_deleted_count(self) -> int:
+        """获取回收站任务数（读取计数器）"""
+        return self.get_counters().get(COUNTER_DELETED_KEY, 0)
 
-            # 填充统计数据
-            for row in results:
-                section = row["section"]
-                if section not in stats:
-                    continue
-                if row["is_completed"] == 0:
-                    stats[section]["pending"] = row["count"]
-                else:
-                    stats[section]["completed"] = row["count"]
-                stats[section]["total"] = stats[section]["pending"] + stats[section]["completed"]
+    def get_task_count_by_section(self) -> Dict[str, Dict[str, int]]:
+        """按分区统计任务（读取触发器维护的计数器）"""
+        try:
+            counters = self.get_counters()
+
+            stats = {}
+            for section in TaskSection:
+                pending = counters.get(f"tasks.{section.value}.pending", 0)
+                completed = counters.get(f"tasks.{section.value}.completed", 0)
+                stats[section.value] = {"pending": pending, "completed": completed, "total": pending + completed}
 
             return stats
         except Exception as e:
             logger.error(f"统计任务数量失败: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+    def get_overdue_count(self, today: Optional[int] = None) -> int:
+        """统计已逾期的未完成特殊任务（due_date 为 epoch days，走部分索引的整数比较）"""
+        try:
+            query = """
+                SELECT COUNT(*) AS count FROM tasks
+                WHERE section = 'once' AND is_completed = 0
+                AND deleted_at IS NULL AND due_date IS NOT NULL
+                AND due_date < ?
+            """
+            today = today_epoch_days() if today is None else today
+            result = execute_query(query, (today,), self.db_path)
+            return result[0]["count"] if result else 0
+        except Exception as e:
+            logger.error(f"统计逾期任务失败: {e}")
+            return 0
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+标签缓存 - 进程内按数据库路径共享的 名称<->ID 双向映射，一次查询预热，写操作时精确维护
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from data.database import execute_query
+from utils.logger import logger
+
+
+class TagCache:
+    """
+    标签名称与ID的双向缓存
+    
+    首次使用时以一条查询加载全部标签；之后由 TaskRepository 的标签写操作
+    （创建、重命名、合并、删除、清理）在提交成功后同步更新。绕过仓库直接改写
+    tags 表的操作（批量导入、从备份恢复）需调用 invalidate()，下次使用时重新加载。
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._loaded = False
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+    
+    def _ensure_loaded(self):
+        """首次使用或失效后加载全部标签（调用方需持有锁）"""
+        if self._loaded:
+            return
+        rows = execute_query("SELECT id, name FROM tags", (), self.db_path)
+        self._ids = {row["name"]: row["id"] for row in rows}
+        self._names = {tag_id: name for name, tag_id in self._ids.items()}
+        self._loaded = True
+        self._loads += 1
+        logger.debug(f"标签缓存已加载: {self.db_path}, 共{len(self._ids)}个标签")
+    
+    # ========== 查询 ==========
+    def get_id(self, name: str) -> Optional[int]:
+        """按名称获取标签ID（不存在返回None）"""
+        with self._lock:
+            self._ensure_loaded()
+            tag_id = self._ids.get(name)
+            if tag_id is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return tag_id
+    
+    def get_name(self, tag_id: int) -> Optional[str]:
+        """按ID获取标签名称（不存在返回None）"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._names.get(tag_id)
+    
+    def get_names(self) -> Dict[int, str]:
+        """获取 ID->名称 映射的快照（批量解析时避免逐个加锁）"""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._names)
+    
+    def resolve(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        """批量解析标签名称（不存在的名称映射为None）"""
+        with self._lock:
+            self._ensure_loaded()
+            result = {name: self._ids.get(name) for name in names}
+            missing = sum(1 for tag_id in result.values() if tag_id is None)
+            self._misses += missing
+            self._hits += len(result) - missing
+            return result
+    
+    # ========== 维护 ==========
+    def put(self, tag_id: int, name: str):
+        """记录新建的标签"""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._ids[name] = tag_id
+            self._names[tag_id] = name
+    
+    def rename(self, tag_id: int, new_name: str):
+        """记录标签重命名"""
+        with self._lock:
+            if not self._loaded:
+                return
+            old_name = self._names.get(tag_id)
+            if old_name is not None:
+                self._ids.pop(old_name, None)
+            self._ids[new_name] = tag_id
+            self._names[tag_id] = new_name
+    
+    def remove(self, tag_ids: Iterable[int]):
+        """记录标签删除（含合并时删除的源标签）"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for tag_id in tag_ids:
+                name = self._names.pop(tag_id, None)
+                if name is not None:
+                    self._ids.pop(name, None)
+    
+    def invalidate(self):
+        """整体失效（下次使用时重新加载）"""
+        with self._lock:
+            self._ids = {}
+            self._names = {}
+            self._loaded = False
+    
+    # ========== 诊断 ==========
+    def verify_consistency(self) -> List[str]:
+        """
+        与数据库逐项比对（用于基准和排查问题）
+        
+        Returns:
+            List[str]: 不一致项描述，为空表示一致（缓存未加载时视为一致）
+        """
+        with self._lock:
+            if not self._loaded:
+                return []
+            rows = execute_query("SELECT id, name FROM tags", (), self.db_path)
+            actual = {row["id"]: row["name"] for row in rows}
+            
+            problems = []
+            for tag_id, name in actual.items():
+                if self._names.get(tag_id) != name:
+                    problems.append(f"标签 {tag_id} 数据库为 {name!r}，缓存为 {self._names.get(tag_id)!r}")
+            for tag_id in self._names.keys() - actual.keys():
+                problems.append(f"缓存中的标签 {tag_id} ({self._names[tag_id]!r}) 已不存在")
+            if len(self._ids) != len(self._names):
+                problems.append(f"双向映射大小不一致: 名称{len(self._ids)}个, ID{len(self._names)}个")
+            return problems
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取命中统计"""
+        with self._lock:
+            return {
+                "size": len(self._ids),
+                "hits": self._hits,
+                "misses": self._misses,
+                "loads": self._loads,
+            }
+
+
+_caches: Dict[str, TagCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_tag_cache(db_path: str) -> TagCache:
+    """获取指定数据库的标签缓存（同一路径在进程内共享）"""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = _caches[db_path] = TagCache(db_path)
+        return cache
+
+
+def invalidate_tag_cache(db_path: str):
+    """使指定数据库的标签缓存失效（数据库被整体替换或绕过仓库写入标签后调用）"""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+    if cache is not None:
+        cache.invalidate()
@@ -6,24 +6,110 @@
 作者: 幽梦开发团队
 """
 
-import sys
-import traceback
-from PyQt5.QtWidgets import QApplication, QMessageBox, QSplashScreen
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPixmap, QFont
+# 启动分析器需最先导入，以尽早确定启动时间起点
+from utils.startup_profiler import startup_profiler
 
-# 项目模块导入
-from data.database import init_database
-from ui.main_window import MainWindow
-from core.auto_reset_service import AutoResetService
-from config.settings import settings, APP_NAME, APP_VERSION
-from utils.logger import logger
+# 再次启动时只需转发命令：这里只导入 QtCore 与单实例模块，界面相关模块在确认是主实例后再导入
+with startup_profiler.phase("imports"):
+    import sys
+    import argparse
+    import traceback
+    from PyQt5.QtCore import Qt, QTimer, QObject, QEvent
+    
+    # 项目模块导入
+    from config.settings import settings, APP_NAME, APP_VERSION
+    from core.single_instance import SingleInstance, COMMAND_ACTIVATE, COMMAND_ADD_TASK
+    from utils.logger import logger
+
+# 首帧绘制超时（毫秒）：超时仍未收到绘制事件时强制关闭启动画面
+FIRST_PAINT_TIMEOUT_MS = 3000
+
+
+def parse_arguments(argv):
+    """
+    解析命令行参数（未识别的参数保留给Qt）
+    
+    Returns:
+        tuple: (参数命名空间, 剩余参数列表)
+    """
+    parser = argparse.ArgumentParser(prog=APP_NAME)
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="首帧绘制后在控制台输出启动时间线"
+    )
+    parser.add_argument(
+        "--add",
+        metavar="标题",
+        help="快速添加任务（已在运行时交给运行中的实例添加）"
+    )
+    parser.add_argument(
+        "--section",
+        choices=("daily", "weekly", "once"),
+        default="once",
+        help="快速添加任务的分区（默认 once）"
+    )
+    return parser.parse_known_args(argv[1:])
+
+
+def build_instance_command(args) -> dict:
+    """根据命令行参数构建转发给运行中实例的命令（无参数时为激活主窗口）"""
+    if args.add:
+        return {"command": COMMAND_ADD_TASK, "title": args.add, "section": args.section}
+    return {"command": COMMAND_ACTIVATE}
+
+
+class FirstPaintWatcher(QObject):
+    """首帧绘制监听器 - 主窗口首次绘制后关闭启动画面并输出启动时间线"""
+    
+    def __init__(self, window, splash=None, print_report: bool = False):
+        super().__init__(window)
+        self._window = window
+        self._splash = splash
+        self._print_report = print_report
+        self._done = False
+        
+        window.installEventFilter(self)
+        QTimer.singleShot(FIRST_PAINT_TIMEOUT_MS, self._on_timeout)
+    
+    def eventFilter(self, obj, event):
+        if obj is self._window and event.type() == QEvent.Paint and not self._done:
+            self._window.removeEventFilter(self)
+            # 等本次绘制处理完成后再交接
+            QTimer.singleShot(0, self._on_first_paint)
+        return False
+    
+    def _on_timeout(self):
+        """超时兜底：未收到绘制事件也要关闭启动画面"""
+        if not self._done:
+            logger.warning(f"{FIRST_PAINT_TIMEOUT_MS}ms 内未收到主窗口绘制事件，强制关闭启动画面")
+            self._window.removeEventFilter(self)
+            self._on_first_paint()
+    
+    def _on_first_paint(self):
+        if self._done:
+            return
+        self._done = True
+        
+        if self._splash:
+            self._splash.finish(self._window)
+        
+        startup_profiler.mark("first_paint")
+        startup_profiler.finish()
+        
+        report = startup_profiler.report()
+        logger.info(report)
+        if self._print_report:
+            print(report, flush=True)
 
 
-def setup_application():
+def setup_application(argv=None):
     """设置应用程序"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QFont
+    
     # 创建应用程序实例
-    app = QApplication(sys.argv)
+    app = QApplication(argv if argv is not None else sys.argv)
     app.setApplicationName(APP_NAME)
     app.setApplicationVersion(APP_VERSION)
     app.setOrganizationName("幽梦工作室")
@@ -37,6 +123,9 @@ def setup_application():
 
 def show_splash_screen():
     """显示启动画面"""
+    from PyQt5.QtWidgets import QApplication, QSplashScreen
+    from PyQt5.QtGui import QPixmap
+    
     try:
         # 创建启动画面
         splash_pix = QPixmap(400, 300)
@@ -65,6 +154,8 @@ def show_splash_screen():
 
 def initialize_database():
     """初始化数据库"""
+    from data.database import init_database
+    
     try:
         logger.info("开始初始化数据库...")
         
@@ -77,7 +168,7 @@ def initialize_database():
         else:
             logger.error("数据库初始化失败")
             return False
-            
+    
     except Exception as e:
         logger.error(f"数据库初始化异常: {e}")
         logger.error(traceback.format_exc())
@@ -86,6 +177,8 @@ def initialize_database():
 
 def handle_uncaught_exception(exc_type, exc_value, exc_traceback):
     """处理未捕获的异常"""
+    from PyQt5.QtWidgets import QMessageBox
+    
     logger.critical("未捕获的异常:", exc_info=(exc_type, exc_value, exc_traceback))
     
     # 显示错误对话框
@@ -113,6 +206,18 @@ def handle_uncaught_exception(exc_type, exc_value, exc_traceback):
 
 def main():
     """主函数"""
+    # 解析命令行参数
+    args, qt_args = parse_arguments(sys.argv)
+    
+    # 单实例：已有实例在运行时把命令转发过去后退出（不创建界面，避免重复的自动重置与锁竞争）
+    single_instance = SingleInstance()
+    if not single_instance.acquire():
+        if single_instance.forward(build_instance_command(args)):
+            logger.info("已有实例在运行，命令已转发")
+            return 0
+        logger.error("已有实例在运行，但无法转发命令")
+        return 1
+    
     # 设置未捕获异常处理器
     sys.excepthook = handle_uncaught_exception
     
@@ -121,10 +226,16 @@ def main():
     logger.info("=" * 50)
     
     # 设置应用程序
-    app = setup_application()
+    with startup_profiler.phase("qt_application"):
+        from PyQt5.QtWidgets import QApplication, QMessageBox
+        app = setup_application(sys.argv[:1] + qt_args)
+    
+    # 尽早开始接收其他实例的命令（主窗口就绪前收到的命令先缓存）
+    single_instance.listen()
     
     # 显示启动画面
-    splash = show_splash_screen()
+    with startup_profiler.phase("splash"):
+        splash = show_splash_screen()
     
     try:
         # 初始化数据库
@@ -132,7 +243,10 @@ def main():
             splash.showMessage("正在初始化数据库...", Qt.AlignBottom | Qt.AlignHCenter, Qt.black)
             QApplication.processEvents()
         
-        if not initialize_database():
+        with startup_profiler.phase("db_init"):
+            db_ready = initialize_database()
+        
+        if not db_ready:
             if splash:
                 splash.close()
             
@@ -148,24 +262,61 @@ def main():
             splash.showMessage("正在加载主界面...", Qt.AlignBottom | Qt.AlignHCenter, Qt.black)
             QApplication.processEvents()
         
+        # 延迟导入界面与服务模块：先显示启动画面，再加载较重的模块
+        with startup_profiler.phase("imports.ui"):
+            from ui.main_window import MainWindow
+            from core.auto_reset_service import AutoResetService
+        
         logger.info("创建主窗口...")
-        main_window = MainWindow()
+        with startup_profiler.phase("main_window"):
+            main_window = MainWindow()
         
         # 创建并启动自动重置服务
         logger.info("初始化自动重置服务...")
-        auto_reset_service = AutoResetService(main_window.task_manager)
-        
-        # 连接重置信号到主窗口
-        auto_reset_service.daily_reset_performed.connect(main_window._on_daily_reset)
-        auto_reset_service.weekly_reset_performed.connect(main_window._on_weekly_reset)
-        
-        # 启动自动重置服务
-        auto_reset_service.start()
+        with startup_profiler.phase("auto_reset_service"):
+            auto_reset_service = AutoResetService(main_window.task_manager)
+            
+            # 连接重置信号到主窗口
+            auto_reset_service.daily_reset_performed.connect(main_window._on_daily_reset)
+            auto_reset_service.weekly_reset_performed.connect(main_window._on_weekly_reset)
+            
+            # 启动自动重置服务
+            auto_reset_service.start()
         
         # 保存服务引用
         main_window.auto_reset_service = auto_reset_service
         
+        # 回收站清理服务（后台分批删除超出容量或保留天数的任务）
+        with startup_profiler.phase("recycle_bin_purger"):
+            from core.recycle_bin_purger import RecycleBinPurger
+            recycle_bin_purger = RecycleBinPurger(main_window.task_manager)
+            main_window.task_manager.recycle_bin_updated.connect(recycle_bin_purger.request_purge)
+            recycle_bin_purger.purge_finished.connect(main_window._on_recycle_bin_purged)
+            recycle_bin_purger.start()
+        
+        # 数据库维护调度（空闲时增量回收、定期更新优化器统计）
+        with startup_profiler.phase("maintenance_scheduler"):
+            from core.maintenance_scheduler import MaintenanceScheduler
+            maintenance_scheduler = MaintenanceScheduler(main_window.task_manager)
+            maintenance_scheduler.start()
+        
+        # 数据库备份服务（按设置定期备份，设置页可立即备份或恢复）
+        with startup_profiler.phase("backup_service"):
+            from core.backup_service import BackupService
+            backup_service = BackupService(main_window.task_manager)
+            backup_service.backup_finished.connect(main_window._on_backup_finished)
+            backup_service.restore_finished.connect(main_window._on_restore_finished)
+            main_window.backup_service = backup_service
+            backup_service.start()
+        
+        # 启动界面卡顿检测
+        with startup_profiler.phase("stall_detector"):
+            from core.stall_detector import StallDetector
+            stall_detector = StallDetector()
+            stall_detector.start()
+        
         # 恢复窗口状态或使用默认值
+        startup_profiler.mark("window_restore")
         try:
             # 获取当前屏幕信息
             screen = app.primaryScreen()
@@ -199,34 +350,48 @@ def main():
                     center_x = screen_geometry.x() + (screen_width - default_width) // 2
                     center_y = screen_geometry.y() + (screen_height - default_height) // 2
                     main_window.setGeometry(center_x, center_y, default_width, default_height)
-                    
+        
         except Exception as e:
             logger.warning(f"恢复窗口状态失败: {e}")
             # 使用默认大小并居中
             main_window.resize(960, 540)
             main_window.move(100, 100)
         
-        # 关闭启动画面并显示主窗口
-        if splash:
-            # 延迟关闭启动画面，确保主窗口完全加载
-            QTimer.singleShot(500, splash.close)
-            QTimer.singleShot(500, main_window.show)
-        else:
+        # 显示主窗口；首帧绘制完成后再关闭启动画面
+        main_window._first_paint_watcher = FirstPaintWatcher(
+            main_window, splash, print_report=args.startup_report
+        )
+        if not main_window.isVisible():
             main_window.show()
         
+        # 处理其他实例转发的命令；本次启动自带的快速添加也按同样方式处理
+        single_instance.command_received.connect(main_window.handle_instance_command)
+        single_instance.set_ready()
+        if args.add:
+            main_window.handle_instance_command(build_instance_command(args))
+        
         logger.info("应用程序启动完成")
         
         # 运行应用程序
         return_code = app.exec_()
         
-        # 停止自动重置服务
+        # 停止后台服务与卡顿检测
         auto_reset_service.stop()
+        recycle_bin_purger.stop()
+        maintenance_scheduler.stop()
+        backup_service.stop()
+        stall_detector.stop()
+        single_instance.release()
+        
+        # 记录本次会话的SQL执行统计
+        from data.query_stats import query_stats
+        logger.info(query_stats.format_report())
         
         logger.info("应用程序退出")
         logger.info("=" * 50)
         
         return return_code
-        
+    
     except Exception as e:
         logger.error(f"应用程序启动失败: {e}")
         logger.error(traceback.format_exc())
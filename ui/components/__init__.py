@@ -1,16 +1,38 @@
 # -*- coding: utf-8 -*-
 """组件模块"""
 
-from .animated_stacked_widget import AnimatedStackedWidget
-from .search_bar import SearchBar
-from .sliding_panel import SlidingPanel
-from .task_form_widget import TaskFormWidget
-from .settings_widget import SettingsWidget
+import importlib
+
+# 组件名 -> 所在子模块（按需导入，避免导入包时加载全部组件）
+_LAZY_EXPORTS = {
+    'AnimatedStackedWidget': '.animated_stacked_widget',
+    'SearchBar': '.search_bar',
+    'SlidingPanel': '.sliding_panel',
+    'TaskFormWidget': '.task_form_widget',
+    'SettingsWidget': '.settings_widget',
+    'PerfHud': '.perf_hud',
+}
 
 __all__ = [
     'AnimatedStackedWidget', 
     'SearchBar', 
     'SlidingPanel',
     'TaskFormWidget',
-    'SettingsWidget'
+    'SettingsWidget',
+    'PerfHud'
 ]
+
+
+def __getattr__(name):
+    """PEP 562：首次访问组件时再导入对应子模块"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+性能浮层组件 - 显示事件循环卡顿、数据库延迟、列表控件数量、搜索缓存命中率与内存占用
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import Qt, QTimer, QEvent
+from PyQt5.QtWidgets import QFrame, QVBoxLayout, QLabel
+
+from data.query_stats import query_stats
+from ..styles.qq_style import QQStyle
+
+# 采样间隔（毫秒）：事件循环延迟探测与界面刷新
+PROBE_INTERVAL_MS = 100
+REFRESH_INTERVAL_MS = 1000
+
+# 超过该延迟视为一次卡顿（毫秒）
+STALL_THRESHOLD_MS = 50
+
+# 保留的卡顿记录与展示的数据库调用数
+STALL_HISTORY_SIZE = 50
+RECENT_DB_CALLS = 6
+
+# tracemalloc 保存的调用栈深度（1帧开销最小）
+TRACEMALLOC_FRAMES = 1
+
+# 开启 tracemalloc 前后各分配一次的对象数，用于估算其对内存分配的减速
+ALLOC_PROBE_COUNT = 20000
+
+
+def get_rss_bytes() -> Optional[int]:
+    """获取当前进程常驻内存（字节），不支持的平台返回None"""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm", "r") as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf("SC_PAGE_SIZE")
+        
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+            
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        
+        # macOS / BSD：只能拿到峰值（macOS 单位为字节，其余为KB）
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def _time_allocations() -> float:
+    """分配 ALLOC_PROBE_COUNT 个小列表的耗时（秒）"""
+    start = time.perf_counter()
+    for index in range(ALLOC_PROBE_COUNT):
+        [index]
+    return time.perf_counter() - start
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return "-"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+class PerfHud(QFrame):
+    """
+    性能浮层（覆盖在父窗口右上角）
+    
+    仅在可见时运行采样定时器；采样本身的耗时会被统计并显示，用于确认浮层开销低于 1% CPU。
+    tracemalloc 会拖慢进程内的每次内存分配，这部分不在上述开销之内，因此默认不开启，
+    需单独切换（toggle_memory_tracing），开启时显示实测的分配减速倍数。
+    """
+    
+    def __init__(self, parent, widget_counts: Optional[Callable[[], Dict[str, int]]] = None,
+                 search_cache_stats: Optional[Callable[[], Dict[str, float]]] = None):
+        """
+        初始化性能浮层
+        
+        Args:
+            parent: 父窗口（浮层跟随其尺寸定位）
+            widget_counts: 返回 {列表名: 控件数} 的回调
+            search_cache_stats: 返回搜索缓存统计（SearchCache.get_stats）的回调
+        """
+        super().__init__(parent)
+        self._widget_counts = widget_counts
+        self._search_cache_stats = search_cache_stats
+        self._stalls = deque(maxlen=STALL_HISTORY_SIZE)
+        self._max_lateness_ms = 0.0
+        self._expected_at = 0.0
+        self._overhead_s = 0.0
+        self._visible_since = 0.0
+        self._started_tracemalloc = False
+        self._tracemalloc_slowdown: Optional[float] = None
+        
+        self.setObjectName("perf_hud")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(f"""
+            QFrame#perf_hud {{
+                background-color: rgba(30, 30, 30, 210);
+                border-radius: 8px;
+            }}
+            QLabel {{
+                color: {QQStyle.WHITE};
+                font-family: Consolas, "Courier New", monospace;
+                font-size: 12px;
+            }}
+        """)
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 10, 12, 10)
+        self.text_label = QLabel()
+        self.text_label.setTextFormat(Qt.PlainText)
+        layout.addWidget(self.text_label)
+        
+        # 事件循环延迟探测：按固定间隔触发，实际触发时间与预期之差即为事件循环延迟
+        self._probe_timer = QTimer(self)
+        self._probe_timer.setTimerType(Qt.PreciseTimer)
+        self._probe_timer.timeout.connect(self._on_probe)
+        
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.timeout.connect(self._refresh)
+        
+        parent.installEventFilter(self)
+        self.hide()
+    
+    # ========== 显示控制 ==========
+    def toggle(self):
+        """切换浮层显示"""
+        if self.isVisible():
+            self.stop()
+        else:
+            self.start()
+    
+    def start(self):
+        """显示浮层并开始采样"""
+        self._stalls.clear()
+        self._max_lateness_ms = 0.0
+        self._overhead_s = 0.0
+        self._visible_since = time.perf_counter()
+        self._expected_at = self._visible_since + PROBE_INTERVAL_MS / 1000
+        
+        self._probe_timer.start(PROBE_INTERVAL_MS)
+        self._refresh_timer.start(REFRESH_INTERVAL_MS)
+        self._refresh()
+        self._reposition()
+        self.show()
+        self.raise_()
+    
+    def stop(self):
+        """隐藏浮层并停止采样"""
+        self._probe_timer.stop()
+        self._refresh_timer.stop()
+        self._stop_memory_tracing()
+        self.hide()
+    
+    def toggle_memory_tracing(self):
+        """切换 Python 内存分配跟踪（仅浮层可见时有效，隐藏浮层时自动关闭）"""
+        if not self.isVisible():
+            return
+        if self._started_tracemalloc:
+            self._stop_memory_tracing()
+        elif not tracemalloc.is_tracing():
+            # 开启前后各测两次分配耗时（取较小值），显示跟踪带来的减速
+            baseline = min(_time_allocations(), _time_allocations())
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+            self._tracemalloc_slowdown = min(_time_allocations(), _time_allocations()) / max(baseline, 1e-9)
+        self._refresh()
+    
+    def _stop_memory_tracing(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+            self._tracemalloc_slowdown = None
+    
+    def eventFilter(self, obj, event):
+        if obj is self.parent() and event.type() == QEvent.Resize and self.isVisible():
+            self._reposition()
+        return False
+    
+    def _reposition(self):
+        self.adjustSize()
+        parent = self.parentWidget()
+        if parent is not None:
+            self.move(parent.width() - self.width() - 16, 56)
+    
+    # ========== 采样 ==========
+    def _on_probe(self):
+        """记录事件循环延迟"""
+        start = time.perf_counter()
+        lateness_ms = (start - self._expected_at) * 1000
+        self._expected_at = start + PROBE_INTERVAL_MS / 1000
+        
+        if lateness_ms > self._max_lateness_ms:
+            self._max_lateness_ms = lateness_ms
+        if lateness_ms >= STALL_THRESHOLD_MS:
+            self._stalls.append((time.time(), lateness_ms))
+        
+        self._overhead_s += time.perf_counter() - start
+    
+    def _refresh(self):
+        """刷新显示内容"""
+        start = time.perf_counter()
+        lines = []
+        
+        # 事件循环
+        recent_stalls = [ms for ts, ms in self._stalls if time.time() - ts <= 10]
+        lines.append(f"事件循环  最大延迟 {self._max_lateness_ms:6.1f} ms（最近1秒）")
+        lines.append(
+            f"          卡顿≥{STALL_THRESHOLD_MS}ms: 10秒内 {len(recent_stalls)} 次"
+            + (f"，最长 {max(recent_stalls):.0f} ms" if recent_stalls else "")
+        )
+        self._max_lateness_ms = 0.0
+        
+        # 数据库
+        summary = query_stats.summary()
+        lines.append(
+            f"数据库    {summary['calls']} 次调用, 累计 {summary['total_ms']:.0f} ms, "
+            f"慢查询 {summary['slow_calls']} 次"
+        )
+        for call in reversed(query_stats.recent(RECENT_DB_CALLS)):
+            lines.append(f"  {call['elapsed_ms']:7.2f} ms  {call['sql'][:48]}")
+        
+        # 列表控件
+        if self._widget_counts:
+            counts = self._widget_counts()
+            lines.append("列表控件  " + "  ".join(f"{name}:{count}" for name, count in counts.items()))
+        
+        # 搜索缓存
+        if self._search_cache_stats:
+            cache = self._search_cache_stats()
+            lines.append(
+                f"搜索缓存  命中率 {cache['hit_rate'] * 100:.1f}% ({cache['hits']}/{cache['hits'] + cache['misses']}), "
+                f"{cache['entries']} 条, {_format_bytes(cache['bytes'])}"
+            )
+        
+        # 内存
+        lines.append(f"内存      RSS {_format_bytes(get_rss_bytes())}")
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f"          Python 当前 {_format_bytes(current)} / 峰值 {_format_bytes(peak)}")
+            if self._tracemalloc_slowdown is not None:
+                lines.append(f"          分配跟踪使内存分配慢 x{self._tracemalloc_slowdown:.1f}（不计入浮层开销）")
+        else:
+            lines.append("          Python 分配跟踪未开启（Ctrl+Shift+M，会拖慢所有内存分配）")
+        
+        # 浮层自身开销（采样 + 刷新耗时 / 可见时长）
+        self._overhead_s += time.perf_counter() - start
+        elapsed = max(time.perf_counter() - self._visible_since, 1e-6)
+        lines.append(f"浮层开销  {self._overhead_s / elapsed * 100:.2f}% CPU")
+        
+        self.text_label.setText("\n".join(lines))
+        self._reposition()
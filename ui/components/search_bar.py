@@ -3,7 +3,7 @@
 顶部搜索栏组件
 """
 
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt, QTimer
 from PyQt5.QtWidgets import (
     QWidget, QHBoxLayout, QLineEdit, 
     QPushButton, QLabel
@@ -12,6 +12,9 @@ from PyQt5.QtWidgets import (
 from ..styles.qq_style import QQStyle
 from config.settings import APP_NAME
 
+# 输入停顿多久后自动搜索（毫秒）
+SEARCH_DEBOUNCE_MS = 150
+
 
 class SearchBar(QWidget):
     """顶部搜索栏组件"""
@@ -28,6 +31,13 @@ class SearchBar(QWidget):
         self.setObjectName("search_bar")
         self.setFixedHeight(70)  # 增大高度
         
+        # 边输入边搜索：输入停顿后才发出搜索，避免每次按键都搜索
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self._on_debounce_timeout)
+        self._last_keyword = ""  # 最近一次发出的关键词
+        
         self._setup_ui()
         self._apply_styles()
     
@@ -59,7 +69,7 @@ class SearchBar(QWidget):
         # 搜索输入框
         self.search_input = QLineEdit()
         self.search_input.setObjectName("search_input_inner")
-        self.search_input.setPlaceholderText("输入关键词搜索任务...")
+        self.search_input.setPlaceholderText("搜索任务，如: 报告 tag:工作 p:>=2 due:<7d is:open")
         self.search_input.setMinimumWidth(300)
         self.search_input.setMinimumHeight(40)
         self.search_input.returnPressed.connect(self._on_search)
@@ -236,19 +246,35 @@ class SearchBar(QWidget):
         """)
     
     def _on_search(self):
-        """执行搜索 - 只在点击按钮或按回车时触发"""
+        """立即执行搜索 - 点击按钮或按回车时触发（跳过防抖等待）"""
+        self._debounce_timer.stop()
         keyword = self.search_input.text().strip()
         if keyword:
             # 使用模糊搜索作为默认模式
+            self._last_keyword = keyword
             self.search_triggered.emit(keyword, "fuzzy")
     
     def _on_text_changed(self, text):
-        """输入文本变化 - 控制清空按钮显示"""
+        """输入文本变化 - 控制清空按钮显示，并重新开始防抖计时"""
         self.clear_btn.setVisible(bool(text.strip()))
+        self._debounce_timer.start()
+    
+    def _on_debounce_timeout(self):
+        """输入停顿 - 关键词有变化时发出搜索，输入被删空时发出清空"""
+        keyword = self.search_input.text().strip()
+        if keyword == self._last_keyword:
+            return
+        self._last_keyword = keyword
+        if keyword:
+            self.search_triggered.emit(keyword, "fuzzy")
+        else:
+            self.search_cleared.emit()
     
     def _on_clear(self):
         """清空搜索"""
         self.search_input.clear()
+        self._debounce_timer.stop()
+        self._last_keyword = ""
         self.search_cleared.emit()
     
     def get_search_text(self):
@@ -256,8 +282,10 @@ class SearchBar(QWidget):
         return self.search_input.text().strip()
     
     def clear_search(self):
-        """清空搜索框"""
+        """清空搜索框（不发出清空信号）"""
         self.search_input.clear()
+        self._debounce_timer.stop()
+        self._last_keyword = ""
     
     def focus_search(self):
         """聚焦搜索框"""
@@ -6,7 +6,7 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QComboBox, QTimeEdit, QCheckBox, QSpinBox,
-    QPushButton, QLabel, QGroupBox, QScrollArea, QFrame
+    QPushButton, QLabel, QGroupBox, QScrollArea, QFrame, QFileDialog
 )
 from PyQt5.QtCore import Qt, QTime, pyqtSignal
 
@@ -21,6 +21,10 @@ class SettingsWidget(QWidget):
     # 信号
     settings_saved = pyqtSignal()
     settings_cancelled = pyqtSignal()
+    backup_requested = pyqtSignal()
+    restore_requested = pyqtSignal(str)  # 备份文件路径
+    export_requested = pyqtSignal(str)   # 导出文件路径
+    import_requested = pyqtSignal(str)   # 导入文件路径
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -128,6 +132,19 @@ class SettingsWidget(QWidget):
         capacity_layout.addWidget(self.capacity_spin, 1)
         recycle_layout.addLayout(capacity_layout)
         
+        # 保留天数
+        max_days_layout = QHBoxLayout()
+        max_days_label = QLabel("保留天数:")
+        max_days_label.setMinimumWidth(100)
+        self.max_days_spin = QSpinBox()
+        self.max_days_spin.setRange(0, 3650)
+        self.max_days_spin.setSpecialValueText("不按天数清理")
+        self.max_days_spin.setSuffix(" 天")
+        self.max_days_spin.setMinimumHeight(36)
+        max_days_layout.addWidget(max_days_label)
+        max_days_layout.addWidget(self.max_days_spin, 1)
+        recycle_layout.addLayout(max_days_layout)
+        
         form_layout.addWidget(recycle_group)
         
         # ===== 数据设置组 =====
@@ -151,6 +168,42 @@ class SettingsWidget(QWidget):
         backup_layout.addWidget(self.backup_interval_spin, 1)
         data_layout.addLayout(backup_layout)
         
+        # 备份保留数量
+        retention_layout = QHBoxLayout()
+        retention_label = QLabel("保留备份:")
+        retention_label.setMinimumWidth(100)
+        self.backup_retention_spin = QSpinBox()
+        self.backup_retention_spin.setRange(1, 100)
+        self.backup_retention_spin.setSuffix(" 份")
+        self.backup_retention_spin.setMinimumHeight(36)
+        retention_layout.addWidget(retention_label)
+        retention_layout.addWidget(self.backup_retention_spin, 1)
+        data_layout.addLayout(retention_layout)
+        
+        # 立即备份 / 从备份恢复
+        backup_btn_layout = QHBoxLayout()
+        self.backup_now_btn = QPushButton("立即备份")
+        self.backup_now_btn.setObjectName("data_action_btn")
+        self.backup_now_btn.setMinimumHeight(36)
+        self.restore_btn = QPushButton("从备份恢复...")
+        self.restore_btn.setObjectName("data_action_btn")
+        self.restore_btn.setMinimumHeight(36)
+        backup_btn_layout.addWidget(self.backup_now_btn)
+        backup_btn_layout.addWidget(self.restore_btn)
+        data_layout.addLayout(backup_btn_layout)
+        
+        # 导出 / 导入任务（JSON Lines / CSV）
+        transfer_btn_layout = QHBoxLayout()
+        self.export_btn = QPushButton("导出任务...")
+        self.export_btn.setObjectName("data_action_btn")
+        self.export_btn.setMinimumHeight(36)
+        self.import_btn = QPushButton("导入任务...")
+        self.import_btn.setObjectName("data_action_btn")
+        self.import_btn.setMinimumHeight(36)
+        transfer_btn_layout.addWidget(self.export_btn)
+        transfer_btn_layout.addWidget(self.import_btn)
+        data_layout.addLayout(transfer_btn_layout)
+        
         form_layout.addWidget(data_group)
         
         form_layout.addStretch()
@@ -205,6 +258,10 @@ class SettingsWidget(QWidget):
         """连接信号"""
         self.save_btn.clicked.connect(self._on_save)
         self.cancel_btn.clicked.connect(self.settings_cancelled.emit)
+        self.backup_now_btn.clicked.connect(self.backup_requested.emit)
+        self.restore_btn.clicked.connect(self._on_restore_clicked)
+        self.export_btn.clicked.connect(self._on_export_clicked)
+        self.import_btn.clicked.connect(self._on_import_clicked)
     
     def _apply_styles(self):
         """应用样式"""
@@ -261,6 +318,18 @@ class SettingsWidget(QWidget):
                 font-size: 14px;
                 color: {QQStyle.TEXT_REGULAR};
             }}
+            QPushButton#data_action_btn {{
+                background-color: {QQStyle.WHITE};
+                color: {QQStyle.TEXT_REGULAR};
+                border: 2px solid {QQStyle.BORDER};
+                border-radius: 6px;
+                font-size: 14px;
+                padding: 6px 12px;
+            }}
+            QPushButton#data_action_btn:hover {{
+                border-color: {QQStyle.PRIMARY};
+                color: {QQStyle.PRIMARY};
+            }}
         """)
     
     def _load_settings(self):
@@ -290,12 +359,18 @@ class SettingsWidget(QWidget):
         capacity = settings.get("task.recycle_bin_capacity", 100)
         self.capacity_spin.setValue(capacity)
         
+        max_days = settings.get("task.recycle_bin_max_days", 0)
+        self.max_days_spin.setValue(max_days)
+        
         # 数据设置
         auto_backup = settings.get("data.auto_backup", False)
         self.auto_backup_check.setChecked(auto_backup)
         
         backup_interval = settings.get("data.backup_interval", 7)
         self.backup_interval_spin.setValue(backup_interval)
+        
+        backup_retention = settings.get("data.backup_retention", 7)
+        self.backup_retention_spin.setValue(backup_retention)
     
     def _on_save(self):
         """保存设置"""
@@ -311,16 +386,44 @@ class SettingsWidget(QWidget):
         
         # 回收站设置
         settings.set("task.recycle_bin_capacity", self.capacity_spin.value(), auto_save=False)
+        settings.set("task.recycle_bin_max_days", self.max_days_spin.value(), auto_save=False)
         
         # 数据设置
         settings.set("data.auto_backup", self.auto_backup_check.isChecked(), auto_save=False)
         settings.set("data.backup_interval", self.backup_interval_spin.value(), auto_save=False)
+        settings.set("data.backup_retention", self.backup_retention_spin.value(), auto_save=False)
         
         # 保存到文件
         settings.save()
         
         self.settings_saved.emit()
     
+    def _on_restore_clicked(self):
+        """选择备份文件并请求恢复"""
+        from core.backup_service import BACKUP_DIR
+        
+        path, _ = QFileDialog.getOpenFileName(
+            self, "选择备份文件", BACKUP_DIR, "数据库备份 (*.db.gz *.db)"
+        )
+        if path:
+            self.restore_requested.emit(path)
+    
+    def _on_export_clicked(self):
+        """选择导出文件并请求导出"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出任务", "tasks.jsonl", "JSON Lines (*.jsonl);;CSV (*.csv)"
+        )
+        if path:
+            self.export_requested.emit(path)
+    
+    def _on_import_clicked(self):
+        """选择导入文件并请求导入"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入任务", "", "任务文件 (*.jsonl *.csv)"
+        )
+        if path:
+            self.import_requested.emit(path)
+    
     def reload_settings(self):
         """重新加载设置"""
         self._load_settings()
@@ -3,28 +3,49 @@
 主窗口 - QQ风格UI
 """
 
+import threading
+import time
+from typing import Optional
+
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
     QSplitter, QListWidget, QListWidgetItem,
     QPushButton, QLabel, QFrame, QScrollArea,
-    QMessageBox, QShortcut
+    QMessageBox, QShortcut, QInputDialog, QMenu
 )
-from PyQt5.QtCore import Qt, QSize, pyqtSignal, QPoint, QRect
+from PyQt5.QtCore import Qt, QSize, pyqtSignal, QPoint, QRect, QTimer
 from PyQt5.QtGui import QFont, QKeySequence, QCursor
 
 from core.task_manager import TaskManager
+from core.change_bus import change_bus, TAG_AFFECTING_KINDS
+from core.search_controller import SearchController, display_sort_key
+from core.search_ranker import top_hits
+from core.smart_views import SmartViewManager
+from core.single_instance import COMMAND_ADD_TASK
 from ui.task_card import TaskCard
-from ui.task_dialog import TaskDialog
-from ui.settings_dialog import SettingsDialog
-from ui.recycle_bin_dialog import RecycleBinDialog
 from ui.components.animated_stacked_widget import AnimatedStackedWidget
 from ui.components.search_bar import SearchBar
 from ui.components.sliding_panel import SlidingPanel
-from ui.components.task_form_widget import TaskFormWidget
-from ui.components.settings_widget import SettingsWidget
 from ui.styles.qq_style import QQStyle
 from config.settings import settings, APP_NAME
 from utils.logger import logger
+from utils.common import format_datetime
+from utils.startup_profiler import startup_profiler
+
+# 注：回收站对话框、任务表单、设置面板均在首次使用时再导入和创建，缩短冷启动时间
+
+# 分区 -> (页面索引, 页面标题)
+SECTION_PAGES = {
+    "daily": (0, "日常任务"),
+    "weekly": (1, "周常任务"),
+    "once": (2, "特殊任务"),
+}
+
+# 搜索结果分批更新列表：每个事件循环周期用于增删卡片的时间（毫秒，留出余量保证一帧以内）
+SEARCH_STREAM_BUDGET_MS = 8
+
+# 搜索结果每个列表先显示的卡片数，滚动到底部时再加载一页（卡片控件过多时列表布局本身就会卡顿）
+SEARCH_PAGE_SIZE = 100
 
 
 class MainWindow(QMainWindow):
@@ -32,6 +53,7 @@ class MainWindow(QMainWindow):
     
     # 信号定义
     section_changed = pyqtSignal(str)  # section_name
+    bulk_io_finished = pyqtSignal(str, dict)  # 操作类型(export/import), 结果
     
     # 边缘调整大小常量
     EDGE_MARGIN = 8  # 边缘检测区域宽度
@@ -47,8 +69,13 @@ class MainWindow(QMainWindow):
     EDGE_BOTTOM_LEFT = 7
     EDGE_BOTTOM_RIGHT = 8
     
-    def __init__(self):
-        """初始化主窗口"""
+    def __init__(self, task_manager: Optional[TaskManager] = None):
+        """
+        初始化主窗口
+        
+        Args:
+            task_manager: 任务管理器实例（用于依赖注入，方便测试和基准测试）
+        """
         super().__init__()
         
         # 无边框窗口拖拽支持
@@ -60,23 +87,54 @@ class MainWindow(QMainWindow):
         self._resize_start_geometry = None
         
         # 初始化任务管理器
-        self.task_manager = TaskManager()
+        self.task_manager = task_manager or TaskManager()
+        
+        # 边输入边搜索（后台线程匹配，结果分批合并到列表）
+        self.search_controller = SearchController(self.task_manager)
+        self._search_keyword = ""  # 当前生效的搜索关键词（空表示未在搜索）
+        self._search_mode = "fuzzy"
+        self._search_streams = []  # 待合并的列表差异
+        self._search_results = {}  # (分区, 是否完成) -> 按显示顺序排列的 SearchHit
+        self._search_limits = {}  # (分区, 是否完成) -> 当前显示的结果数
+        self._search_results_keyword = ""
+        self._search_refresh_ids = set()  # 数据已变化、合并结果时需要重建卡片的任务
+        self._search_stream_timer = QTimer(self)
+        self._search_stream_timer.setInterval(0)
+        self._search_stream_timer.timeout.connect(self._on_search_stream_tick)
+        
+        # 智能视图（成员集合随任务变更增量更新，需先于界面订阅 change_bus）
+        self.smart_views = SmartViewManager(self.task_manager)
+        self._view_items = {}  # 视图ID -> 侧边栏列表项
         
         # 当前状态
         self.current_section = "daily"  # 当前分区
         self.current_tag = None  # 当前标签筛选
+        self.current_view = None  # 当前打开的智能视图ID（与标签筛选互斥）
         self.current_selected_task_id = None  # 当前选中任务ID
         
-        # 初始化任务列表字典
+        # 初始化任务列表字典（页面按需创建）
         self.pending_lists = {}
         self.completed_lists = {}
+        self.stats_labels = {}
+        self._page_holders = {}
+        
+        # 右侧面板中延迟创建的页面
+        self.task_form = None
+        self.settings_widget = None
+        self._perf_hud = None
+        self.backup_service = None  # 由 main.py 创建后设置
+        
+        with startup_profiler.phase("ui_build"):
+            self._setup_ui()
+            self._connect_signals()
+            self._setup_shortcuts()
         
-        self._setup_ui()
-        self._connect_signals()
-        self._setup_shortcuts()
+        # 订阅配置变更（closeEvent 中取消订阅）
+        settings.subscribe("ui.default_section", self._on_default_section_changed)
         
         # 加载初始数据
-        self._load_initial_data()
+        with startup_profiler.phase("first_data_load"):
+            self._load_initial_data()
         
         logger.info("主窗口初始化完成")
     
@@ -213,6 +271,45 @@ class MainWindow(QMainWindow):
         self.tags_list.setStyleSheet(QQStyle.get_tag_list_style())
         layout.addWidget(self.tags_list)
         
+        # 智能视图区域（标题右侧为保存视图按钮）
+        views_header = QWidget()
+        views_header_layout = QHBoxLayout(views_header)
+        views_header_layout.setContentsMargins(0, 0, 0, 0)
+        views_title = QLabel("智能视图")
+        views_title.setObjectName("nav_title")
+        views_title.setStyleSheet(f"""
+            font-size: 14px;
+            color: {QQStyle.TEXT_SECONDARY};
+            padding: 10px 10px 6px 10px;
+            font-weight: bold;
+        """)
+        views_header_layout.addWidget(views_title)
+        views_header_layout.addStretch()
+        self.add_view_btn = QPushButton("+")
+        self.add_view_btn.setFixedSize(24, 24)
+        self.add_view_btn.setCursor(Qt.PointingHandCursor)
+        self.add_view_btn.setToolTip("保存智能视图（查询语法同搜索框）")
+        self.add_view_btn.setStyleSheet(f"""
+            QPushButton {{
+                background: transparent;
+                border: none;
+                font-size: 18px;
+                color: {QQStyle.TEXT_SECONDARY};
+            }}
+            QPushButton:hover {{
+                color: {QQStyle.PRIMARY};
+            }}
+        """)
+        views_header_layout.addWidget(self.add_view_btn)
+        layout.addWidget(views_header)
+        
+        self.views_list = QListWidget()
+        self.views_list.setObjectName("view_list")
+        self.views_list.setMaximumHeight(160)
+        self.views_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.views_list.setStyleSheet(QQStyle.get_tag_list_style())
+        layout.addWidget(self.views_list)
+        
         # 填充剩余空间
         layout.addStretch()
         
@@ -296,22 +393,38 @@ class MainWindow(QMainWindow):
         self.stacked_widget.set_animation_type(AnimatedStackedWidget.ANIMATION_NONE)
         self.stacked_widget.set_animation_duration(250)
         
-        # 日常任务页面
-        self.daily_page = self._create_task_page("daily", "日常任务")
-        self.stacked_widget.addWidget(self.daily_page)
-        
-        # 周常任务页面
-        self.weekly_page = self._create_task_page("weekly", "周常任务")
-        self.stacked_widget.addWidget(self.weekly_page)
-        
-        # 特殊任务页面
-        self.once_page = self._create_task_page("once", "特殊任务")
-        self.stacked_widget.addWidget(self.once_page)
+        # 为每个分区放置占位容器，保证页面索引固定；实际页面在首次显示时创建
+        for section in SECTION_PAGES:
+            holder = QWidget()
+            holder_layout = QVBoxLayout(holder)
+            holder_layout.setContentsMargins(0, 0, 0, 0)
+            self._page_holders[section] = holder
+            self.stacked_widget.addWidget(holder)
         
         layout.addWidget(self.stacked_widget)
         
         return panel
     
+    def _ensure_task_page(self, section: str) -> bool:
+        """
+        确保分区页面已创建（延迟构建非可见页面）
+        
+        Returns:
+            bool: 页面是否可用
+        """
+        if section in self.pending_lists:
+            return True
+        
+        holder = self._page_holders.get(section)
+        if holder is None:
+            return False
+        
+        _, title = SECTION_PAGES[section]
+        page = self._create_task_page(section, title)
+        holder.layout().addWidget(page)
+        logger.debug(f"已创建分区页面: {section}")
+        return True
+    
     def _create_task_page(self, section: str, title: str) -> QWidget:
         """创建任务页面"""
         page = QWidget()
@@ -340,7 +453,6 @@ class MainWindow(QMainWindow):
         header_layout.addStretch()
         
         # 任务统计
-        self.stats_labels = getattr(self, 'stats_labels', {})
         stats_label = QLabel("0 个任务")
         stats_label.setStyleSheet(f"""
             font-size: 15px;
@@ -377,6 +489,9 @@ class MainWindow(QMainWindow):
         self.pending_lists[section].setStyleSheet(QQStyle.get_task_list_style())
         self.pending_lists[section].setVerticalScrollMode(QListWidget.ScrollPerPixel)
         self.pending_lists[section].setMinimumHeight(180)
+        self.pending_lists[section].verticalScrollBar().valueChanged.connect(
+            lambda value, s=section: self._on_task_list_scrolled(s, False, value)
+        )
         list_layout.addWidget(self.pending_lists[section], 1)
         
         # 已完成任务标题
@@ -395,6 +510,9 @@ class MainWindow(QMainWindow):
         self.completed_lists[section].setStyleSheet(QQStyle.get_task_list_style())
         self.completed_lists[section].setVerticalScrollMode(QListWidget.ScrollPerPixel)
         self.completed_lists[section].setMaximumHeight(280)
+        self.completed_lists[section].verticalScrollBar().valueChanged.connect(
+            lambda value, s=section: self._on_task_list_scrolled(s, True, value)
+        )
         list_layout.addWidget(self.completed_lists[section])
         
         layout.addWidget(list_container, 1)
@@ -476,20 +594,10 @@ class MainWindow(QMainWindow):
         detail_btn_layout.addWidget(self.delete_btn)
         detail_layout.addLayout(detail_btn_layout)
         
+        self.detail_page = detail_page
         self.panel_stack.addWidget(detail_page)
         
-        # ===== 页面1: 任务表单 =====
-        self.task_form = TaskFormWidget()
-        self.task_form.task_submitted.connect(self._on_task_form_submitted)
-        self.task_form.form_cancelled.connect(self._on_form_cancelled)
-        self.panel_stack.addWidget(self.task_form)
-        
-        # ===== 页面2: 设置 =====
-        self.settings_widget = SettingsWidget()
-        self.settings_widget.settings_saved.connect(self._on_settings_saved)
-        self.settings_widget.settings_cancelled.connect(self._on_form_cancelled)
-        self.panel_stack.addWidget(self.settings_widget)
-        
+        # 任务表单页、设置页在首次打开时创建（见 _ensure_task_form / _ensure_settings_widget）
         panel.set_content(self.panel_stack)
         
         # 当前面板模式: 'detail', 'add_task', 'edit_task', 'settings'
@@ -497,6 +605,32 @@ class MainWindow(QMainWindow):
         
         return panel
     
+    def _ensure_task_form(self):
+        """获取任务表单页（首次调用时创建）"""
+        if self.task_form is None:
+            from ui.components.task_form_widget import TaskFormWidget
+            
+            self.task_form = TaskFormWidget()
+            self.task_form.task_submitted.connect(self._on_task_form_submitted)
+            self.task_form.form_cancelled.connect(self._on_form_cancelled)
+            self.panel_stack.addWidget(self.task_form)
+        return self.task_form
+    
+    def _ensure_settings_widget(self):
+        """获取设置页（首次调用时创建）"""
+        if self.settings_widget is None:
+            from ui.components.settings_widget import SettingsWidget
+            
+            self.settings_widget = SettingsWidget()
+            self.settings_widget.settings_saved.connect(self._on_settings_saved)
+            self.settings_widget.settings_cancelled.connect(self._on_form_cancelled)
+            self.settings_widget.backup_requested.connect(self._on_backup_requested)
+            self.settings_widget.restore_requested.connect(self._on_restore_requested)
+            self.settings_widget.export_requested.connect(self._on_export_requested)
+            self.settings_widget.import_requested.connect(self._on_import_requested)
+            self.panel_stack.addWidget(self.settings_widget)
+        return self.settings_widget
+    
     def _connect_signals(self):
         """连接信号"""
         # 窗口控制按钮
@@ -507,9 +641,13 @@ class MainWindow(QMainWindow):
         # 搜索栏信号
         self.search_bar.search_triggered.connect(self._on_search)
         self.search_bar.search_cleared.connect(self._on_search_cleared)
+        self.search_controller.results_ready.connect(self._on_search_results)
         self.search_bar.add_task_clicked.connect(self._on_add_task)
         self.search_bar.settings_clicked.connect(self._on_settings)
         
+        # 导入导出在后台线程执行，结果经信号回到主线程
+        self.bulk_io_finished.connect(self._on_bulk_io_finished)
+        
         # 分区按钮
         self.daily_btn.clicked.connect(lambda: self._switch_section("daily"))
         self.weekly_btn.clicked.connect(lambda: self._switch_section("weekly"))
@@ -518,17 +656,19 @@ class MainWindow(QMainWindow):
         # 堆叠窗口页面切换
         self.stacked_widget.page_changed.connect(self._on_page_changed)
         
-        # 任务管理器信号
-        self.task_manager.task_added.connect(self._on_task_added)
-        self.task_manager.task_updated.connect(self._on_task_updated)
-        self.task_manager.task_deleted.connect(self._on_task_deleted)
-        self.task_manager.task_completed.connect(self._on_task_completed)
-        self.task_manager.task_uncompleted.connect(self._on_task_uncompleted)
-        self.task_manager.tags_updated.connect(self._on_tags_updated)
+        # 任务变更（合并通知：一次操作只刷新一次）
+        change_bus.tasks_changed.connect(self._on_tasks_changed)
         
         # 标签列表点击事件
         self.tags_list.itemClicked.connect(self._on_tag_clicked)
         
+        # 智能视图
+        self.views_list.itemClicked.connect(self._on_view_clicked)
+        self.views_list.customContextMenuRequested.connect(self._on_view_context_menu)
+        self.add_view_btn.clicked.connect(self._on_add_view)
+        self.smart_views.views_changed.connect(self._load_views)
+        self.smart_views.counts_changed.connect(self._on_view_counts_changed)
+        
         # 回收站按钮
         self.recycle_bin_btn.clicked.connect(self._on_recycle_bin)
         
@@ -550,14 +690,66 @@ class MainWindow(QMainWindow):
         new_shortcut = QShortcut(QKeySequence("Ctrl+N"), self)
         new_shortcut.activated.connect(self._on_add_task)
         
+        # Ctrl+Z 撤销，Ctrl+Y / Ctrl+Shift+Z 重做（输入框获得焦点时仍为文字撤销）
+        undo_shortcut = QShortcut(QKeySequence.Undo, self)
+        undo_shortcut.activated.connect(self._on_undo)
+        for sequence in (QKeySequence("Ctrl+Y"), QKeySequence("Ctrl+Shift+Z")):
+            redo_shortcut = QShortcut(sequence, self)
+            redo_shortcut.activated.connect(self._on_redo)
+        
         # Escape 关闭右侧面板
         escape_shortcut = QShortcut(QKeySequence("Escape"), self)
         escape_shortcut.activated.connect(lambda: self.right_panel.hide_panel())
+        
+        # Ctrl+Shift+P 切换性能浮层
+        perf_hud_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        perf_hud_shortcut.activated.connect(self._toggle_perf_hud)
+    
+        # Ctrl+Shift+M 切换性能浮层中的 Python 内存分配跟踪（单独开启，会拖慢所有内存分配）
+        perf_hud_memory_shortcut = QShortcut(QKeySequence("Ctrl+Shift+M"), self)
+        perf_hud_memory_shortcut.activated.connect(self._toggle_perf_hud_memory)
+    
+    def _on_undo(self):
+        """撤销最近一次任务操作"""
+        label = self.task_manager.undo()
+        self.statusBar().showMessage(f"已撤销: {label}" if label else "没有可撤销的操作", 3000)
+    
+    def _on_redo(self):
+        """重做最近一次撤销的操作"""
+        label = self.task_manager.redo()
+        self.statusBar().showMessage(f"已重做: {label}" if label else "没有可重做的操作", 3000)
+    
+    def _toggle_perf_hud(self):
+        """切换性能浮层（首次使用时创建）"""
+        if self._perf_hud is None:
+            from ui.components.perf_hud import PerfHud
+            
+            self._perf_hud = PerfHud(
+                self,
+                widget_counts=self._get_list_widget_counts,
+                search_cache_stats=self.task_manager.search_cache.get_stats
+            )
+        self._perf_hud.toggle()
+    
+    def _toggle_perf_hud_memory(self):
+        """切换性能浮层的内存分配跟踪（浮层未显示时忽略）"""
+        if self._perf_hud is not None:
+            self._perf_hud.toggle_memory_tracing()
+    
+    def _get_list_widget_counts(self) -> dict:
+        """各任务列表中的卡片控件数量（供性能浮层显示）"""
+        counts = {}
+        for section in SECTION_PAGES:
+            if section in self.pending_lists:
+                counts[f"{section}待办"] = self.pending_lists[section].count()
+                counts[f"{section}完成"] = self.completed_lists[section].count()
+        return counts
     
     def _load_initial_data(self):
         """加载初始数据"""
-        # 加载标签
+        # 加载标签与智能视图
         self._load_tags()
+        self._load_views()
         
         # 加载当前分区的任务
         self._load_tasks(self.current_section)
@@ -568,14 +760,23 @@ class MainWindow(QMainWindow):
     def _load_tasks(self, section: str):
         """加载指定分区的任务"""
         try:
+            if not self._ensure_task_page(section):
+                return
+            
+            # 整体重新加载，放弃尚未合并完的搜索结果
+            self._stop_search_stream()
+            
             # 清空现有任务列表
             if section in self.pending_lists:
                 self.pending_lists[section].clear()
             if section in self.completed_lists:
                 self.completed_lists[section].clear()
             
-            # 获取任务数据
-            tasks = self.task_manager.get_tasks(section=section, tag=self.current_tag)
+            # 获取任务数据（打开智能视图时按视图成员读取）
+            if self.current_view is not None:
+                tasks = self.smart_views.get_tasks(self.current_view, section=section)
+            else:
+                tasks = self.task_manager.get_tasks(section=section, tag=self.current_tag)
             
             logger.debug(f"加载分区 {section} 的任务，共 {len(tasks)} 个")
             
@@ -590,8 +791,8 @@ class MainWindow(QMainWindow):
                     pending_tasks.append(task)
             
             # 按优先级降序排序（高优先级在前），相同优先级按创建时间降序
-            pending_tasks.sort(key=lambda x: (-x.get("priority", 1), x.get("created_at", "")), reverse=False)
-            completed_tasks.sort(key=lambda x: (-x.get("priority", 1), x.get("created_at", "")), reverse=False)
+            pending_tasks.sort(key=display_sort_key)
+            completed_tasks.sort(key=display_sort_key)
             
             # 添加待办任务
             for task in pending_tasks:
@@ -611,11 +812,12 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"加载任务失败: {e}")
     
-    def _add_task_to_list(self, section: str, task_data: dict, is_completed: bool = False):
-        """添加任务到列表"""
+    def _add_task_to_list(self, section: str, task_data: dict, is_completed: bool = False,
+                          row: Optional[int] = None, highlights: Optional[dict] = None):
+        """添加任务到列表（row 为插入位置，默认追加到末尾；highlights 为搜索匹配位置）"""
         try:
             # 创建任务卡片
-            task_card = TaskCard(task_data)
+            task_card = TaskCard(task_data, highlights=highlights)
             
             # 连接信号
             task_card.completed.connect(self._on_task_card_completed)
@@ -624,6 +826,7 @@ class MainWindow(QMainWindow):
             
             # 创建列表项
             item = QListWidgetItem()
+            item.setData(Qt.UserRole, task_data.get("id"))  # 搜索结果合并时按ID比对
             card_size = task_card.sizeHint()
             item.setSizeHint(QSize(card_size.width(), card_size.height() + 8))
             
@@ -635,7 +838,10 @@ class MainWindow(QMainWindow):
             
             # 注意：PyQt5的QWidget在布尔上下文中可能返回False，需要用is not None检查
             if list_widget is not None:
-                list_widget.addItem(item)
+                if row is None:
+                    list_widget.addItem(item)
+                else:
+                    list_widget.insertItem(row, item)
                 list_widget.setItemWidget(item, task_card)
                 
         except Exception as e:
@@ -671,6 +877,37 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"加载标签失败: {e}")
     
+    def _load_views(self):
+        """加载智能视图列表（角标为视图成员数）"""
+        try:
+            self.views_list.clear()
+            self._view_items = {}
+            
+            for view in self.smart_views.get_views():
+                item = QListWidgetItem(f"{view.name} ({view.count})")
+                item.setData(Qt.UserRole, view.id)
+                item.setToolTip(view.query)
+                self.views_list.addItem(item)
+                self._view_items[view.id] = item
+                if view.id == self.current_view:
+                    self.views_list.setCurrentItem(item)
+            
+            # 当前视图已被删除时回到全部任务
+            if self.current_view is not None and self.current_view not in self._view_items:
+                self.current_view = None
+                self._load_tasks(self.current_section)
+                
+        except Exception as e:
+            logger.error(f"加载智能视图失败: {e}")
+    
+    def _on_view_counts_changed(self, counts: dict):
+        """视图成员数变化 - 只更新对应列表项的角标"""
+        for view_id, count in counts.items():
+            item = self._view_items.get(view_id)
+            view = self.smart_views.get_view(view_id)
+            if item is not None and view is not None:
+                item.setText(f"{view.name} ({count})")
+    
     def _switch_section(self, section: str):
         """切换分区"""
         if section == self.current_section:
@@ -682,7 +919,8 @@ class MainWindow(QMainWindow):
         self.once_btn.setChecked(section == "once")
         
         # 更新堆叠窗口（带动画）
-        page_index = {"daily": 0, "weekly": 1, "once": 2}.get(section, 0)
+        self._ensure_task_page(section)
+        page_index = SECTION_PAGES.get(section, (0, ""))[0]
         self.stacked_widget.setCurrentIndex(page_index)
         
         # 更新当前分区
@@ -691,8 +929,9 @@ class MainWindow(QMainWindow):
         # 发射信号
         self.section_changed.emit(section)
         
-        # 加载任务
-        self._load_tasks(section)
+        # 加载任务（搜索中各分区显示的是搜索结果，不重新加载）
+        if not self._search_keyword:
+            self._load_tasks(section)
     
     def _on_page_changed(self, index: int):
         """页面切换完成事件"""
@@ -719,17 +958,19 @@ class MainWindow(QMainWindow):
         self._panel_mode = 'add_task'
         self.right_panel.set_title("添加任务")
         
+        task_form = self._ensure_task_form()
+        
         # 加载所有可用标签
         all_tags = self.task_manager.repository.get_all_tag_names()
-        self.task_form.set_available_tags(all_tags)
+        task_form.set_available_tags(all_tags)
         
-        self.task_form.clear_form()
+        task_form.clear_form()
         
         # 设置默认分区为当前分区
-        section_index = {"daily": 0, "weekly": 1, "once": 2}.get(self.current_section, 0)
-        self.task_form.section_combo.setCurrentIndex(section_index)
+        section_index = SECTION_PAGES.get(self.current_section, (0, ""))[0]
+        task_form.section_combo.setCurrentIndex(section_index)
         
-        self.panel_stack.setCurrentIndex(1)  # 切换到任务表单页
+        self.panel_stack.setCurrentWidget(task_form)  # 切换到任务表单页
         
         if not self.right_panel.is_expanded():
             self.right_panel.show_panel()
@@ -746,6 +987,9 @@ class MainWindow(QMainWindow):
                 once_pending = section_stats.get("once", {}).get("pending", 0)
                 
                 status_text = f"日常: {daily_pending} | 周常: {weekly_pending} | 特殊: {once_pending}"
+                overdue = stats.get("total", {}).get("overdue", 0)
+                if overdue:
+                    status_text += f" | 逾期: {overdue}"
                 self.statusBar().showMessage(status_text)
                 
         except Exception as e:
@@ -806,7 +1050,7 @@ class MainWindow(QMainWindow):
                 # 切换到详情模式
                 self._panel_mode = 'detail'
                 self.right_panel.set_title("任务详情")
-                self.panel_stack.setCurrentIndex(0)  # 确保显示详情页
+                self.panel_stack.setCurrentWidget(self.detail_page)  # 确保显示详情页
                 
                 self._show_task_detail(task)
                 self.current_selected_task_id = task_id
@@ -828,6 +1072,8 @@ class MainWindow(QMainWindow):
         try:
             tag_name = item.data(Qt.UserRole)
             self.current_tag = tag_name
+            self.current_view = None
+            self.views_list.clearSelection()
             
             self._load_tasks(self.current_section)
             
@@ -839,9 +1085,70 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"标签筛选失败: {e}")
     
-    def _on_tags_updated(self):
-        """标签更新事件"""
-        self._load_tags()
+    def _on_view_clicked(self, item):
+        """智能视图点击事件 - 再次点击当前视图时关闭视图"""
+        try:
+            view_id = item.data(Qt.UserRole)
+            view = self.smart_views.get_view(view_id)
+            if view is None:
+                return
+            
+            if view_id == self.current_view:
+                self.current_view = None
+                self.views_list.clearSelection()
+                self.statusBar().showMessage("显示全部任务", 3000)
+            else:
+                self.current_view = view_id
+                self.current_tag = None
+                self.tags_list.setCurrentRow(0)
+                self.statusBar().showMessage(f"智能视图: {view.name}（{view.count}个任务）", 3000)
+            
+            self._load_tasks(self.current_section)
+            
+        except Exception as e:
+            logger.error(f"打开智能视图失败: {e}")
+    
+    def _on_add_view(self):
+        """保存智能视图（查询默认取当前搜索内容）"""
+        name, ok = QInputDialog.getText(self, "保存智能视图", "视图名称:")
+        if not ok or not name.strip():
+            return
+        query, ok = QInputDialog.getText(
+            self, "保存智能视图", "查询（如 p:>=2 due:<7d is:open、section:weekly tag:健身）:",
+            text=self._search_keyword
+        )
+        if not ok or not query.strip():
+            return
+        if self.smart_views.add_view(name, query) == -1:
+            QMessageBox.warning(self, "保存失败", f"无法保存智能视图“{name.strip()}”，名称可能已存在")
+    
+    def _on_view_context_menu(self, pos: QPoint):
+        """智能视图右键菜单：编辑、删除"""
+        item = self.views_list.itemAt(pos)
+        if item is None:
+            return
+        view = self.smart_views.get_view(item.data(Qt.UserRole))
+        if view is None:
+            return
+        
+        menu = QMenu(self)
+        edit_action = menu.addAction("编辑")
+        delete_action = menu.addAction("删除")
+        action = menu.exec_(self.views_list.mapToGlobal(pos))
+        
+        if action == edit_action:
+            name, ok = QInputDialog.getText(self, "编辑智能视图", "视图名称:", text=view.name)
+            if not ok or not name.strip():
+                return
+            query, ok = QInputDialog.getText(self, "编辑智能视图", "查询:", text=view.query)
+            if not ok or not query.strip():
+                return
+            if not self.smart_views.update_view(view.id, name, query):
+                QMessageBox.warning(self, "保存失败", f"无法修改智能视图“{view.name}”")
+            elif view.id == self.current_view:
+                self._load_tasks(self.current_section)
+        elif action == delete_action:
+            self.smart_views.delete_view(view.id)
     
     def _show_task_detail(self, task: dict):
         """显示任务详情"""
@@ -857,12 +1164,7 @@ class MainWindow(QMainWindow):
             tags = task.get("tags", [])
             
             # 格式化创建时间（只精确到秒）
-            if created_at:
-                # 处理 ISO 格式时间，截取到秒
-                if "." in created_at:
-                    created_at = created_at.split(".")[0]
-                if "T" in created_at:
-                    created_at = created_at.replace("T", " ")
+            created_at = format_datetime(created_at)
             
             section_names = {
                 "daily": "日常任务",
@@ -947,12 +1249,14 @@ class MainWindow(QMainWindow):
             self._panel_mode = 'edit_task'
             self.right_panel.set_title("编辑任务")
             
+            task_form = self._ensure_task_form()
+            
             # 加载所有可用标签
             all_tags = self.task_manager.repository.get_all_tag_names()
-            self.task_form.set_available_tags(all_tags)
+            task_form.set_available_tags(all_tags)
             
-            self.task_form.set_task_data(task)
-            self.panel_stack.setCurrentIndex(1)  # 切换到任务表单页
+            task_form.set_task_data(task)
+            self.panel_stack.setCurrentWidget(task_form)  # 切换到任务表单页
             
             if not self.right_panel.is_expanded():
                 self.right_panel.show_panel()
@@ -962,32 +1266,174 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "错误", f"编辑任务失败: {str(e)}")
     
     def _on_search(self, keyword: str, mode: str):
-        """搜索任务"""
+        """搜索任务（后台执行，结果由 _on_search_results 合并到列表）"""
         if not keyword:
             # 清空搜索时恢复原来的任务列表
-            self._load_tasks(self.current_section)
-            self.statusBar().showMessage("已清除搜索", 2000)
+            self._on_search_cleared()
             return
         
-        results = self.task_manager.search_tasks(keyword, mode)
+        self._search_keyword = keyword
+        self._search_mode = mode
+        self.search_controller.search(keyword, mode)
+    
+    def _on_search_results(self, generation: int, keyword: str, results: list):
+        """搜索完成 - 与当前列表比对，分批增删卡片（不清空列表）"""
+        if not self._search_keyword or not self.search_controller.is_current(generation):
+            return  # 已被更新的输入取代或搜索已清空
         
         # 显示搜索结果数量
         self.statusBar().showMessage(f"找到 {len(results)} 个匹配的任务", 3000)
         
-        # 清空所有任务列表
-        for section in self.pending_lists:
-            self.pending_lists[section].clear()
-        for section in self.completed_lists:
-            self.completed_lists[section].clear()
+        # 搜索结果可能落在任意分区，先确保所有分区页面已创建
+        for section in SECTION_PAGES:
+            self._ensure_task_page(section)
+        
+        # 按分区和完成状态分组（结果已按显示顺序排列，每个列表显示时再按得分选出前几页）
+        grouped = {(section, completed): [] for section in SECTION_PAGES for completed in (False, True)}
+        for hit in results:
+            task = hit.task
+            key = (task.get("section", "daily"), bool(task.get("is_completed", False)))
+            if key in grouped:
+                grouped[key].append(hit)
+        
+        # 关键词变化时每个列表从第一页开始显示；同一关键词重新搜索（数据变化）时保留已加载的页数
+        if not self._search_limits or keyword != self._search_results_keyword:
+            self._search_limits = {key: SEARCH_PAGE_SIZE for key in grouped}
+        self._search_results = grouped
+        self._search_results_keyword = keyword
+        
+        # 当前分区优先合并
+        order = sorted(grouped, key=lambda key: key[0] != self.current_section)
+        self._search_streams = [stream for stream in map(self._create_list_diff, order) if stream]
+        self._search_stream_timer.start()
+    
+    def _create_list_diff(self, key: tuple) -> Optional[dict]:
+        """为一个列表创建待合并的差异（目标为该列表当前显示页数内得分最高的搜索结果）"""
+        section, completed = key
+        lists = self.completed_lists if completed else self.pending_lists
+        list_widget = lists.get(section)
+        if list_widget is None:
+            return None
+        
+        hits = top_hits(self._search_results.get(key, []), self._search_limits.get(key, SEARCH_PAGE_SIZE))
+        wanted = {hit.task["id"] for hit in hits}
+        present = {list_widget.item(row).data(Qt.UserRole) for row in range(list_widget.count())}
+        
+        # 需要移除的卡片很多时（如从完整分区列表进入搜索）直接清空，逐个移除每次都会重新布局
+        if len(present - wanted) > SEARCH_PAGE_SIZE:
+            list_widget.clear()
+            present = set()
+        
+        return {
+            "section": section,
+            "completed": completed,
+            "list": list_widget,
+            "hits": hits,
+            "wanted": wanted,
+            "present": present,
+            "index": 0,
+            "row": 0,
+        }
+    
+    def _on_task_list_scrolled(self, section: str, completed: bool, value: int):
+        """搜索结果列表滚动到底部时加载下一页"""
+        if not self._search_keyword:
+            return
+        
+        key = (section, completed)
+        lists = self.completed_lists if completed else self.pending_lists
+        list_widget = lists.get(section)
+        limit = self._search_limits.get(key, SEARCH_PAGE_SIZE)
+        if list_widget is None or value < list_widget.verticalScrollBar().maximum():
+            return
+        if limit >= len(self._search_results.get(key, [])):
+            return
+        if any(stream["list"] is list_widget for stream in self._search_streams):
+            return  # 上一页仍在合并
+        
+        self._search_limits[key] = limit + SEARCH_PAGE_SIZE
+        stream = self._create_list_diff(key)
+        if stream:
+            self._search_streams.append(stream)
+            self._search_stream_timer.start()
+    
+    def _on_search_stream_tick(self):
+        """每个事件循环周期合并一批搜索结果（限时，超时留到下一周期继续）"""
+        deadline = time.perf_counter() + SEARCH_STREAM_BUDGET_MS / 1000
+        while self._search_streams:
+            if not self._advance_list_diff(self._search_streams[0], deadline):
+                return
+            self._search_streams.pop(0)
         
-        # 显示搜索结果
-        for task in results:
-            section = task.get("section", "daily")
-            is_completed = task.get("is_completed", False)
-            self._add_task_to_list(section, task, is_completed)
+        self._stop_search_stream()
+    
+    def _advance_list_diff(self, stream: dict, deadline: float) -> bool:
+        """
+        将列表逐行调整为目标顺序，到达截止时间时暂停
+        
+        列表中已有且位置正确的卡片原样保留（数据有变化时重建），多余的移除，缺少的插入。
+        
+        Returns:
+            bool: 该列表是否已合并完成
+        """
+        list_widget = stream["list"]
+        hits = stream["hits"]
+        wanted = stream["wanted"]
+        present = stream["present"]
+        
+        while True:
+            row = stream["row"]
+            index = stream["index"]
+            next_hit = hits[index] if index < len(hits) else None
+            next_task = next_hit.task if next_hit is not None else None
+            
+            if row < list_widget.count():
+                task_id = list_widget.item(row).data(Qt.UserRole)
+                if next_task is not None and task_id == next_task["id"]:
+                    present.discard(task_id)
+                    stream["row"] += 1
+                    stream["index"] += 1
+                    card = list_widget.itemWidget(list_widget.item(row))
+                    if card is not None:
+                        card.set_highlights(next_hit.spans)  # 关键词变化时匹配位置随之变化
+                    if task_id in self._search_refresh_ids:
+                        # 位置正确但数据已变化：替换为新卡片
+                        self._search_refresh_ids.discard(task_id)
+                        list_widget.takeItem(row)
+                        self._add_task_to_list(stream["section"], next_task, stream["completed"], row=row,
+                                               highlights=next_hit.spans)
+                        if time.perf_counter() >= deadline:
+                            return False
+                    continue
+                if task_id not in wanted or next_task is None or next_task["id"] in present:
+                    # 不再匹配，或排在了后面应出现的卡片之前：移除（需要时稍后重新插入）
+                    present.discard(task_id)
+                    list_widget.takeItem(row)
+                    if time.perf_counter() >= deadline:
+                        return False
+                    continue
+            elif next_task is None:
+                return True
+            
+            self._add_task_to_list(stream["section"], next_task, stream["completed"], row=row,
+                                   highlights=next_hit.spans)
+            stream["row"] += 1
+            stream["index"] += 1
+            if time.perf_counter() >= deadline:
+                return False
+    
+    def _stop_search_stream(self):
+        """停止合并搜索结果"""
+        self._search_stream_timer.stop()
+        self._search_streams = []
     
     def _on_search_cleared(self):
         """搜索清空事件"""
+        self._search_keyword = ""
+        self._search_refresh_ids = set()
+        self._search_results = {}
+        self._search_limits = {}
+        self.search_controller.cancel()
         self._load_tasks(self.current_section)
         self.statusBar().showMessage("已清除搜索", 2000)
     
@@ -1000,16 +1446,16 @@ class MainWindow(QMainWindow):
         
         self._panel_mode = 'settings'
         self.right_panel.set_title("设置")
-        self.settings_widget.reload_settings()
-        self.panel_stack.setCurrentIndex(2)  # 切换到设置页
+        settings_widget = self._ensure_settings_widget()
+        settings_widget.reload_settings()
+        self.panel_stack.setCurrentWidget(settings_widget)  # 切换到设置页
         
         if not self.right_panel.is_expanded():
             self.right_panel.show_panel()
     
-    def _apply_settings(self):
-        """应用设置"""
+    def _on_default_section_changed(self, default_section: int):
+        """默认分区设置变更 - 切换到新的默认分区"""
         try:
-            default_section = settings.get("ui.default_section", 0)
             sections = ["daily", "weekly", "once"]
             if 0 <= default_section < len(sections):
                 self._switch_section(sections[default_section])
@@ -1019,10 +1465,120 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"应用设置失败: {e}")
     
+    def handle_instance_command(self, message: dict):
+        """处理再次启动时转发来的命令（见 core.single_instance）"""
+        try:
+            if message.get("command") == COMMAND_ADD_TASK:
+                title = str(message.get("title") or "").strip()
+                section = message.get("section") or "once"
+                task_id = self.task_manager.add_task(title, section) if title else -1
+                if task_id != -1:
+                    self.statusBar().showMessage(f"已快速添加任务: {title}", 3000)
+                else:
+                    self.statusBar().showMessage("快速添加任务失败", 3000)
+                return
+            
+            # 激活主窗口（最小化时先还原）
+            if self.isMinimized():
+                self.showNormal()
+            self.show()
+            self.raise_()
+            self.activateWindow()
+        except Exception as e:
+            logger.error(f"处理实例命令失败: {e}")
+    
+    def _on_backup_requested(self):
+        """立即备份（后台执行，完成后在状态栏提示）"""
+        if self.backup_service is None:
+            return
+        self.statusBar().showMessage("正在备份数据库...")
+        self.backup_service.backup_async()
+    
+    def _on_backup_finished(self, report: dict):
+        """备份完成事件"""
+        if report:
+            self.statusBar().showMessage(f"备份完成: {report['path']}", 5000)
+        else:
+            self.statusBar().showMessage("备份失败，详见日志", 5000)
+    
+    def _on_recycle_bin_purged(self, report: dict):
+        """回收站自动清理完成事件（永久删除了任务时提示用户）"""
+        if report.get("rows"):
+            self.statusBar().showMessage(
+                f"回收站已自动永久删除 {report['rows']} 个任务（超出容量或保留天数），此前的操作不可再撤销",
+                8000,
+            )
+    
+    def _on_restore_requested(self, backup_path: str):
+        """从备份恢复（后台执行，完成后在状态栏提示）"""
+        if self.backup_service is None:
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "确认恢复",
+            f"确定要从以下备份恢复吗？\n\n{backup_path}\n\n当前数据会先自动备份，然后被备份内容覆盖。",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.statusBar().showMessage("正在从备份恢复...")
+        self.backup_service.restore_async(backup_path)
+    
+    def _on_restore_finished(self, success: bool):
+        """恢复完成事件"""
+        if success:
+            self.statusBar().showMessage("已从备份恢复", 5000)
+        else:
+            self.statusBar().clearMessage()
+            QMessageBox.warning(self, "恢复失败", "备份文件校验未通过、当前数据备份失败或恢复失败，详见日志。")
+    
+    def _on_export_requested(self, path: str):
+        """导出任务（后台执行）"""
+        self.statusBar().showMessage("正在导出任务...")
+        
+        def worker():
+            count = self.task_manager.export_tasks(path)
+            self.bulk_io_finished.emit("export", {"path": path, "count": count})
+        
+        threading.Thread(target=worker, name="TaskExport", daemon=True).start()
+    
+    def _on_import_requested(self, path: str):
+        """导入任务（后台执行，完成后由 change_bus 通知刷新列表）"""
+        self.statusBar().showMessage("正在导入任务...")
+        
+        def worker():
+            stats = self.task_manager.import_tasks(path)
+            self.bulk_io_finished.emit("import", {"path": path, **stats})
+        
+        threading.Thread(target=worker, name="TaskImport", daemon=True).start()
+    
+    def _on_bulk_io_finished(self, operation: str, result: dict):
+        """导入导出完成事件"""
+        if operation == "export":
+            if result["count"] >= 0:
+                self.statusBar().showMessage(f"已导出 {result['count']} 个任务: {result['path']}", 5000)
+            else:
+                QMessageBox.warning(self, "导出失败", "导出任务失败，详见日志。")
+            return
+        
+        if "imported" not in result:
+            QMessageBox.warning(self, "导入失败", "导入任务失败，详见日志。已提交的批次不会回滚。")
+            return
+        
+        message = f"已导入 {result['imported']} 个任务"
+        if result["skipped"]:
+            message += f"，跳过 {result['skipped']} 条无效记录"
+        self.statusBar().showMessage(message, 5000)
+    
     def _on_recycle_bin(self):
         """打开回收站"""
         try:
-            dialog = RecycleBinDialog(self)
+            from ui.recycle_bin_dialog import RecycleBinDialog
+            
+            dialog = RecycleBinDialog(self, self.task_manager)
             dialog.task_restored.connect(self._on_task_restored)
             dialog.task_permanently_deleted.connect(self._on_task_permanently_deleted)
             
@@ -1034,21 +1590,12 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "错误", f"打开回收站失败: {str(e)}")
     
     def _on_task_restored(self, task_id: int):
-        """任务恢复事件"""
-        try:
-            self._load_tasks(self.current_section)
-            self._update_stats()
-            logger.info(f"任务 {task_id} 已恢复")
-        except Exception as e:
-            logger.error(f"处理任务恢复事件失败: {e}")
+        """任务恢复事件（界面刷新由变更总线统一处理）"""
+        logger.info(f"任务 {task_id} 已恢复")
     
     def _on_task_permanently_deleted(self, task_id: int):
-        """任务永久删除事件"""
-        try:
-            self._update_stats()
-            logger.info(f"任务 {task_id} 已永久删除")
-        except Exception as e:
-            logger.error(f"处理任务永久删除事件失败: {e}")
+        """任务永久删除事件（界面刷新由变更总线统一处理）"""
+        logger.info(f"任务 {task_id} 已永久删除")
     
     def _on_panel_shown(self):
         """面板显示事件"""
@@ -1059,49 +1606,37 @@ class MainWindow(QMainWindow):
         pass
     
     def _on_daily_reset(self, reset_count: int):
-        """日常重置事件"""
+        """日常重置事件（界面刷新由变更总线统一处理）"""
         try:
-            self._load_tasks(self.current_section)
-            self._update_stats()
             self.statusBar().showMessage(f"日常重置完成: 重置了{reset_count}个任务", 5000)
             logger.info(f"日常重置完成: 重置了{reset_count}个任务")
         except Exception as e:
             logger.error(f"处理日常重置事件失败: {e}")
     
     def _on_weekly_reset(self, reset_count: int):
-        """周常重置事件"""
+        """周常重置事件（界面刷新由变更总线统一处理）"""
         try:
-            self._load_tasks(self.current_section)
-            self._update_stats()
             self.statusBar().showMessage(f"周常重置完成: 重置了{reset_count}个任务", 5000)
             logger.info(f"周常重置完成: 重置了{reset_count}个任务")
         except Exception as e:
             logger.error(f"处理周常重置事件失败: {e}")
     
-    def _on_task_added(self, task_id: int):
-        """任务添加事件"""
-        self._load_tasks(self.current_section)
-        self._update_stats()
-    
-    def _on_task_updated(self, task_id: int):
-        """任务更新事件"""
-        self._load_tasks(self.current_section)
-        self._update_stats()
-    
-    def _on_task_deleted(self, task_id: int):
-        """任务删除事件"""
-        self._load_tasks(self.current_section)
-        self._update_stats()
-    
-    def _on_task_completed(self, task_id: int):
-        """任务完成事件"""
-        self._load_tasks(self.current_section)
-        self._update_stats()
-    
-    def _on_task_uncompleted(self, task_id: int):
-        """任务取消完成事件"""
-        self._load_tasks(self.current_section)
-        self._update_stats()
+    def _on_tasks_changed(self, task_ids: list, kinds: list):
+        """任务变更事件（已合并）- 统一刷新任务列表、统计与标签"""
+        try:
+            if self._search_keyword:
+                # 搜索中：放弃基于旧数据的合并并重新搜索，变更的任务在合并新结果时重建卡片
+                self._stop_search_stream()
+                self._search_refresh_ids.update(task_ids)
+                self.search_controller.search(self._search_keyword, self._search_mode)
+            else:
+                self._load_tasks(self.current_section)
+            self._update_stats()
+            
+            if TAG_AFFECTING_KINDS.intersection(kinds):
+                self._load_tags()
+        except Exception as e:
+            logger.error(f"刷新任务变更失败: {e}")
     
     def _on_task_form_submitted(self, task_data: dict):
         """任务表单提交事件"""
@@ -1122,9 +1657,6 @@ class MainWindow(QMainWindow):
                 
                 if task_id != -1:
                     self.statusBar().showMessage(f"任务添加成功: {task_data['title']}", 3000)
-                    self._load_tasks(self.current_section)
-                    self._update_stats()
-                    self._load_tags()
                     
                     # 返回详情页
                     self._switch_to_detail_mode()
@@ -1135,15 +1667,16 @@ class MainWindow(QMainWindow):
                 # 更新任务
                 task_id = task_data.get("id", self.current_selected_task_id)
                 if task_id:
-                    success = self.task_manager.update_task(task_id, **task_data)
+                    # 更新与标签清理合并为一次刷新
+                    with change_bus.batch():
+                        success = self.task_manager.update_task(task_id, **task_data)
+                        
+                        if success:
+                            # 清理未使用的标签
+                            self.task_manager.repository.cleanup_unused_tags()
                     
                     if success:
                         self.statusBar().showMessage(f"任务更新成功: {task_data['title']}", 3000)
-                        self._load_tasks(self.current_section)
-                        
-                        # 清理未使用的标签
-                        self.task_manager.repository.cleanup_unused_tags()
-                        self._load_tags()
                         
                         # 更新详情并返回详情页
                         self._show_task_detail(task_data)
@@ -1158,7 +1691,6 @@ class MainWindow(QMainWindow):
     def _on_settings_saved(self):
         """设置保存事件"""
         self.statusBar().showMessage("设置已保存", 3000)
-        self._apply_settings()
         self._switch_to_detail_mode()
     
     def _on_form_cancelled(self):
@@ -1169,7 +1701,7 @@ class MainWindow(QMainWindow):
         """切换到详情模式"""
         self._panel_mode = 'detail'
         self.right_panel.set_title("任务详情")
-        self.panel_stack.setCurrentIndex(0)
+        self.panel_stack.setCurrentWidget(self.detail_page)
         
         # 如果没有选中任务，隐藏面板
         if not self.current_selected_task_id:
@@ -1327,15 +1859,19 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """窗口关闭事件"""
-        settings.set("window.width", self.width())
-        settings.set("window.height", self.height())
-        settings.set("window.maximized", self.isMaximized())
+        settings.set("window.width", self.width(), auto_save=False)
+        settings.set("window.height", self.height(), auto_save=False)
+        settings.set("window.maximized", self.isMaximized(), auto_save=False)
         
         if not self.isMaximized():
-            settings.set("window.x", self.x())
-            settings.set("window.y", self.y())
+            settings.set("window.x", self.x(), auto_save=False)
+            settings.set("window.y", self.y(), auto_save=False)
         
         settings.save()
+        settings.unsubscribe("ui.default_section", self._on_default_section_changed)
+        
+        self._stop_search_stream()
+        self.search_controller.stop()
         
         logger.info("应用程序关闭")
         event.accept()
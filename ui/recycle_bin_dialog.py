@@ -1,15 +1,102 @@
+from typing import Dict, List, Optional
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QListWidget, QListWidgetItem, QMessageBox, QGroupBox,
-    QFormLayout, QSpinBox, QCheckBox, QWidget, QSplitter
+    QListView, QLineEdit, QMessageBox, QGroupBox,
+    QFormLayout, QWidget, QSplitter
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractListModel, QModelIndex, QTimer
 from PyQt5.QtGui import QFont, QColor
-from datetime import datetime, timedelta
-from core.task_manager import TaskManager
+from core.task_manager import TaskManager, RECYCLE_PAGE_SIZE
 from utils.logger import logger
+from utils.common import format_datetime
 from ui.styles.qq_style import QQStyle
 
+# 回收站搜索防抖间隔（毫秒）
+RECYCLE_SEARCH_DEBOUNCE_MS = 150
+
+# 删除时间年龄分组（由查询计算：0=7天内，1=30天内，2=30天以上）对应的文字颜色
+AGE_BUCKET_COLORS = {
+    0: QColor(QQStyle.ACCENT_ORANGE),  # 7天内 - 橙色（可恢复提示）
+    1: QColor(128, 128, 128),          # 30天内 - 灰色
+    2: QColor(80, 80, 80),             # 30天以上 - 深灰色（即将自动清理）
+}
+
+
+class RecycleBinModel(QAbstractListModel):
+    """
+    回收站列表模型
+    
+    按删除时间倒序，视图滚动到底部时通过 fetchMore 按键集分页再读取一页，打开回收站只读取第一页，
+    与回收站大小无关。每行只保存 id、title、deleted_at 与 age_bucket，显示文字在绘制时生成。
+    """
+    
+    def __init__(self, task_manager: TaskManager, parent=None):
+        super().__init__(parent)
+        self.task_manager = task_manager
+        self._rows: List[Dict] = []
+        self._keyword = ""
+        self._exhausted = False
+    
+    @property
+    def keyword(self) -> str:
+        return self._keyword
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            title = row.get("title") or "未命名任务"
+            deleted_at = format_datetime(row.get("deleted_at"))
+            return f"{title} ({deleted_at})" if deleted_at else title
+        if role == Qt.ForegroundRole:
+            return AGE_BUCKET_COLORS.get(row.get("age_bucket"), AGE_BUCKET_COLORS[1])
+        if role == Qt.UserRole:
+            return row.get("id")
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """读取下一页（从已加载的最后一行之后继续）"""
+        if parent.isValid() or self._exhausted:
+            return
+        after = None
+        if self._rows:
+            last = self._rows[-1]
+            after = (last["deleted_at"], last["id"])
+        page = self.task_manager.get_deleted_page(RECYCLE_PAGE_SIZE, after, self._keyword)
+        if len(page) < RECYCLE_PAGE_SIZE:
+            self._exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+    
+    def reload(self, keyword: Optional[str] = None):
+        """清空已加载的行并从第一页重新读取（keyword 不为None时同时更换搜索条件）"""
+        self.beginResetModel()
+        if keyword is not None:
+            self._keyword = keyword.strip()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+    
+    def remove_task(self, task_id: int) -> bool:
+        """移除已加载的任务行（恢复或永久删除后调用）"""
+        for row, item in enumerate(self._rows):
+            if item["id"] == task_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                return True
+        return False
+
 
 class RecycleBinDialog(QDialog):
     """回收站对话框"""
@@ -18,7 +105,7 @@ class RecycleBinDialog(QDialog):
     task_restored = pyqtSignal(int)  # task_id
     task_permanently_deleted = pyqtSignal(int)  # task_id
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, task_manager: Optional[TaskManager] = None):
         super().__init__(parent)
         self.setWindowTitle("回收站")
         self.setModal(True)
@@ -27,8 +114,8 @@ class RecycleBinDialog(QDialog):
         # 应用统一样式
         self.setStyleSheet(QQStyle.get_dialog_style())
         
-        # 初始化任务管理器
-        self.task_manager = TaskManager()
+        # 任务管理器（未传入时自行创建）
+        self.task_manager = task_manager or TaskManager()
         
         # 当前选中的任务ID
         self.current_selected_task_id = None
@@ -58,10 +145,30 @@ class RecycleBinDialog(QDialog):
         # 创建分割器
         self.splitter = QSplitter(Qt.Horizontal)
         
-        # 左侧：任务列表
-        self.task_list_widget = QListWidget()
-        self.task_list_widget.itemClicked.connect(self._on_task_clicked)
-        self.splitter.addWidget(self.task_list_widget)
+        # 左侧：搜索框与任务列表（按页加载）
+        list_widget = QWidget()
+        list_layout = QVBoxLayout(list_widget)
+        list_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索回收站，如: 报告 tag:工作")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self._search_timer_restart)
+        list_layout.addWidget(self.search_input)
+        
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(RECYCLE_SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._on_search)
+        
+        self.task_model = RecycleBinModel(self.task_manager, self)
+        self.task_list_view = QListView()
+        self.task_list_view.setUniformItemSizes(True)
+        self.task_list_view.setModel(self.task_model)
+        self.task_list_view.selectionModel().currentChanged.connect(self._on_task_clicked)
+        list_layout.addWidget(self.task_list_view)
+        
+        self.splitter.addWidget(list_widget)
         
         # 右侧：任务详情
         self.detail_widget = self._create_detail_widget()
@@ -135,75 +242,47 @@ class RecycleBinDialog(QDialog):
         return widget
     
     def _load_deleted_tasks(self):
-        """加载已删除的任务"""
+        """加载已删除的任务（只读取第一页，其余在滚动时加载）"""
         try:
-            self.task_list_widget.clear()
-            
-            # 获取已删除的任务
-            deleted_tasks = self.task_manager.get_deleted_tasks()
-            
-            # 添加任务到列表
-            for task in deleted_tasks:
-                task_id = task.get("id", -1)
-                title = task.get("title", "未命名任务")
-                deleted_at = task.get("deleted_at", "")
-                
-                # 创建列表项
-                item_text = f"{title}"
-                if deleted_at:
-                    item_text += f" ({deleted_at})"
-                
-                item = QListWidgetItem(item_text)
-                item.setData(Qt.UserRole, task_id)  # 存储任务ID
-                
-                # 根据删除时间设置颜色
-                self._set_item_color(item, deleted_at)
-                
-                self.task_list_widget.addItem(item)
-            
-            # 更新统计信息
-            self._update_stats(len(deleted_tasks))
+            self.task_model.reload()
+            self._update_stats()
             
         except Exception as e:
             logger.error(f"加载已删除任务失败: {e}")
             QMessageBox.critical(self, "错误", f"加载已删除任务失败: {str(e)}")
     
-    def _set_item_color(self, item: QListWidgetItem, deleted_at: str):
-        """根据删除时间设置列表项颜色"""
+    def _search_timer_restart(self, _text: str = ""):
+        """搜索输入变化：停止输入一段时间后再执行搜索"""
+        self._search_timer.start()
+    
+    def _on_search(self):
+        """按搜索框内容重新加载列表"""
         try:
-            if not deleted_at:
-                item.setForeground(QColor(128, 128, 128))  # 默认灰色
-                return
-            
-            # 解析删除时间
-            deleted_time = datetime.fromisoformat(deleted_at.replace("T", " ").split(".")[0])
-            days_since_delete = (datetime.now() - deleted_time).days
-            
-            # 根据删除天数设置不同颜色
-            if days_since_delete <= 7:
-                # 7天内 - 橙色（可恢复提示）
-                item.setForeground(QColor(QQStyle.ACCENT_ORANGE))
-            elif days_since_delete <= 30:
-                # 30天内 - 灰色
-                item.setForeground(QColor(128, 128, 128))
-            else:
-                # 30天以上 - 深灰色（即将自动清理）
-                item.setForeground(QColor(80, 80, 80))
-                
-        except Exception:
-            item.setForeground(QColor(128, 128, 128))  # 解析失败用默认灰色
+            self.task_model.reload(self.search_input.text())
+            self._update_stats()
+        except Exception as e:
+            logger.error(f"搜索回收站失败: {e}")
     
-    def _update_stats(self, task_count: int):
-        """更新统计信息"""
-        self.stats_label.setText(f"已删除任务: {task_count} 个")
+    def _update_stats(self):
+        """更新统计信息（总数读取计数器，不统计搜索结果总数）"""
+        task_count = self.task_manager.get_deleted_count()
+        text = f"已删除任务: {task_count} 个"
+        if self.task_model.keyword:
+            loaded = self.task_model.rowCount()
+            more = "+" if self.task_model.canFetchMore() else ""
+            text += f"，匹配: {loaded}{more} 个"
+        self.stats_label.setText(text)
         
         # 更新按钮状态
         self.empty_btn.setEnabled(task_count > 0)
     
-    def _on_task_clicked(self, item):
-        """任务点击事件"""
+    def _on_task_clicked(self, index: QModelIndex, _previous: QModelIndex = QModelIndex()):
+        """任务选中事件（选中时才读取任务详情）"""
         try:
-            task_id = item.data(Qt.UserRole)
+            if not index.isValid():
+                self._clear_detail()
+                return
+            task_id = index.data(Qt.UserRole)
             self.current_selected_task_id = task_id
             
             # 获取任务详情
@@ -230,10 +309,7 @@ class RecycleBinDialog(QDialog):
             tags = task.get("tags", [])
             
             # 格式化创建时间
-            if created_at and "." in created_at:
-                created_at = created_at.split(".")[0]
-            if created_at and "T" in created_at:
-                created_at = created_at.replace("T", " ")
+            created_at = format_datetime(created_at)
             
             # 分区显示名称
             section_names = {
@@ -280,9 +356,7 @@ class RecycleBinDialog(QDialog):
             self.detail_content.setText(html)
             
             # 更新删除信息
-            if deleted_at and "T" in deleted_at:
-                deleted_at = deleted_at.replace("T", " ").split(".")[0]
-            self.deleted_at_label.setText(deleted_at)
+            self.deleted_at_label.setText(format_datetime(deleted_at))
             self.deleted_by_label.setText("手动删除")
             
         except Exception as e:
@@ -332,7 +406,7 @@ class RecycleBinDialog(QDialog):
             reply = QMessageBox.question(
                 self,
                 "确认永久删除",
-                "确定要永久删除这个任务吗？\n\n此操作不可撤销！",
+                "确定要永久删除这个任务吗？\n\n关闭回收站后可按 Ctrl+Z 撤销。",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
@@ -362,7 +436,7 @@ class RecycleBinDialog(QDialog):
             reply = QMessageBox.question(
                 self,
                 "确认清空回收站",
-                "确定要清空回收站吗？\n\n所有已删除的任务将被永久删除，此操作不可撤销！",
+                "确定要清空回收站吗？\n\n所有已删除的任务将被永久删除，回收站任务过多时无法撤销！",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
@@ -372,9 +446,9 @@ class RecycleBinDialog(QDialog):
                 count = self.task_manager.empty_recycle_bin()
                 
                 # 清空列表
-                self.task_list_widget.clear()
                 self._clear_detail()
-                self._update_stats(0)
+                self.task_model.reload()
+                self._update_stats()
                 
                 QMessageBox.information(self, "成功", f"回收站已清空，删除了 {count} 个任务")
                     
@@ -384,14 +458,14 @@ class RecycleBinDialog(QDialog):
     
     def _remove_current_task_from_list(self):
         """从列表中移除当前选中的任务"""
-        current_item = self.task_list_widget.currentItem()
-        if current_item:
-            row = self.task_list_widget.row(current_item)
-            self.task_list_widget.takeItem(row)
+        task_id = self.current_selected_task_id
+        if task_id is not None:
+            # 先取消选中，避免删除行后自动选中下一行
+            self.task_list_view.selectionModel().clear()
+            self.task_model.remove_task(task_id)
             
             # 更新统计
-            task_count = self.task_list_widget.count()
-            self._update_stats(task_count)
+            self._update_stats()
     
     def _clear_detail(self):
         """清除详情显示"""
@@ -125,35 +125,35 @@ class SettingsDialog(QDialog):
         """加载设置"""
         try:
             # 重置设置
-            daily_reset_str = settings.get("daily_reset_time", "06:00")
+            daily_reset_str = settings.get("task.daily_reset_time", "06:00")
             reset_time = QTime.fromString(daily_reset_str, "HH:mm")
             if reset_time.isValid():
                 self.daily_reset_time.setTime(reset_time)
             
-            weekly_day = settings.get("weekly_reset_day", 0)  # 0=星期一
+            weekly_day = settings.get("task.weekly_reset_day", 0)  # 0=星期一
             self.weekly_reset_day.setCurrentIndex(weekly_day)
             
-            auto_reset = settings.get("auto_reset_enabled", True)
+            auto_reset = settings.get("task.auto_reset_enabled", True)
             self.auto_reset_enabled.setChecked(auto_reset)
             
             # 界面设置
-            default_section = settings.get("default_section", 0)  # 0=日常任务
+            default_section = settings.get("ui.default_section", 0)  # 0=日常任务
             self.default_section.setCurrentIndex(default_section)
             
-            show_completed = settings.get("show_completed", True)
+            show_completed = settings.get("ui.show_completed", True)
             self.show_completed.setChecked(show_completed)
             
-            auto_expand = settings.get("auto_expand_panel", False)
+            auto_expand = settings.get("ui.auto_expand_panel", False)
             self.auto_expand_panel.setChecked(auto_expand)
             
             # 数据设置
-            recycle_capacity = settings.get("recycle_bin_capacity", 100)
+            recycle_capacity = settings.get("task.recycle_bin_capacity", 100)
             self.recycle_bin_capacity.setValue(recycle_capacity)
             
-            auto_backup = settings.get("auto_backup", False)
+            auto_backup = settings.get("data.auto_backup", False)
             self.auto_backup.setChecked(auto_backup)
             
-            backup_interval = settings.get("backup_interval", 7)
+            backup_interval = settings.get("data.backup_interval", 7)
             self.backup_interval.setValue(backup_interval)
             self.backup_interval.setEnabled(auto_backup)
             
@@ -166,33 +166,33 @@ class SettingsDialog(QDialog):
         try:
             # 重置设置
             daily_reset_time = self.daily_reset_time.time().toString("HH:mm")
-            settings.set("daily_reset_time", daily_reset_time)
+            settings.set("task.daily_reset_time", daily_reset_time, auto_save=False)
             
             weekly_reset_day = self.weekly_reset_day.currentIndex()
-            settings.set("weekly_reset_day", weekly_reset_day)
+            settings.set("task.weekly_reset_day", weekly_reset_day, auto_save=False)
             
             auto_reset_enabled = self.auto_reset_enabled.isChecked()
-            settings.set("auto_reset_enabled", auto_reset_enabled)
+            settings.set("task.auto_reset_enabled", auto_reset_enabled, auto_save=False)
             
             # 界面设置
             default_section = self.default_section.currentIndex()
-            settings.set("default_section", default_section)
+            settings.set("ui.default_section", default_section, auto_save=False)
             
             show_completed = self.show_completed.isChecked()
-            settings.set("show_completed", show_completed)
+            settings.set("ui.show_completed", show_completed, auto_save=False)
             
             auto_expand_panel = self.auto_expand_panel.isChecked()
-            settings.set("auto_expand_panel", auto_expand_panel)
+            settings.set("ui.auto_expand_panel", auto_expand_panel, auto_save=False)
             
             # 数据设置
             recycle_bin_capacity = self.recycle_bin_capacity.value()
-            settings.set("recycle_bin_capacity", recycle_bin_capacity)
+            settings.set("task.recycle_bin_capacity", recycle_bin_capacity, auto_save=False)
             
             auto_backup = self.auto_backup.isChecked()
-            settings.set("auto_backup", auto_backup)
+            settings.set("data.auto_backup", auto_backup, auto_save=False)
             
             backup_interval = self.backup_interval.value()
-            settings.set("backup_interval", backup_interval)
+            settings.set("data.backup_interval", backup_interval, auto_save=False)
             
             # 保存到文件
             if settings.save():
@@ -53,6 +53,9 @@ class QQStyle:
     INFO = '#409EFF'
     INFO_LIGHT = '#D9ECFF'
     
+    # 搜索匹配高亮
+    HIGHLIGHT = '#FFE58F'
+    
     # 阴影
     SHADOW_LIGHT = 'rgba(0, 0, 0, 0.04)'
     SHADOW_NORMAL = 'rgba(0, 0, 0, 0.08)'
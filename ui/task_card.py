@@ -10,7 +10,9 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal, QPropertyAnimation, QEasingCurve, QSize
 from PyQt5.QtGui import QFont, QColor
 from datetime import date
+from typing import Dict, List, Optional, Tuple
 
+from core.search_ranker import highlight_html
 from ui.styles.qq_style import QQStyle
 from utils.resource import Icons
 
@@ -23,17 +25,20 @@ class TaskCard(QFrame):
     clicked = pyqtSignal(int)  # task_id
     double_clicked = pyqtSignal(int)  # task_id
     
-    def __init__(self, task_data: dict, parent=None):
+    def __init__(self, task_data: dict, parent=None,
+                 highlights: Optional[Dict[str, List[Tuple[int, int]]]] = None):
         """
         初始化任务卡片
         
         Args:
             task_data: 任务数据字典
             parent: 父控件
+            highlights: 搜索匹配位置（SearchHit.spans），标题、描述、标签中的匹配部分高亮显示
         """
         super().__init__(parent)
         self.task_id = task_data.get("id", -1)
         self.task_data = task_data
+        self.highlights = highlights or {}
         self._is_selected = False
         self._is_hovered = False
         
@@ -118,7 +123,8 @@ class TaskCard(QFrame):
         info_layout.setSpacing(8)
         
         # 标题 - 增大字体
-        self.title_label = QLabel(self.task_data.get("title", "未命名任务"))
+        self.title_label = QLabel()
+        self._set_label_text(self.title_label, self.task_data.get("title", "未命名任务"), "title")
         self.title_label.setObjectName("task_title")
         self.title_label.setStyleSheet(f"""
             font-size: 18px;
@@ -130,7 +136,8 @@ class TaskCard(QFrame):
         # 描述（如果有）- 增大字体
         description = self.task_data.get("description", "")
         if description:
-            self.desc_label = QLabel(description)
+            self.desc_label = QLabel()
+            self._set_label_text(self.desc_label, description, "description")
             self.desc_label.setObjectName("task_desc")
             self.desc_label.setWordWrap(True)
             self.desc_label.setMaximumHeight(45)
@@ -143,6 +150,7 @@ class TaskCard(QFrame):
             self.desc_label = None
         
         # 标签区域 - 使用辅助色
+        self._tag_labels = []  # [(标签控件, 文字颜色, 背景色)]
         tags = self.task_data.get("tags", [])
         if tags:
             tags_widget = QWidget()
@@ -162,15 +170,9 @@ class TaskCard(QFrame):
             for i, tag in enumerate(tags[:3]):  # 最多显示3个标签
                 color, bg = tag_colors[i % len(tag_colors)]
                 tag_label = QLabel(tag)
-                tag_label.setStyleSheet(f"""
-                    background-color: {bg};
-                    border-radius: 12px;
-                    padding: 5px 14px;
-                    font-size: 13px;
-                    font-weight: bold;
-                    color: {color};
-                """)
+                self._tag_labels.append((tag_label, color, bg))
                 tags_layout.addWidget(tag_label)
+            self._apply_tag_styles()
             
             if len(tags) > 3:
                 more_label = QLabel(f"+{len(tags) - 3}")
@@ -254,6 +256,42 @@ class TaskCard(QFrame):
         
         main_layout.addLayout(content_layout)
     
+    def _set_label_text(self, label: QLabel, text: str, field: str):
+        """设置标签文本（有搜索匹配位置时以富文本高亮）"""
+        spans = self.highlights.get(field)
+        if spans:
+            label.setTextFormat(Qt.RichText)
+            label.setText(highlight_html(text, spans, QQStyle.HIGHLIGHT))
+        else:
+            label.setTextFormat(Qt.AutoText)
+            label.setText(text)
+    
+    def _apply_tag_styles(self):
+        """设置标签样式（匹配搜索关键词的标签加高亮边框）"""
+        matched = {start for start, _ in self.highlights.get("tags", [])}
+        for i, (tag_label, color, bg) in enumerate(self._tag_labels):
+            border = f"2px solid {QQStyle.HIGHLIGHT}" if i in matched else "none"
+            tag_label.setStyleSheet(f"""
+                background-color: {bg};
+                border: {border};
+                border-radius: 12px;
+                padding: 5px 14px;
+                font-size: 13px;
+                font-weight: bold;
+                color: {color};
+            """)
+    
+    def set_highlights(self, highlights: Optional[Dict[str, List[Tuple[int, int]]]]):
+        """更新搜索匹配高亮（关键词变化但卡片仍在结果中时使用，无需重建卡片）"""
+        highlights = highlights or {}
+        if highlights == self.highlights:
+            return
+        self.highlights = highlights
+        self._set_label_text(self.title_label, self.task_data.get("title", "未命名任务"), "title")
+        if self.desc_label:
+            self._set_label_text(self.desc_label, self.task_data.get("description", ""), "description")
+        self._apply_tag_styles()
+    
     def _apply_styles(self):
         """应用样式"""
         is_completed = bool(self.task_data.get("is_completed", False))
@@ -400,7 +438,8 @@ class TaskCard(QFrame):
         self.task_data.update(new_data)
         
         # 更新UI
-        self.title_label.setText(self.task_data.get("title", "未命名任务"))
+        self.highlights.pop("title", None)  # 标题可能已修改，原匹配位置不再适用
+        self._set_label_text(self.title_label, self.task_data.get("title", "未命名任务"), "title")
         
         # 更新复选框状态
         is_completed = bool(self.task_data.get("is_completed", False))
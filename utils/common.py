@@ -1,10 +1,19 @@
 """
 通用工具模块
 """
-from datetime import datetime, date
+import time
+from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Optional, Any
 from utils.logger import logger
 
+# 日期以 1970-01-01 起的天数存储（epoch days），时间以本地时间对应的 Unix 秒存储
+EPOCH_DATE = date(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+# 界面显示时间的格式
+DISPLAY_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 def safe_isoformat(dt: Optional[datetime | date]) -> Optional[str]:
     """安全地将日期时间转换为ISO格式字符串（处理None值）"""
@@ -41,4 +50,87 @@ def escape_sql_in_list(ids: list[int]) -> str:
         return "()"
     # 确保所有ID都是整数
     valid_ids = [str(int(id_)) for id_ in ids if isinstance(id_, int)]
-    return f"({','.join(valid_ids)})"
\ No newline at end of file
+    return f"({','.join(valid_ids)})"
+
+
+# ========== 时间戳存储 ==========
+def now_epoch() -> int:
+    """当前时间的 Unix 秒"""
+    return int(time.time())
+
+
+def today_epoch_days() -> int:
+    """今天（本地日期）的 epoch days"""
+    return (date.today() - EPOCH_DATE).days
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """将 datetime / date / ISO字符串 / Unix秒 解析为 datetime（无效值返回None）"""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        if isinstance(value, (int, float)):
+            return from_epoch_seconds(int(value))
+        return datetime.fromisoformat(str(value).strip())
+    except (ValueError, TypeError, OverflowError, OSError) as e:
+        logger.warning(f"解析时间失败: {e}, 值: {value!r}")
+        return None
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """将 date / datetime / ISO字符串 / epoch days 解析为 date（无效值返回None）"""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, int):
+            return from_epoch_days(value)
+        return date.fromisoformat(str(value).strip()[:10])
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.warning(f"解析日期失败: {e}, 值: {value!r}")
+        return None
+
+
+def to_epoch_seconds(value: Any) -> Optional[int]:
+    """转换为存储用的 Unix 秒（整数原样返回）"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    dt = parse_datetime(value)
+    return int(dt.timestamp()) if dt is not None else None
+
+
+def to_epoch_days(value: Any) -> Optional[int]:
+    """转换为存储用的 epoch days（整数原样返回）"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    d = parse_date(value)
+    return (d - EPOCH_DATE).days if d is not None else None
+
+
+@lru_cache(maxsize=8192)
+def from_epoch_seconds(seconds: Optional[int]) -> Optional[datetime]:
+    """Unix 秒 -> 本地时间 datetime（结果缓存，重复读取不再换算）"""
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds)
+
+
+@lru_cache(maxsize=4096)
+def from_epoch_days(days: Optional[int]) -> Optional[date]:
+    """epoch days -> date（结果缓存，同一天的任务共享同一个对象）"""
+    if days is None:
+        return None
+    return EPOCH_DATE + timedelta(days=days)
+
+
+def format_datetime(value: Any, fmt: str = DISPLAY_DATETIME_FORMAT) -> str:
+    """格式化时间用于显示（无效值返回空字符串）"""
+    dt = parse_datetime(value)
+    return dt.strftime(fmt) if dt is not None else ""
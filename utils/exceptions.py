@@ -23,6 +23,11 @@ class DatabaseError(TaskRepositoryError):
     pass
 
 
+class JournalConflictError(TaskRepositoryError):
+    """撤销记录与当前数据不一致（记录涉及的任务已被未记录的操作删除或占用）"""
+    pass
+
+
 class ValidationError(Exception):
     """数据验证异常"""
     pass
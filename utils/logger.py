@@ -153,6 +153,37 @@ class LogManager:
         """获取当前会话的日志目录"""
         return self.session_dir
     
+    def get_file_logger(self, name: str, filename: str, log_level=logging.INFO) -> logging.Logger:
+        """
+        获取写入会话目录下独立文件的日志器（如 slow_queries.log、stalls.log）
+        
+        独立日志器不向主日志器传播，避免大段诊断信息刷屏控制台和 app.log。
+        
+        Args:
+            name: 子日志器名称
+            filename: 会话目录下的文件名
+            log_level: 日志级别
+            
+        Returns:
+            logging.Logger: 配置好的日志器
+        """
+        base_name = self.logger.name if self.logger else "youmeng"
+        file_logger = logging.getLogger(f"{base_name}.{name}")
+        
+        if not file_logger.handlers and self.session_dir:
+            file_handler = logging.FileHandler(
+                os.path.join(self.session_dir, filename), encoding="utf-8", delay=True
+            )
+            file_handler.setFormatter(logging.Formatter(
+                "%(asctime)s - %(levelname)s - %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S"
+            ))
+            file_logger.addHandler(file_handler)
+            file_logger.setLevel(log_level)
+            file_logger.propagate = False
+        
+        return file_logger
+    
     def get_all_sessions(self) -> list:
         """获取所有日志会话列表"""
         sessions = []
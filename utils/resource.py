@@ -16,8 +16,8 @@ def resource_path(relative_path):
         # PyInstaller创建的临时文件夹
         base_path = sys._MEIPASS
     except AttributeError:
-        # 正常Python环境
-        base_path = os.path.abspath(".")
+        # 正常Python环境：以项目根目录为基准（不依赖当前工作目录）
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     
     # 构建完整路径
     full_path = os.path.join(base_path, relative_path)
@@ -72,7 +72,20 @@ def ensure_directory(path):
         return False
 
 
+class _LazyIcon:
+    """图标路径描述符 - 首次访问时才解析路径并缓存，避免导入时的文件系统操作"""
+    
+    def __init__(self, icon_name):
+        self.icon_name = icon_name
+        self._path = None
+    
+    def __get__(self, instance, owner):
+        if self._path is None:
+            self._path = get_icon_path(self.icon_name)
+        return self._path
+
+
 class Icons:
     """图标路径常量 - 统一管理所有图标引用"""
-    CHECK_GREEN = get_icon_path("check_green.svg")
-    CHECK_BLUE = get_icon_path("check_blue.svg")
\ No newline at end of file
+    CHECK_GREEN = _LazyIcon("check_green.svg")
+    CHECK_BLUE = _LazyIcon("check_blue.svg")
\ No newline at end of file
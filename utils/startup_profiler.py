@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+启动性能分析模块 - 记录冷启动各阶段耗时，生成启动时间线
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# 最多记录的条目数（非应用启动场景下反复调用时避免无限增长）
+MAX_ENTRIES = 200
+
+
+class StartupProfiler:
+    """启动分析器 - 记录阶段（区间）和标记（时间点），时间均相对于分析器创建时刻"""
+    
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        self._depth = 0
+        self._finished = False
+    
+    def _now_ms(self) -> float:
+        """距起点的毫秒数"""
+        return (time.perf_counter() - self._origin) * 1000
+    
+    def mark(self, name: str):
+        """
+        记录时间点标记
+        
+        Args:
+            name: 标记名称
+        """
+        if self._finished or len(self._entries) >= MAX_ENTRIES:
+            return
+        
+        with self._lock:
+            self._entries.append({
+                "name": name,
+                "start_ms": self._now_ms(),
+                "duration_ms": None,
+                "depth": self._depth,
+            })
+    
+    @contextmanager
+    def phase(self, name: str):
+        """
+        记录阶段耗时（支持嵌套）
+        
+        Args:
+            name: 阶段名称
+        """
+        if self._finished or len(self._entries) >= MAX_ENTRIES:
+            yield
+            return
+        
+        with self._lock:
+            entry = {
+                "name": name,
+                "start_ms": self._now_ms(),
+                "duration_ms": None,
+                "depth": self._depth,
+            }
+            self._entries.append(entry)
+            self._depth += 1
+        
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry["duration_ms"] = self._now_ms() - entry["start_ms"]
+                self._depth -= 1
+    
+    def finish(self):
+        """结束记录（首帧绘制后调用，之后的标记和阶段将被忽略）"""
+        self.mark("startup_complete")
+        self._finished = True
+    
+    @property
+    def finished(self) -> bool:
+        return self._finished
+    
+    def get_entries(self) -> List[Dict]:
+        """获取时间线记录（副本）"""
+        with self._lock:
+            return [dict(entry) for entry in self._entries]
+    
+    def get_total_ms(self) -> Optional[float]:
+        """获取总启动耗时（毫秒），尚未结束时返回None"""
+        if not self._finished:
+            return None
+        
+        entries = self.get_entries()
+        return entries[-1]["start_ms"] if entries else None
+    
+    def report(self) -> str:
+        """
+        生成启动时间线文本报告
+        
+        Returns:
+            str: 多行报告文本
+        """
+        lines = ["启动时间线（毫秒，相对于进程入口）:"]
+        for entry in self.get_entries():
+            indent = "  " * (entry["depth"] + 1)
+            if entry["duration_ms"] is None:
+                lines.append(f"{indent}@{entry['start_ms']:9.1f}  {entry['name']}")
+            else:
+                lines.append(
+                    f"{indent}{entry['start_ms']:10.1f}  {entry['name']:<24} {entry['duration_ms']:9.1f} ms"
+                )
+        
+        total = self.get_total_ms()
+        if total is not None:
+            lines.append(f"  总计: {total:.1f} ms")
+        return "\n".join(lines)
+
+
+# 全局启动分析器（在 main.py 最先导入，以便尽早确定起点）
+startup_profiler = StartupProfiler()